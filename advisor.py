@@ -0,0 +1,321 @@
+"""Action advice for the interactive game: the odds of surviving after each menu option.
+
+For every daytime action the advisor plays `rollouts` games forward from the
+current state: the action first, then the heuristic policy for the rest of
+the game, and counts how many reach MAX_DAYS alive. Rollouts run on a
+process pool (spawned, so forking a game process that has threads is never
+an issue) in chunks, with the same seeds for every option, so the options
+are compared on the same luck.
+
+Advice is cached in an LRU keyed by canonical_key(): a hash of the state,
+the actions left today, the difficulty preset and the content version, so
+two identical positions share one entry whatever order their dict keys are
+in. Once a player has asked for advice, main() calls prefetch() every time
+it shows the action menu. That queues rollouts for the current position and
+for the positions one deterministic action away (eat, drink, bandage...)
+while the player reads the menu, and cancels queued work for positions that
+can no longer come up. Most requests are then answered from the cache.
+
+The game offers advice only where a host installs survival.ADVISOR_FACTORY;
+`--game` plays the interactive game with it installed.
+
+    python advisor.py --difficulty Hard --day 8 --health 40 --food 0
+    python advisor.py --game --workers 4
+"""
+import argparse
+import contextlib
+import copy
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import content
+import simulation
+import survival
+from stats import RunningProportion
+
+ROLLOUTS = 200        # games played forward per option
+CHUNK = 50            # rollouts per pool task
+CACHE_SIZE = 256      # positions kept in the LRU
+# Options advised on: every daytime action except quitting
+OPTIONS = [i for i in range(len(survival.ACTION_OPTIONS)) if i != survival.QUIT_ACTION]
+# Actions whose outcome involves no dice, so the next position can be prefetched
+DETERMINISTIC = (survival.ACTION_NAMES.index('eat'), survival.ACTION_NAMES.index('drink'),
+                 survival.ACTION_NAMES.index('use_bandage'))
+
+
+def canonical_key(state, actions_left, preset, compiled, max_days):
+    """Stable hash of everything a rollout from this position depends on."""
+    effects = state.get('status_effects') or {}
+    position = {
+        'state': {k: v for k, v in state.items() if k != 'status_effects' and v is not False},
+        'effects': {k: v for k, v in effects.items()},
+        'actions_left': actions_left,
+        'preset': preset,
+        'content': compiled.version,
+        'max_days': max_days,
+    }
+    raw = json.dumps(position, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def rollout(state, actions_left, option, policy, max_days):
+    """Play the rest of the game from a mid-day position, `option` first. True if it survives.
+
+    The caller installs the difficulty, content and output globals (see _rollouts).
+    """
+    state = copy.deepcopy(state)
+    survival.CHOICE_HOOK = lambda options: policy.choose_option(
+        state, simulation.prompt_kind(options), options)
+    survived_day = True
+    choice = option
+    for i in range(actions_left):
+        if i:
+            choice = policy.choose_action(state)
+        if not survival.perform_action(state, choice):
+            survived_day = False
+        if state['health'] <= 0:
+            break
+    try:
+        survival.apply_night_effects(state, survived_day)
+        survival.danger_event(state)
+    except Exception:
+        state['status_effects'] = {}
+    state['day'] += 1
+    while state['health'] > 0 and state['day'] <= max_days:
+        survival.roll_item_discovery(state)
+        event = None
+        while event is None and state['health'] > 0:
+            _, event, _ = simulation.play_day(state, policy)
+        state['day'] += 1
+    return state['health'] > 0
+
+
+def _rollouts(task):
+    state, actions_left, option, seeds, preset, compiled, max_days = task
+    policy = simulation.HeuristicPolicy()
+    saved = survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT
+    survival.CURRENT_DIFFICULTY, survival.CONTENT = preset, compiled
+    survived = 0
+    try:
+        with contextlib.redirect_stdout(simulation.NULL_OUTPUT):
+            for seed in seeds:
+                random.seed(seed)
+                policy.start_game(seed)
+                survived += rollout(state, actions_left, option, policy, max_days)
+    finally:
+        survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT = saved
+    return option, len(seeds), survived
+
+
+class _Job:
+    """The rollouts of one position, in flight on the pool."""
+
+    def __init__(self, futures):
+        self.futures = futures
+        self.counts = {}
+        self.remaining = len(futures)
+        self.failed = False
+        self.error = None
+        self.done = threading.Event()
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
+
+
+class Advisor:
+    """Rollout advice with an LRU cache and background prefetching. Thread-safe."""
+
+    def __init__(self, workers=None, rollouts=ROLLOUTS, cache_size=CACHE_SIZE, max_days=None):
+        self.workers = workers or os.cpu_count()
+        self.rollouts = rollouts
+        self.cache_size = cache_size
+        self.max_days = max_days or survival.MAX_DAYS
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()    # key -> [(option, RunningProportion)]
+        self._jobs = {}                # key -> _Job
+        self._lock = threading.RLock()   # done-callbacks may run inside _submit
+        self._pool = None
+
+    def close(self):
+        with self._lock:
+            for job in list(self._jobs.values()):   # cancelling runs _finished, which drops jobs
+                job.cancel()
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, key, state, actions_left, preset, compiled):
+        # called with the lock held
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'))
+        seeds = [f"advice:{key}:{i}" for i in range(self.rollouts)]
+        chunks = [seeds[i:i + CHUNK] for i in range(0, len(seeds), CHUNK)]
+        state = copy.deepcopy(state)
+        futures = [self._pool.submit(_rollouts, (state, actions_left, option, chunk, preset,
+                                                 compiled, self.max_days))
+                   for chunk in chunks for option in OPTIONS]
+        job = self._jobs[key] = _Job(futures)
+        for future in futures:
+            future.add_done_callback(lambda future, key=key, job=job: self._finished(key, job, future))
+        return job
+
+    def _finished(self, key, job, future):
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                job.failed = True
+                job.error = job.error or (None if future.cancelled() else future.exception())
+            else:
+                option, n, survived = future.result()
+                total = job.counts.setdefault(option, [0, 0])
+                total[0] += n
+                total[1] += survived
+            job.remaining -= 1
+            if job.remaining:
+                return
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+            if not job.failed:
+                advice = []
+                for option in OPTIONS:
+                    p = RunningProportion()
+                    p.n, p.hits = job.counts[option]
+                    advice.append((option, p))
+                self._remember(key, advice)
+        job.done.set()
+
+    def _remember(self, key, advice):
+        self._cache[key] = advice
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def advise(self, state, actions_left, preset, compiled):
+        """[(option, RunningProportion of surviving)] best first, and where it came from:
+        'cache', 'prefetch' (was already being computed) or 'rollouts'."""
+        key = canonical_key(state, actions_left, preset, compiled, self.max_days)
+        source = 'cache'
+        while True:
+            with self._lock:
+                advice = self._cache.get(key)
+                if advice is not None:
+                    self._cache.move_to_end(key)
+                    break
+                job = self._jobs.get(key)
+                if job is None:
+                    job = self._submit(key, state, actions_left, preset, compiled)
+                    source = 'rollouts'
+                elif source == 'cache':
+                    source = 'prefetch'
+            job.done.wait()
+            if job.error is not None:
+                raise job.error
+        if source == 'cache':
+            self.hits += 1
+        else:
+            self.misses += 1
+        return sorted(advice, key=lambda item: -item[1].value), source
+
+    def describe(self, advice, source, elapsed):
+        """The advice table shown in the game (see format_advice)."""
+        return format_advice(advice, source, elapsed)
+
+    def prefetch(self, state, actions_left, preset, compiled):
+        """Queue rollouts for this position and the deterministic positions after it,
+        cancelling queued work for any other position. Returns at once."""
+        positions = [(state, actions_left)]
+        if actions_left > 1:
+            positions += [(after, actions_left - 1) for after in successors(state, preset, compiled)]
+        wanted = {}
+        for position, left in positions:
+            wanted.setdefault(canonical_key(position, left, preset, compiled, self.max_days),
+                              (position, left))
+        with self._lock:
+            for key, job in list(self._jobs.items()):
+                if key not in wanted:
+                    job.cancel()
+            for key, (position, left) in wanted.items():
+                if key not in self._cache and key not in self._jobs:
+                    self._submit(key, position, left, preset, compiled)
+
+
+def successors(state, preset, compiled):
+    """States after each DETERMINISTIC action that would change something."""
+    after = []
+    saved = survival.CURRENT_DIFFICULTY, survival.CONTENT
+    survival.CURRENT_DIFFICULTY, survival.CONTENT = preset, compiled
+    try:
+        with contextlib.redirect_stdout(simulation.NULL_OUTPUT):
+            for option in DETERMINISTIC:
+                candidate = copy.deepcopy(state)
+                survival.perform_action(candidate, option)
+                if candidate != state:
+                    after.append(candidate)
+    finally:
+        survival.CURRENT_DIFFICULTY, survival.CONTENT = saved
+    return after
+
+
+def format_advice(advice, source, elapsed, confidence=0.95):
+    """The advice table shown in the game."""
+    n = advice[0][1].n if advice else 0
+    how = {'cache': "cached", 'prefetch': "finished in the background",
+           'rollouts': "just computed"}[source]
+    lines = [f"Odds of surviving to day {survival.MAX_DAYS} after each action "
+             f"({n} rollouts each, {how}, {elapsed * 1000:.0f} ms):"]
+    for option, p in advice:
+        lo, hi = p.interval(confidence)
+        lines.append(f"  {p.value:4.0%} [{lo:4.0%}-{hi:4.0%}]  {option + 1:>2}. "
+                     f"{survival.ACTION_OPTIONS[option]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Advise on a position of the survival game.")
+    parser.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    parser.add_argument('--actions-left', type=int, default=2, choices=(1, 2))
+    parser.add_argument('--rollouts', type=int, default=ROLLOUTS)
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    for field in ('day', 'health', 'hunger', 'thirst', 'food', 'water'):
+        parser.add_argument(f'--{field}', type=int)
+    parser.add_argument('--shelter', action='store_true')
+    parser.add_argument('--fire', action='store_true')
+    parser.add_argument('--game', action='store_true',
+                        help="play the interactive game with its Advise option instead")
+    args = parser.parse_args(argv)
+
+    if args.game:
+        survival.ADVISOR_FACTORY = functools.partial(Advisor, args.workers, args.rollouts)
+        survival.main_menu()
+        return
+
+    compiled = content.current()
+    preset = compiled.presets[args.difficulty]
+    state = survival.new_game_state(preset)
+    for field in ('day', 'health', 'hunger', 'thirst', 'food', 'water'):
+        if getattr(args, field) is not None:
+            state[field] = getattr(args, field)
+    state['shelter'], state['fire'] = args.shelter, args.fire
+    survival.update_season(state)
+
+    advisor = Advisor(args.workers, args.rollouts)
+    try:
+        for _ in range(2):
+            start = time.perf_counter()
+            advice, source = advisor.advise(state, args.actions_left, preset, compiled)
+            print(format_advice(advice, source, time.perf_counter() - start))
+    finally:
+        advisor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Benchmark suite with budgets: a run fails when any metric is over its budget.
+
+Every benchmark returns a report and a dict of metrics (lower is better).
+BUDGETS holds the upper limit of each metric that has one; override them
+with `--budget name=value` or a JSON file of {name: value} (`--budgets`).
+The exit status is 1 if any metric is over budget, so CI can run this and
+fail on a regression.
+
+    python bench.py                        # every benchmark
+    python bench.py memory --games 100 --difficulty Hard
+    python bench.py memory --budget memory.live_per_game=600
+    python bench.py rules --rules bot.rules
+"""
+import argparse
+import json
+import sys
+import time
+
+import memprof
+import rulebook
+import survival
+
+# Upper limits, in the unit of each metric (bytes for memory.*). Roughly twice
+# what the current code measures, so noise passes and real regressions do not.
+BUDGETS = {
+    'memory.live_per_game': 1500,
+    'memory.growth_per_day': 64,
+    'memory.peak_per_day': 16384,
+    'memory.actions.peak': 2048,
+    'memory.night.peak': 2048,
+    'memory.events.peak': 4096,
+    'memory.combat.peak': 2048,
+    'memory.validation.peak': 2048,
+    'memory.rendering.peak': 2048,
+    'memory.state.live': 1024,
+    'memory.events.live': 256,
+    'rules.us_per_decision': 5.0,
+    'rules.compile_ms': 10.0,
+    'rules.disagreements': 0,
+}
+
+
+def bench_memory(args):
+    """tracemalloc attribution of simulated games (see memprof.py)."""
+    report = memprof.profile(args.difficulty, args.games, args.seed)
+    metrics = {f'memory.{name}': value for name, value in memprof.metrics(report).items()}
+    return memprof.format_report(report), metrics
+
+
+def bench_rules(args):
+    """Decision throughput of a compiled rule set (rulebook.py) on states met in play.
+
+    With the built-in ROUTINE it also counts the states where the rules and
+    the hand-written routine_action() disagree.
+    """
+    text, name = rulebook.ROUTINE, 'ROUTINE'
+    if args.rules:
+        try:
+            with open(args.rules) as f:
+                text, name = f.read(), args.rules
+        except OSError as e:
+            raise SystemExit(f"error: cannot read rules: {e}")
+    start = time.perf_counter()
+    try:
+        rules = rulebook.RuleSet(text, name)
+    except rulebook.RuleError as e:
+        raise SystemExit(f"error: {e}")
+    compile_ms = (time.perf_counter() - start) * 1000
+    states = rulebook.sample_states(args.difficulty, args.games, args.seed)
+    compiled = rulebook.throughput(rules.action, states)
+    floor = rulebook.throughput(rulebook.RuleSet('forage').action, states)
+    hand_written = rulebook.throughput(survival.routine_action, states)
+    count = sum(len(r) for r in rules.rules.values())
+    lines = [f"== Rules: {name} ({count} rules) on {len(states):,} states from "
+             f"{args.games} {args.difficulty} games",
+             f"  compile          {compile_ms:8.2f} ms",
+             f"  compiled rules   {compiled * 1e6:8.2f} us/decision {1 / compiled:12,.0f} decisions/s",
+             f"  one-rule floor   {floor * 1e6:8.2f} us/decision",
+             f"  routine_action() {hand_written * 1e6:8.2f} us/decision (hand-written)"]
+    metrics = {'rules.us_per_decision': compiled * 1e6, 'rules.compile_ms': compile_ms}
+    if not args.rules:
+        disagreements = sum(rules.action(s) != survival.routine_action(s) for s in states)
+        lines.append(f"  disagreements with routine_action(): {disagreements}")
+        metrics['rules.disagreements'] = disagreements
+    return "\n".join(lines), metrics
+
+
+BENCHMARKS = {
+    'memory': bench_memory,
+    'rules': bench_rules,
+}
+
+
+def check_budgets(metrics, budgets):
+    """[(name, value, budget)] of every metric over its budget."""
+    return [(name, metrics[name], budgets[name]) for name in sorted(metrics)
+            if name in budgets and metrics[name] > budgets[name]]
+
+
+def parse_budget(text):
+    name, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected name=value, got '{text}'")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"budget for {name} is not a number: '{value}'") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmarks and enforce their budgets.")
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--seed', default=0, help="master seed")
+    parser.add_argument('--rules', help="rule file for the rules benchmark (default: ROUTINE)")
+    parser.add_argument('--budgets', help="JSON file of {metric: limit} overriding the defaults")
+    parser.add_argument('--budget', type=parse_budget, action='append', default=[],
+                        metavar='NAME=VALUE', help="override one budget (repeatable)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    budgets = dict(BUDGETS)
+    if args.budgets:
+        try:
+            with open(args.budgets) as f:
+                budgets.update(json.load(f))
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"error: cannot read budgets: {e}")
+    budgets.update(args.budget)
+
+    failures = []
+    for name in args.benchmarks or list(BENCHMARKS):
+        text, metrics = BENCHMARKS[name](args)
+        print(text)
+        over = check_budgets(metrics, budgets)
+        checked = sum(1 for metric in metrics if metric in budgets)
+        print(f"  budgets: {checked - len(over)}/{checked} within limits")
+        for metric, value, limit in over:
+            print(f"  OVER BUDGET {metric}: {value:,.1f} > {limit:,.1f}")
+        failures += over
+        print()
+    if failures:
+        print(f"{len(failures)} metric(s) over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Game content tables loaded from an external data file.
+
+Seasons, difficulty presets, enemies, shop prices and the roll thresholds
+used by the daytime actions live in `content.json` (or the file named by
+$SURVIVAL_CONTENT) instead of the code, so balance changes need no code edit.
+
+The file is checked against SCHEMA and compiled into a read-only Content
+object. Compiled versions are cached by the SHA-256 of the file's bytes:
+re-reading an unchanged file costs a read and a hash, never a re-parse.
+A live process picks up edits through refresh() (an mtime watch, cheap
+enough to call whenever a game starts) or reload() (the dev console's
+`reload` command). Every version loaded stays available via get(version),
+so a game in flight keeps the tables it started with.
+
+    python content.py check [path]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+DEFAULT_PATH = os.environ.get(
+    'SURVIVAL_CONTENT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content.json'))
+
+SEASON_NAMES = ('Summer', 'Fall', 'Winter', 'Spring')
+
+
+class ContentError(ValueError):
+    """The content file is missing, malformed or fails the schema."""
+
+
+# --- Schema ------------------------------------------------------------------
+# A spec is a type (int, float or str), a dict of required keys -> spec
+# (no other keys allowed), {'*': spec} for a mapping with any keys, or
+# [spec] for a non-empty list.
+SEASON = {'base_temp': int, 'hunger_mod': int, 'thirst_mod': int, 'health_mod': int,
+          'trap_chance': float, 'description': str}
+DIFFICULTY = {'start_gold': int, 'start_food': int, 'start_water': int, 'start_strength': int,
+              'bandit_multiplier': float, 'trap_success_mod': float, 'merchant_chance_mod': float,
+              'player_roll_bonus': int}
+ENEMY = {'name': str, 'health': int, 'strength': int}
+THRESHOLDS = {
+    'forage': {'success': int, 'partial': int},
+    'hunt': {'success': int, 'partial': int, 'knife_bonus': int},
+    'explore_river': {'success': int, 'partial': int, 'knife_loss_chance': float},
+    'scavenge_ruins': {'success': int, 'partial': int, 'hatchet_bonus': int, 'infection_chance': float},
+    'build_shelter': {'success': int, 'bonus': int},
+    'craft_bandage': {'success': int},
+    'make_fire': {'success': int, 'hatchet_bonus': int, 'season_mod': {s: int for s in SEASON_NAMES}},
+    'set_trap': {'success': int},
+    'eat': {'relief': int},
+    'drink': {'relief': int},
+}
+SCHEMA = {
+    'seasons': {s: SEASON for s in SEASON_NAMES},
+    'difficulties': {'*': DIFFICULTY},
+    'enemies': [ENEMY],
+    'shop': {'bandage': int, 'water': int, 'cloth': int},
+    'thresholds': THRESHOLDS,
+}
+
+
+def validate(data, spec=SCHEMA, where='content'):
+    """Raise ContentError unless `data` matches `spec`; returns a normalised copy
+    (ints accepted and converted where floats are expected)."""
+    if spec is float:
+        if isinstance(data, bool) or not isinstance(data, (int, float)):
+            raise ContentError(f"{where}: expected a number, got {data!r}")
+        return float(data)
+    if spec is int:
+        if isinstance(data, bool) or not isinstance(data, int):
+            raise ContentError(f"{where}: expected an integer, got {data!r}")
+        return data
+    if spec is str:
+        if not isinstance(data, str):
+            raise ContentError(f"{where}: expected a string, got {data!r}")
+        return data
+    if isinstance(spec, list):
+        if not isinstance(data, list) or not data:
+            raise ContentError(f"{where}: expected a non-empty list")
+        return [validate(item, spec[0], f"{where}[{i}]") for i, item in enumerate(data)]
+    if not isinstance(data, dict):
+        raise ContentError(f"{where}: expected an object")
+    if '*' in spec:
+        if not data:
+            raise ContentError(f"{where}: expected at least one entry")
+        return {key: validate(value, spec['*'], f"{where}.{key}") for key, value in data.items()}
+    missing = [key for key in spec if key not in data]
+    if missing:
+        raise ContentError(f"{where}: missing {', '.join(missing)}")
+    unknown = [key for key in data if key not in spec]
+    if unknown:
+        raise ContentError(f"{where}: unknown key(s) {', '.join(unknown)}")
+    return {key: validate(data[key], spec[key], f"{where}.{key}") for key in spec}
+
+
+def _check_values(data):
+    """Semantic checks the structural schema can't express."""
+    if 'Normal' not in data['difficulties']:
+        raise ContentError("content.difficulties: a 'Normal' preset is required")
+    for name, season in data['seasons'].items():
+        if not 0.0 <= season['trap_chance'] <= 1.0:
+            raise ContentError(f"content.seasons.{name}.trap_chance must be between 0 and 1")
+    for label, preset in data['difficulties'].items():
+        for key in ('bandit_multiplier', 'trap_success_mod', 'merchant_chance_mod'):
+            if preset[key] < 0:
+                raise ContentError(f"content.difficulties.{label}.{key} must not be negative")
+    for i, enemy in enumerate(data['enemies']):
+        if enemy['health'] <= 0:
+            raise ContentError(f"content.enemies[{i}].health must be positive")
+    for item, price in data['shop'].items():
+        if price < 0:
+            raise ContentError(f"content.shop.{item} must not be negative")
+    for action, table in data['thresholds'].items():
+        for key, value in table.items():
+            if key.endswith('_chance') and not 0.0 <= value <= 1.0:
+                raise ContentError(f"content.thresholds.{action}.{key} must be between 0 and 1")
+        if 'partial' in table and table['partial'] > table['success']:
+            raise ContentError(f"content.thresholds.{action}: partial is above success")
+
+
+# --- Compiled form -------------------------------------------------------------
+class Content:
+    """One validated, compiled version of the content file. Treat as read-only."""
+
+    def __init__(self, data, version, path):
+        self.version = version
+        self.path = path
+        self.seasons = data['seasons']
+        self.presets = data['difficulties']
+        self.enemies = tuple(data['enemies'])
+        self.shop = data['shop']
+        self.thresholds = data['thresholds']
+        # derived lookups used on hot paths
+        self.night_mods = {name: (s['hunger_mod'], s['thirst_mod'], s['health_mod'])
+                           for name, s in self.seasons.items()}
+        self.fire_season_mod = self.thresholds['make_fire']['season_mod']
+        self.shop_options = [
+            f"Buy bandage ({self.shop['bandage']} gold)",
+            f"Buy water ({self.shop['water']} gold)",
+            f"Sell cloth ({self.shop['cloth']} gold)",
+            "Leave",
+        ]
+
+    def __repr__(self):
+        return f"<Content {self.version} from {self.path}>"
+
+
+def compile_content(raw, path='<memory>'):
+    """Parse, validate and compile the bytes of a content file."""
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise ContentError(f"{path}: not valid JSON ({e})") from None
+    data = validate(data)
+    _check_values(data)
+    return Content(data, hashlib.sha256(raw).hexdigest()[:12], path)
+
+
+# --- Versions & hot reload -------------------------------------------------------
+_lock = threading.Lock()
+_versions = {}        # version -> Content (every version ever loaded in this process)
+_latest = None
+_watched = None       # (path, mtime_ns, size) of the file _latest came from
+
+
+def load(path=DEFAULT_PATH):
+    """Load a content file, reusing the compiled version if its bytes are unchanged."""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except OSError as e:
+        raise ContentError(f"cannot read content file: {e}") from None
+    version = hashlib.sha256(raw).hexdigest()[:12]
+    with _lock:
+        cached = _versions.get(version)
+    if cached is not None:
+        return cached
+    compiled = compile_content(raw, path)
+    with _lock:
+        return _versions.setdefault(version, compiled)
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def reload(path=None):
+    """Load the content file now and make it the latest version.
+
+    Raises ContentError (leaving the latest version unchanged) if it is invalid.
+    """
+    global _latest, _watched
+    path = path or (_watched[0] if _watched else DEFAULT_PATH)
+    stamp = _stat(path)
+    try:
+        compiled = load(path)
+    finally:
+        # remember what we looked at even on failure so a broken file is
+        # reported once, not on every refresh()
+        _watched = stamp
+    _latest = compiled
+    return compiled
+
+
+def refresh():
+    """mtime watch: reload if the watched file changed since it was last read.
+
+    Returns the latest Content; raises ContentError once per bad edit.
+    """
+    if _latest is None:
+        return reload()
+    if _stat(_watched[0]) != _watched:
+        reload(_watched[0])
+    return _latest
+
+
+def current():
+    """The newest successfully loaded version (loading the default file on first use)."""
+    return _latest or reload()
+
+
+def get(version):
+    """A previously loaded version, e.g. the one a paged-out game was pinned to."""
+    with _lock:
+        compiled = _versions.get(version)
+    if compiled is None:
+        raise ContentError(f"content version {version} is not loaded in this process")
+    return compiled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a game content file.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    check = sub.add_parser('check', help="validate and compile a content file")
+    check.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    try:
+        compiled = load(args.path)
+    except ContentError as e:
+        raise SystemExit(f"invalid: {e}")
+    print(f"ok: version {compiled.version}, {len(compiled.presets)} difficulties, "
+          f"{len(compiled.enemies)} enemies")
+
+
+if __name__ == "__main__":
+    main()
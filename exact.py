@@ -0,0 +1,1011 @@
+"""Outcome distributions for a fixed policy by forward propagation, not sampling.
+
+`Propagator.propagate()` carries the whole probability distribution over
+game states from one day to the next. Each step of a day (start of day, the
+two actions, the night, each of survival.NIGHT_PHASES, item discovery) is
+run through the real game functions with `survival.random` replaced by an
+enumerator that follows every outcome of every random draw and its
+probability. Identical states are merged after every step, so the cost
+grows with the number of distinct states rather than with the number of
+paths.
+
+Four things keep that affordable:
+
+* Dice are lazy. A roll_dice() total is only resolved as far as the code
+  looks at it: `roll >= 15` is one two-way branch, not twenty, and a
+  player roll against an enemy roll is a handful of branches instead of
+  400. Printing a roll does not resolve it (game output is discarded).
+* Each step's outcomes are memoised by the values of the state keys it
+  actually read, as a list of (probability, changes). A forage from 80
+  health and one from 81 health share an entry because forage never looks
+  at health.
+* Fights are solved once per round-state. A fight inside a step is only a
+  won/lost branch there; its end states come from a memoised recursion
+  over the rounds on FIGHT_KEYS alone (exact health), cut down to
+  FIGHT_ENDS health levels per outcome when they rejoin the day.
+* A Grid decides how finely states are told apart. The default spreads
+  health, hunger and thirst over coarser levels (keeping their expected
+  values) and caps counters such as food. On top of that, coarsen() keeps
+  at most `budget` states after each step by moving the least likely ones
+  onto their nearest kept neighbour. Grid({}, {}) with budget=None keeps
+  every state distinct and is exact, but much slower.
+
+Probability lost to pruning (states below `prune`) is reported, and
+`python exact.py check` compares the curves with simulated games.
+
+    python exact.py curve --difficulty Hard
+    python exact.py check --difficulty Normal --games 20000
+"""
+import argparse
+import contextlib
+import math
+import operator
+import time
+
+import numpy
+
+import content
+import simulation
+import stats
+import survival
+
+MISSING = '<missing>'     # value of a key a step removed
+EFFECTS = 'status_effects'
+# keys that are not part of a state's identity: the same for every state on
+# a given day, or recomputed before anything reads them
+UNTRACKED = ('day', 'season', 'temperature')
+TRACKED_EFFECTS = ('poison', 'bleeding', 'fever', 'infection')
+# everything survival.combat_round() reads or changes of the player (with the
+# built-in policies); a fight is solved over these alone
+FIGHT_KEYS = ('agility', 'health', 'status_effects', 'strength')
+# ... and of the enemy (not, e.g., the 'bleeding' mark a critical hit leaves)
+ENEMY_KEYS = ('health', 'name', 'strength')
+# flags carried through a day: (the day's actions went well, what took health to 0)
+FRESH = (True, None)
+FIGHT = '<fight>'         # a step outcome's deferred fight
+FIGHT_ENDS = 50            # health levels a deferred fight's end states are cut down to
+BUDGET = 500             # states carried between steps (None: no limit)
+
+
+# --- Enumerating random source -------------------------------------------------
+class _Enumerator:
+    """Stands in for the `random` module while one step is replayed.
+
+    A replay follows a script of branch indices. Draws beyond the script take
+    branch 0 and remember how many alternatives they skipped, so the caller
+    can replay each of those in turn (depth-first over all outcomes).
+    """
+
+    def __init__(self, script=()):
+        self.script = script
+        self.taken = []
+        self.widths = []
+        self.prob = 1.0
+
+    def branch(self, weights):
+        """Pick one of two or more (positive, summing to 1) `weights`."""
+        depth = len(self.taken)
+        pick = self.script[depth] if depth < len(self.script) else 0
+        self.taken.append(pick)
+        self.widths.append(len(weights))
+        self.prob *= weights[pick]
+        return pick
+
+    def randint(self, a, b):
+        if a == b:
+            return a
+        return a + self.branch([1.0 / (b - a + 1)] * (b - a + 1))
+
+    def choice(self, seq):
+        if len(seq) == 1:
+            return seq[0]
+        return seq[self.branch([1.0 / len(seq)] * len(seq))]
+
+    def random(self):
+        return _Uniform(self)
+
+    def next_scripts(self):
+        """Scripts for the branches this replay skipped."""
+        for depth in range(len(self.script), len(self.taken)):
+            prefix = tuple(self.taken[:depth])
+            for pick in range(1, self.widths[depth]):
+                yield prefix + (pick,)
+
+
+class _Uniform:
+    """A random.random() draw, resolved only by comparing it.
+
+    Each comparison narrows the draw's interval, so `r < 0.10 ... elif
+    r < 0.18` chains get the right conditional probabilities.
+    """
+
+    def __init__(self, source):
+        self._source = source
+        self._lo = 0.0
+        self._hi = 1.0
+
+    def __lt__(self, x):
+        x = min(max(float(x), self._lo), self._hi)
+        below = (x - self._lo) / (self._hi - self._lo)
+        if below >= 1.0 or (below > 0.0 and self._source.branch((below, 1.0 - below)) == 0):
+            self._hi = x
+            return True
+        self._lo = x
+        return False
+
+    def __ge__(self, x):
+        return not self < x
+
+
+_SUMS = {}
+
+
+def dice_distribution(num_dice, sides):
+    """[(total, probability)] for rolling `num_dice` d`sides`."""
+    key = (num_dice, sides)
+    if key not in _SUMS:
+        dist = {0: 1.0}
+        for _ in range(num_dice):
+            step = {}
+            for total, p in dist.items():
+                for face in range(1, sides + 1):
+                    step[total + face] = step.get(total + face, 0.0) + p / sides
+            dist = step
+        _SUMS[key] = sorted(dist.items())
+    return _SUMS[key]
+
+
+_TABLES = {}
+
+
+def _table(key, compute):
+    """Dice tables depend only on what was rolled and compared, which every
+    replay repeats: each is worked out once per `key`."""
+    entry = _TABLES.get(key)
+    if entry is None:
+        entry = _TABLES[key] = compute()
+    return entry
+
+
+class _Dice:
+    """Joint distribution of the lazy rolls that have been compared with each other.
+
+    `values` holds one row per combination still possible (a column per
+    roll) and `probs` its probability; `history` is how the table came about.
+    """
+
+    def __init__(self, die, num_dice, sides):
+        self.dice = [die]
+        self.history = ('roll', num_dice, sides)
+        self.values, self.probs = _table(self.history, lambda: (
+            numpy.array([[total] for total, _ in dice_distribution(num_dice, sides)]),
+            numpy.array([p for _, p in dice_distribution(num_dice, sides)])))
+
+    def join(self, other):
+        if other is self:
+            return
+        self.history = ('join', self.history, other.history)
+        n, m = len(self.probs), len(other.probs)
+        self.values, self.probs = _table(self.history, lambda: (
+            numpy.hstack([numpy.repeat(self.values, m, axis=0), numpy.tile(other.values, (n, 1))]),
+            numpy.repeat(self.probs, m) * numpy.tile(other.probs, n)))
+        shift = len(self.dice)
+        for die in other.dice:
+            die.group = self
+            die.slot += shift
+        self.dice.extend(other.dice)
+
+    def split(self, test, mask):
+        """Branch on the rows where `mask()` holds (`test` names it) and keep
+        only the rows on the branch taken."""
+        def compute():
+            yes = mask()
+            p_yes = self.probs[yes].sum()
+            p_no = self.probs.sum() - p_yes
+            return (p_yes, p_no, (self.values[yes], self.probs[yes]),
+                    (self.values[~yes], self.probs[~yes]))
+        p_yes, p_no, kept, dropped = _table((self.history, test), compute)
+        if p_yes <= 0.0:
+            return False
+        if p_no <= 1e-15:
+            return True
+        total = p_yes + p_no
+        taken = survival.random.branch((p_yes / total, p_no / total)) == 0
+        self.history = (self.history, test, taken)
+        self.values, self.probs = kept if taken else dropped
+        return taken
+
+    def resolve(self, slot):
+        """Branch over the values one roll can still take; returns the one taken."""
+        def compute():
+            column = self.values[:, slot]
+            totals, index = numpy.unique(column, return_inverse=True)
+            weights = numpy.bincount(index, weights=self.probs)
+            return ([int(t) for t in totals], (weights / weights.sum()).tolist(),
+                    [(self.values[column == t], self.probs[column == t]) for t in totals])
+        totals, weights, tables = _table((self.history, 'resolve', slot), compute)
+        if len(totals) == 1:
+            return totals[0]
+        pick = survival.random.branch(weights)
+        self.history = (self.history, 'resolve', slot, pick)
+        self.values, self.probs = tables[pick]
+        return totals[pick]
+
+
+class _Die:
+    __slots__ = ('group', 'slot')
+
+    def __init__(self, num_dice, sides):
+        self.group = _Dice(self, num_dice, sides)
+        self.slot = 0
+
+
+class _Roll:
+    """A roll_dice() total plus a constant, resolved only as far as it is looked at.
+
+    Comparisons branch; anything else (arithmetic with other values, storing
+    it in the state) resolves it to a plain int first.
+    """
+    __slots__ = ('die', 'offset')
+
+    def __init__(self, die, offset=0):
+        self.die = die
+        self.offset = offset
+
+    def resolve(self):
+        return self.die.group.resolve(self.die.slot) + self.offset
+
+    def _compare(self, other, op):
+        group = self.die.group
+        if isinstance(other, _Roll):
+            group.join(other.die.group)
+            mine, theirs = self, other
+            return group.split((op, self.die.slot, self.offset, 'roll', other.die.slot, other.offset),
+                               lambda: op(group.values[:, mine.die.slot] + mine.offset,
+                                          group.values[:, theirs.die.slot] + theirs.offset))
+        other = _resolved(other)
+        return group.split((op, self.die.slot, self.offset, other),
+                           lambda: op(group.values[:, self.die.slot] + self.offset, other))
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other):
+        return self._compare(other, operator.ne)
+
+    __hash__ = None
+
+    def __add__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return _Roll(self.die, self.offset + other)
+        return self.resolve() + _resolved(other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return _Roll(self.die, self.offset - other)
+        return self.resolve() - _resolved(other)
+
+    def __rsub__(self, other):
+        return other - self.resolve()
+
+    def __mul__(self, other):
+        return self.resolve() * _resolved(other)
+
+    __rmul__ = __mul__
+
+    def __floordiv__(self, other):
+        return self.resolve() // _resolved(other)
+
+    def __neg__(self):
+        return -self.resolve()
+
+    def __int__(self):
+        return self.resolve()
+
+    __index__ = __int__
+
+    def __bool__(self):
+        return self != 0
+
+    def __format__(self, spec):
+        return '?'
+
+    def __repr__(self):
+        return '?'
+
+
+def _resolved(value):
+    return value.resolve() if isinstance(value, _Roll) else value
+
+
+def _roll_dice(num_dice, sides):
+    """survival.roll_dice() while enumerating: a lazy total."""
+    return _Roll(_Die(num_dice, sides))
+
+
+# --- Read tracking and memoised steps ---------------------------------------------
+class _Deferred(BaseException):
+    """A step looked at what a deferred fight changes: replay it fight by fight.
+    (Not an Exception, so the game's own error handling lets it through.)"""
+
+
+class _Tracked(dict):
+    """A copy of a game state that records which keys are read or written.
+
+    While a fight is deferred (see Propagator._fight) the keys it changes
+    are `held`: touching them raises _Deferred.
+    """
+
+    def __init__(self, state, defer=False):
+        super().__init__(state)
+        effects = state.get(EFFECTS)
+        if isinstance(effects, (dict, tuple)):
+            dict.__setitem__(self, EFFECTS, dict(effects))
+        self.reads = set()
+        self.writes = set()
+        self.defer = defer
+        self.fight = None
+        self.held = ()
+
+    def _touch(self, key, written=False):
+        if key in self.held:
+            raise _Deferred(key)
+        self.reads.add(key)
+        if written:
+            self.writes.add(key)
+
+    def __getitem__(self, key):
+        self._touch(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        self._touch(key)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        self._touch(key)
+        return dict.__contains__(self, key)
+
+    def setdefault(self, key, default=None):
+        self._touch(key, True)
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *default):
+        self._touch(key, True)
+        return dict.pop(self, key, *default)
+
+    def __setitem__(self, key, value):
+        if key in self.held:
+            raise _Deferred(key)
+        self.writes.add(key)
+        dict.__setitem__(self, key, _resolved(value))
+
+    def __delitem__(self, key):
+        if key in self.held:
+            raise _Deferred(key)
+        self.writes.add(key)
+        dict.__delitem__(self, key)
+
+
+def _freeze(value):
+    return tuple(sorted(value.items())) if isinstance(value, dict) else value
+
+
+def _value(state, key):
+    return _freeze(state[key]) if key in state else MISSING
+
+
+def state_key(state):
+    """Hashable identity of a state (everything but the UNTRACKED keys).
+
+    States in a distribution keep their status effects frozen (see _freeze);
+    a replay gets them back as a dict.
+    """
+    return tuple([item for item in sorted(state.items()) if item[0] not in UNTRACKED])
+
+
+def _project(state):
+    """The FIGHT_KEYS values of `state`: all a fight reads or changes."""
+    return tuple(_value(state, k) for k in FIGHT_KEYS)
+
+
+def _enemy(enemy):
+    """Hashable identity of an enemy in a fight."""
+    return tuple((k, enemy[k]) for k in ENEMY_KEYS if k in enemy)
+
+
+def _restore(state, values, start=None):
+    """Set `state`'s FIGHT_KEYS to `values` (from _project); with `start`,
+    only those that differ from it."""
+    for i, (key, value) in enumerate(zip(FIGHT_KEYS, values)):
+        if start is not None and start[i] == value:
+            continue
+        if value is MISSING:
+            state.pop(key, None)
+        elif key == EFFECTS:
+            state[key] = dict(value) if isinstance(state, _Tracked) else value
+        elif dict.get(state, key, MISSING) != value:
+            state[key] = value
+
+
+def apply_changes(state, changes):
+    """A copy of `state` with a step's changes applied."""
+    new = dict(state)
+    for key, value in changes:
+        if value is MISSING:
+            new.pop(key, None)
+        else:
+            new[key] = value
+    return new
+
+
+class StepCache:
+    """Outcomes of one kind of step, memoised by the values of the keys it reads.
+
+    An entry made from state S is valid for any state that agrees with S on
+    every key S's replays read: those replays would take the same branches.
+    """
+
+    def __init__(self, run):
+        self.run = run
+        self.read_sets = []
+        self.table = {}
+        self.replays = 0
+        self.defer = True          # until a replay needs a fight's outcome
+
+    def outcomes(self, state, reads=None):
+        """[(probability, changes, result)] for running the step from `state`.
+
+        The keys the answer depends on are added to `reads`, if given.
+        """
+        for keys in self.read_sets:
+            hit = self.table.get((keys, tuple(_value(state, k) for k in keys)))
+            if hit is not None:
+                break
+        else:
+            keys, hit = self._enumerate(state)
+        if reads is not None:
+            reads.update(keys)
+        return hit
+
+    def _enumerate(self, state):
+        while True:
+            try:
+                leaves, reads, touched = self._replay_all(state)
+                break
+            except _Deferred:
+                self.defer = False
+        touched = sorted(touched | reads)
+        merged = {}
+        for p, tracked, result in leaves:
+            changes = tuple((k, _value(tracked, k)) for k in touched)
+            if tracked.fight is not None:
+                changes += ((FIGHT, tracked.fight),)
+            merged[(changes, result)] = merged.get((changes, result), 0.0) + p
+        outcomes = [(p, changes, result) for (changes, result), p in merged.items()]
+        keys = tuple(sorted(reads))
+        if keys not in self.read_sets:
+            self.read_sets.append(keys)
+        self.table[(keys, tuple(_value(state, k) for k in keys))] = outcomes
+        return keys, outcomes
+
+    def _replay_all(self, state):
+        leaves = []
+        reads = set()
+        touched = set()
+        scripts = [()]
+        saved = survival.random
+        try:
+            while scripts:
+                source = survival.random = _Enumerator(scripts.pop())
+                tracked = _Tracked(state, self.defer)
+                result = self.run(tracked)
+                tracked.held = ()
+                self.replays += 1
+                scripts.extend(source.next_scripts())
+                reads |= tracked.reads
+                touched |= tracked.writes
+                leaves.append((source.prob, tracked, result))
+        finally:
+            survival.random = saved
+        return leaves, reads, touched
+
+
+# --- Merging -------------------------------------------------------------------
+class Grid:
+    """How finely states are told apart when they are merged.
+
+    `steps` puts gauges on a grid: a state's probability is shared between
+    the two nearest multiples of the step, in the proportions that keep the
+    gauge's expected value (health never goes below 1, so no living state is
+    moved onto 0). `caps` limits counters: food beyond its cap counts as the
+    cap. Grid({}, {}) merges only identical states.
+    """
+
+    def __init__(self, steps=None, caps=None):
+        self.steps = {'health': 5, 'hunger': 10, 'thirst': 10} if steps is None else steps
+        self.caps = {'food': 8, 'water': 8, 'gold': 20, 'bandages': 3, 'cloth': 3} if caps is None else caps
+
+    def place(self, state):
+        """[(weight, state)] on the grid for a living `state` (changed in place)."""
+        for key, cap in self.caps.items():
+            if state.get(key, 0) > cap:
+                state[key] = cap
+        placed = [(1.0, state)]
+        for key, step in self.steps.items():
+            value = state.get(key)
+            if value is None or step <= 1 or value % step == 0:
+                continue
+            lo = value - value % step
+            hi = min(100, lo + step)
+            if key == 'health':
+                lo = max(1, lo)
+            if lo == value:
+                continue
+            w = (value - lo) / (hi - lo)
+            placed = ([(p * (1.0 - w), dict(s, **{key: lo})) for p, s in placed]
+                      + [(p * w, dict(s, **{key: hi})) for p, s in placed])
+        return placed
+
+
+# how far apart a step of each gauge puts two states when merging (1 if not listed):
+# mass should move between amounts of gold or cloth, not between degrees of thirst
+GAUGE_WEIGHTS = {'health': 10.0, 'hunger': 10.0, 'thirst': 10.0, 'food': 5.0, 'water': 5.0}
+_CHUNK = 64
+
+
+def coarsen(dist, budget, grid):
+    """Keep about `budget` entries of `dist`; every other entry's probability
+    moves to the nearest entry kept of the same kind.
+
+    Entries are of the same kind when they agree on everything but the
+    numeric gauges (health, hunger, food, ...): flags, items, status
+    effects, dead or alive. Each kind keeps its likeliest entry, the rest of
+    the budget goes to the likeliest entries overall, and distance is
+    measured in grid steps, so rare conditions keep their probability.
+    """
+    if budget is None or len(dist) <= budget:
+        return dist
+    items = sorted(dist.items(), key=lambda item: -item[1][0])
+    states = [s for _, (_, s, _) in items]
+    numeric = sorted({k for s in states for k, v in s.items() if type(v) is int} - set(UNTRACKED))
+    numeric = [k for k in numeric if all(type(s.get(k, 0)) is int for s in states)]
+    kinds = {}
+    for i, (s, (_, (_, _, flags))) in enumerate(zip(states, items)):
+        kind = (s['health'] > 0, flags, tuple((k, _freeze(v)) for k, v in sorted(s.items())
+                                               if k not in numeric and k not in UNTRACKED))
+        kinds.setdefault(kind, []).append(i)
+    kept = {members[0] for members in kinds.values()}
+    for i in range(len(items)):
+        if len(kept) >= budget:
+            break
+        kept.add(i)
+    weights = [GAUGE_WEIGHTS.get(k, 1.0) / grid.steps.get(k, 1) for k in numeric]
+    gauges = numpy.array([[s.get(k, 0) * w for k, w in zip(numeric, weights)] for s in states])
+    mass = {i: items[i][1][0] for i in kept}
+    for members in kinds.values():
+        targets = [i for i in members if i in kept]
+        rest = [i for i in members if i not in kept]
+        if not rest:
+            continue
+        if len(targets) == 1:
+            mass[targets[0]] += math.fsum(items[i][1][0] for i in rest)
+            continue
+        ends = gauges[targets]
+        for lo in range(0, len(rest), _CHUNK):
+            chunk = rest[lo:lo + _CHUNK]
+            distance = numpy.abs(gauges[chunk][:, None, :] - ends[None, :, :]).sum(axis=2)
+            for i, nearest in zip(chunk, distance.argmin(axis=1).tolist()):
+                mass[targets[nearest]] += items[i][1][0]
+    return {items[i][0]: (mass[i],) + items[i][1][1:] for i in sorted(kept)}
+
+
+# --- Propagation ---------------------------------------------------------------
+class DayStats:
+    """The distribution at the end of one day (after the night's events)."""
+
+    def __init__(self, day, alive, health, effects, deaths, states):
+        self.day = day
+        self.alive = alive            # P(still alive)
+        self.health = health          # E[health | alive]
+        self.effects = effects        # {effect: P(effect | alive)}
+        self.deaths = deaths          # {cause: P(died of it so far)}
+        self.states = states          # distinct living states carried forward
+
+
+def _merge(dist, key, p, state, tag):
+    entry = dist.get(key)
+    dist[key] = (p + entry[0] if entry else p, state, tag)
+
+
+class Propagator:
+    """Day-by-day outcome distribution of one difficulty under a fixed policy."""
+
+    def __init__(self, difficulty='Normal', policy=None, grid=None, budget=BUDGET, prune=1e-9,
+                 pinned=None):
+        self.difficulty = difficulty
+        self.policy = policy or simulation.HeuristicPolicy()
+        self.grid = grid or Grid()
+        self.budget = budget
+        self.prune = prune
+        self.content = pinned or content.current()
+        self.preset = self.content.presets[difficulty]
+        self.pruned = 0.0
+        self._asking = None        # state the policy is answering a prompt for
+        self._begin = StepCache(self._run_begin)
+        self._act = StepCache(self._run_act)
+        self._night = {ok: StepCache(lambda s, ok=ok: survival.apply_night_effects(s, ok))
+                       for ok in (True, False)}
+        self._check = StepCache(survival.validate_state)
+        self._phases = [StepCache(lambda s, phase=phase: self._asks(s, phase))
+                        for phase in survival.NIGHT_PHASES]
+        self._discover = StepCache(survival.roll_item_discovery)
+        self._fights = {}          # (round-state, enemy) -> final outcomes
+        self._rounds = {}          # enemy -> StepCache of one combat_round()
+        self._ends = {}            # deferred fight -> its compacted end states
+
+    @property
+    def caches(self):
+        return [self._begin, self._act, *self._night.values(), self._check, *self._phases,
+                self._discover, *self._rounds.values()]
+
+    # -- step bodies, run on a _Tracked copy under the enumerator ----------------------
+    def _asks(self, state, body):
+        saved, self._asking = self._asking, state
+        try:
+            return body(state)
+        finally:
+            self._asking = saved
+
+    def _answer(self, options):
+        return self.policy.choose_option(self._asking, simulation.prompt_kind(options), options)
+
+    def _run_begin(self, state):
+        survival.validate_state(state)
+        survival.update_season(state)
+
+    def _run_act(self, state):
+        choice = self.policy.choose_action(state)
+        return choice, self._asks(state, lambda s: survival.perform_action(s, choice))
+
+    def _fight(self, state, enemy):
+        """Stands in for survival.handle_combat() inside a night phase.
+
+        Normally the fight is deferred: the replay branches only on winning
+        or not, and the step's outcome carries (start, enemy, won) under
+        FIGHT for _advance() to expand into the fight's final states, so
+        a step is not replayed once per way a fight can end. A step that
+        then touches what the fight changes is replayed with each final
+        state branched on here instead.
+        """
+        for key, default in (('name', 'Unknown'), ('health', 10), ('strength', 1)):
+            enemy[key] = enemy.get(key, default)
+        if not (enemy['health'] > 0 and state['health'] > 0):
+            return enemy['health'] <= 0
+        here, enemy = _project(state), _enemy(enemy)
+        table = self._fight_from(here, enemy)
+        if state.defer and state.fight is None:
+            won = math.fsum(p for (_, result), p in table.items() if result)
+            lost = math.fsum(table.values()) - won
+            result = won > 0 if min(won, lost) <= 0 else survival.random.branch((won, lost)) == 0
+            state.fight = (here, enemy, result)
+            state.held = {k for end, _ in table for k, a, b in zip(FIGHT_KEYS, here, end) if a != b}
+            return result
+        outcomes = list(table.items())
+        pick = 0 if len(outcomes) == 1 else survival.random.branch([p for _, p in outcomes])
+        (end, result), _ = outcomes[pick]
+        _restore(state, end)
+        return result
+
+    def _fight_ends(self, state, fight):
+        """[(p, state)]: `state` after each way the deferred `fight` can end
+        (the rest of its step has changed none of what the fight changes)."""
+        here = fight[0]
+        ends = self._ends.get(fight)
+        if ends is None:
+            ends = self._ends[fight] = self._compact(fight)
+        placed = []
+        for p, end in ends:
+            after = dict(state)
+            _restore(after, end, here)
+            placed.append((p, after))
+        return placed
+
+    def _compact(self, fight):
+        """The end states of a deferred fight, normalised, with each group that
+        differs only in health cut down to FIGHT_ENDS levels of equal mass,
+        each at its level's expected health (then placed on the grid)."""
+        here, enemy, won = fight
+        at = FIGHT_KEYS.index('health')
+        step = self.grid.steps.get('health', 1)
+        groups = {}
+        for (end, result), p in self._fight_from(here, enemy).items():
+            if result == won:
+                groups.setdefault((end[:at], end[at] > 0, end[at + 1:]), []).append((end[at], p))
+        total = math.fsum(p for members in groups.values() for _, p in members)
+        ends = {}
+        for (before, alive, after), members in groups.items():
+            members.sort()
+            share = math.fsum(p for _, p in members) / FIGHT_ENDS
+            level = []
+            for i, (health, p) in enumerate(members):
+                level.append((health, p))
+                if alive and i + 1 < len(members) and math.fsum(q for _, q in level) < share:
+                    continue
+                mass = math.fsum(q for _, q in level)
+                mean = math.fsum(h * q for h, q in level) / mass
+                lo = max(1, int(mean // step * step)) if alive else int(mean)
+                hi = lo + step if alive else lo
+                w = (mean - lo) / (hi - lo) if hi > lo and mean > lo else 0.0
+                for h, m in ((lo, mass * (1.0 - w)), (min(hi, 100), mass * w)):
+                    if m > 0:
+                        end = before + (h,) + after
+                        ends[end] = ends.get(end, 0.0) + m / total
+                level = []
+        return [(p, end) for end, p in ends.items()]
+
+    def _fight_from(self, here, enemy):
+        """{(FIGHT_KEYS values at the end, handle_combat() result): p} for a
+        fight from the round-state (`here`, `enemy`), memoised.
+
+        Rounds are solved on exact health (the grid's levels would move the
+        player across the policy's flee threshold); every round ends the
+        fight or costs someone health, so the recursion always terminates.
+        """
+        key = (here, enemy)
+        table = self._fights.get(key)
+        if table is not None:
+            return table
+        self._fights[key] = None          # a round-state reached again while being solved is a bug
+        cache = self._rounds.get(enemy)
+        if cache is None:
+            cache = self._rounds[enemy] = StepCache(lambda t: self._run_round(t, enemy))
+        start = {k: v for k, v in zip(FIGHT_KEYS, here) if v is not MISSING}
+        reads = set()
+        table = {}
+        outcomes = cache.outcomes(start, reads)
+        unknown = (reads | {k for _, changes, _ in outcomes for k, _ in changes}) - set(FIGHT_KEYS)
+        if unknown:
+            raise ValueError(f"combat depends on {', '.join(sorted(unknown))}: add to exact.FIGHT_KEYS")
+        for q, changes, (result, after_enemy) in outcomes:
+            after = _project(apply_changes(start, changes))
+            if result is not None:
+                table[after, result] = table.get((after, result), 0.0) + q
+                continue
+            sub = self._fight_from(after, after_enemy)
+            if sub is None:
+                raise RuntimeError(f"combat round-states loop through {after, after_enemy}")
+            for end, r in sub.items():
+                table[end] = table.get(end, 0.0) + q * r
+        table = {end: p for end, p in table.items() if p >= self.prune}
+        self._fights[key] = table
+        return table
+
+    def _run_round(self, state, enemy):
+        enemy = _Tracked(dict(enemy))
+        result = self._asks(state, lambda s: survival.combat_round(s, enemy))
+        if enemy.reads - set(ENEMY_KEYS):
+            raise ValueError(f"combat reads the enemy's {', '.join(sorted(enemy.reads - set(ENEMY_KEYS)))}: "
+                             f"add to exact.ENEMY_KEYS")
+        if result is None and (enemy['health'] <= 0 or state['health'] <= 0):
+            result = enemy['health'] <= 0
+        return result, _enemy(enemy)
+
+    # -- driving ------------------------------------------------------------------
+    def _advance(self, dist, cache_for, settle):
+        """Run one step over the whole distribution and merge the results.
+
+        `dist` maps (state key, flags) -> (p, state, flags); `cache_for(state,
+        flags)` picks the step (None leaves the state alone) and
+        `settle(before, after, flags, result)` returns the new flags.
+        """
+        following = {}
+        for p, state, flags in dist.values():
+            cache = cache_for(state, flags)
+            outcomes = [(1.0, (), None)] if cache is None else cache.outcomes(state)
+            # outcomes of a fight may not add up to 1: rounds below `prune` are dropped
+            self.pruned += p * (1.0 - math.fsum(q for q, _, _ in outcomes))
+            for q, changes, result in outcomes:
+                mass = p * q
+                if mass < self.prune:
+                    self.pruned += mass
+                    continue
+                after = apply_changes(state, changes)
+                fight = after.pop(FIGHT, None)
+                for v, end in [(1.0, after)] if fight is None else self._fight_ends(after, fight):
+                    new_flags = settle(state, end, flags, result)
+                    placed = self.grid.place(end) if end['health'] > 0 else [(1.0, end)]
+                    for w, s in placed:
+                        _merge(following, (state_key(s), new_flags), mass * v * w, s, new_flags)
+        return coarsen(following, self.budget, self.grid)
+
+    def propagate(self, max_days=None):
+        """Yield a DayStats for every day up to `max_days` (default survival.MAX_DAYS)."""
+        max_days = max_days or survival.MAX_DAYS
+        start = survival.new_game_state(self.preset)
+        start[EFFECTS] = _freeze(start[EFFECTS])
+        dist = {None: (1.0, start, FRESH)}
+        deaths = {}
+        for day in range(1, max_days + 1):
+            with self._installed():
+                alive = self._day(dist, day, deaths)
+            yield self._stats(day, alive.values(), deaths)
+            with self._installed():
+                dist = self._advance(alive, lambda s, f: self._discover, lambda b, a, f, r: f)
+
+    @contextlib.contextmanager
+    def _installed(self):
+        # survival's globals are only swapped while a step runs, never across a yield
+        saved = (survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT,
+                 survival.roll_dice, survival.handle_combat)
+        survival.CURRENT_DIFFICULTY, survival.CONTENT = self.preset, self.content
+        survival.CHOICE_HOOK = self._answer
+        survival.roll_dice, survival.handle_combat = _roll_dice, self._fight
+        try:
+            with contextlib.redirect_stdout(simulation.NULL_OUTPUT):
+                yield
+        finally:
+            (survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT,
+             survival.roll_dice, survival.handle_combat) = saved
+
+    def _day(self, dist, day, deaths):
+        """The steps of simulation.play_day() over the whole distribution; adds
+        the day's deaths to `deaths` by cause and returns the living states."""
+        def cause_of(name):
+            def settle(before, after, flags, result):
+                if before['health'] > 0 and after['health'] <= 0:
+                    return flags[0], name(after, result)
+                return flags
+            return settle
+
+        def acted(before, after, flags, result):
+            if result is None:        # no second action after dying of the first
+                return flags
+            choice, ok = result
+            cause = flags[1]
+            if before['health'] > 0 and after['health'] <= 0:
+                cause = survival.ACTION_NAMES[choice]
+            return flags[0] and ok, cause
+
+        night_event = cause_of(lambda s, r: 'night event')
+        for _, s, _ in dist.values():
+            s['day'] = day
+        dist = self._advance(dist, lambda s, f: self._begin, cause_of(lambda s, r: 'bleeding'))
+        dist = self._advance(dist, lambda s, f: self._act, acted)
+        dist = self._advance(dist, lambda s, f: self._act if s['health'] > 0 else None, acted)
+        dist = self._advance(dist, lambda s, f: self._night[f[0]],
+                             cause_of(lambda s, r: survival.night_death_cause(s)))
+        # danger_event(): validate, then each phase in turn
+        dist = self._advance(dist, lambda s, f: self._check, night_event)
+        for phase in self._phases:
+            dist = self._advance(dist, lambda s, f, phase=phase: phase, night_event)
+
+        alive = {}
+        for p, s, (_, cause) in dist.values():
+            if s['health'] <= 0:
+                deaths[cause] = deaths.get(cause, 0.0) + p
+            else:
+                _merge(alive, (state_key(s), FRESH), p, s, FRESH)
+        return alive
+
+    def _stats(self, day, alive, deaths):
+        total = health = 0.0
+        effects = dict.fromkeys(TRACKED_EFFECTS, 0.0)
+        count = 0
+        for p, s, _ in alive:
+            count += 1
+            total += p
+            health += p * s['health']
+            for effect, _ in s.get(EFFECTS) or ():
+                effects[effect] = effects.get(effect, 0.0) + p
+            if s.get('infection'):
+                effects['infection'] += p
+        if total > 0:
+            health /= total
+            effects = {k: v / total for k, v in effects.items()}
+        return DayStats(day, total, health, effects, dict(deaths), count)
+
+
+# --- Checking against simulation ------------------------------------------------------
+def simulate(difficulty='Normal', games=20000, max_days=None, master_seed='exact'):
+    """The same per-day figures from simulated games: [(alive, health, {effect: rate})]
+    per day as stats.RunningProportion / RunningStat accumulators."""
+    max_days = max_days or survival.MAX_DAYS
+    days = [(stats.RunningProportion(), stats.RunningStat(),
+             {e: stats.RunningProportion() for e in TRACKED_EFFECTS}) for _ in range(max_days)]
+    for index in range(games):
+        seen = []
+
+        def on_day(state, actions, event):
+            alive, health, effects = days[state['day'] - 1]
+            seen.append(state['day'])
+            alive.add(state['health'] > 0)
+            if state['health'] > 0:
+                health.add(state['health'])
+                present = set(state.get(EFFECTS) or ())
+                if state.get('infection'):
+                    present.add('infection')
+                for effect, rate in effects.items():
+                    rate.add(effect in present)
+
+        simulation.play_game(difficulty, simulation.HeuristicPolicy(),
+                             simulation.game_seed(master_seed, difficulty, index), max_days, on_day)
+        for day in range(len(seen), max_days):      # the days after dying
+            days[day][0].add(False)
+    return days
+
+
+def check(difficulty='Normal', games=20000, max_days=None, **options):
+    """Propagate and simulate side by side: [(DayStats, simulated day)]."""
+    curve = list(Propagator(difficulty, **options).propagate(max_days))
+    return list(zip(curve, simulate(difficulty, games, len(curve))))
+
+
+def _outside(value, simulated):
+    low, high = simulated.interval()
+    return ' ' if low - 1e-9 <= value <= high + 1e-9 else '*'
+
+
+def _curve(difficulty, max_days, options):
+    propagator = Propagator(difficulty, **options)
+    start = time.perf_counter()
+    print(f"{difficulty}: day  alive  health  " + "  ".join(f"{e:>9}" for e in TRACKED_EFFECTS)
+          + "  states  seconds")
+    for day in propagator.propagate(max_days):
+        print(f"{'':>{len(difficulty) + 1}} {day.day:>4} {day.alive:>6.1%} {day.health:>7.1f}  "
+              + "  ".join(f"{day.effects[e]:>9.2%}" for e in TRACKED_EFFECTS)
+              + f"  {day.states:>6} {time.perf_counter() - start:>8.1f}")
+    causes = ", ".join(f"{cause} {p:.1%}" for cause, p in sorted(day.deaths.items(), key=lambda c: -c[1]))
+    print(f"  deaths: {causes or 'none'}; pruned {propagator.pruned:.1e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exact outcome distributions by forward propagation.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    c = sub.add_parser('curve', help="survival curve and effect rates by day")
+    c.add_argument('--difficulty', nargs='+', choices=list(survival.DIFFICULTY_PRESETS),
+                   help="difficulties to propagate (default: Easy, Normal, Hard)")
+    k = sub.add_parser('check', help="compare the propagated curve with simulated games")
+    k.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    k.add_argument('--games', type=int, default=20000)
+    for p in (c, k):
+        p.add_argument('--days', type=int, help=f"days to propagate (default {survival.MAX_DAYS})")
+        p.add_argument('--budget', type=int, default=BUDGET, help="states kept between steps (0: no limit)")
+        p.add_argument('--health-step', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    grid = Grid(dict(Grid().steps, health=args.health_step))
+    options = {'grid': grid, 'budget': args.budget or None}
+    if args.cmd == 'curve':
+        for difficulty in args.difficulty or ('Easy', 'Normal', 'Hard'):
+            _curve(difficulty, args.days, options)
+        return
+
+    start = time.perf_counter()
+    rows = check(args.difficulty, args.games, args.days, **options)
+    print(f"{args.difficulty}, {args.games} simulated games ({time.perf_counter() - start:.0f}s); "
+          f"* = outside the simulation's 95% interval")
+    print(f"{'day':>4} {'alive':>7} {'simulated':>9} {'health':>7} {'simulated':>9}  effects (exact/simulated)")
+    for day, (alive, health, effects) in rows:
+        print(f"{day.day:>4} {day.alive:>6.1%}{_outside(day.alive, alive)} {alive.value:>9.1%} "
+              f"{day.health:>6.1f}{_outside(day.health, health)} {health.mean:>9.1f}  "
+              + "  ".join(f"{e} {day.effects[e]:.1%}/{effects[e].value:.1%}"
+                          for e in TRACKED_EFFECTS if day.effects[e] or effects[e].hits))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""SQLite-backed leaderboard and run history.
+
+Finished runs are queued by the game thread and written by a background
+thread in batches (one transaction per batch), so a slow disk never stalls a
+prompt. The database runs in WAL mode so readers (leaderboard queries) don't
+block the writer, and the indexes below keep top-N per difficulty, a
+player's best runs and recent-run queries fast at millions of rows.
+
+    python leaderboard.py play --player alice --db runs.db
+    python leaderboard.py top --difficulty Hard
+    python leaderboard.py best alice
+    python leaderboard.py recent
+"""
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+
+import survival
+
+DEFAULT_DB = 'runs.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY,
+    player        TEXT    NOT NULL,
+    difficulty    TEXT    NOT NULL,
+    outcome       TEXT    NOT NULL,
+    days_survived INTEGER NOT NULL,
+    cause         TEXT,
+    health        INTEGER,
+    hunger        INTEGER,
+    thirst        INTEGER,
+    food          INTEGER,
+    water         INTEGER,
+    gold          INTEGER,
+    season        TEXT,
+    seed          TEXT,
+    finished_at   REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_difficulty
+    ON runs (difficulty, days_survived DESC, health DESC, finished_at);
+CREATE INDEX IF NOT EXISTS runs_by_player
+    ON runs (player, days_survived DESC, health DESC);
+CREATE INDEX IF NOT EXISTS runs_by_time
+    ON runs (finished_at DESC);
+"""
+
+_COLUMNS = ('player', 'difficulty', 'outcome', 'days_survived', 'cause', 'health', 'hunger',
+            'thirst', 'food', 'water', 'gold', 'season', 'seed', 'finished_at')
+_INSERT = f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+
+def connect(path=DEFAULT_DB):
+    """Open (and if needed create) the run database in WAL mode."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _row(player, result):
+    seed = result.get('seed')
+    return (player, result['difficulty'], result.get('outcome', 'died'), result['days_survived'],
+            result.get('cause'), result.get('health'), result.get('hunger'), result.get('thirst'),
+            result.get('food'), result.get('water'), result.get('gold'), result.get('season'),
+            None if seed is None else str(seed), result.get('finished_at', time.time()))
+
+
+class RunRecorder:
+    """Batched, background writer for finished runs.
+
+    `submit()` only enqueues; a daemon thread drains the queue and inserts
+    up to `batch_size` rows per transaction, waiting at most `flush_interval`
+    seconds before writing a partial batch. Call `close()` to flush.
+    """
+
+    def __init__(self, path=DEFAULT_DB, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._queue = queue.Queue()
+        self._conn = connect(path)
+        self._thread = threading.Thread(target=self._run, name='run-recorder', daemon=True)
+        self._thread.start()
+
+    def submit(self, player, result):
+        self._queue.put(_row(player, result))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._conn.close()
+
+    def _run(self):
+        done = False
+        while not done:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    with self._conn:
+                        self._conn.executemany(_INSERT, batch)
+                    self.written += len(batch)
+                except sqlite3.Error as e:
+                    print(f"Error saving {len(batch)} run(s): {e}")
+
+
+# --- Queries ---------------------------------------------------------------
+def top_runs(conn, difficulty, limit=10):
+    """Best runs for a difficulty: most days survived, then most health left."""
+    return conn.execute(
+        "SELECT * FROM runs WHERE difficulty = ? "
+        "ORDER BY days_survived DESC, health DESC, finished_at LIMIT ?",
+        (difficulty, limit)).fetchall()
+
+
+def player_best(conn, player, limit=5):
+    """A player's best runs across all difficulties."""
+    return conn.execute(
+        "SELECT * FROM runs WHERE player = ? ORDER BY days_survived DESC, health DESC LIMIT ?",
+        (player, limit)).fetchall()
+
+
+def recent_runs(conn, limit=20):
+    return conn.execute(
+        "SELECT * FROM runs ORDER BY finished_at DESC LIMIT ?", (limit,)).fetchall()
+
+
+def format_runs(rows):
+    lines = []
+    for r in rows:
+        cause = f" ({r['cause']})" if r['cause'] else ''
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(r['finished_at']))
+        lines.append(f"{r['player']:<16} {r['difficulty']:<10} {r['days_survived']:>3} days  "
+                     f"health {r['health']:>3}  {r['outcome']}{cause}  {when}")
+    return "\n".join(lines) if lines else "No runs recorded."
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play with run history, or query the leaderboard.")
+    parser.add_argument('--db', default=DEFAULT_DB)
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    play = sub.add_parser('play', help="play the game and record finished runs")
+    play.add_argument('--player', required=True)
+    top = sub.add_parser('top', help="top runs for a difficulty")
+    top.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    top.add_argument('-n', type=int, default=10)
+    best = sub.add_parser('best', help="a player's best runs")
+    best.add_argument('player')
+    best.add_argument('-n', type=int, default=5)
+    recent = sub.add_parser('recent', help="most recently finished runs")
+    recent.add_argument('-n', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'play':
+        recorder = RunRecorder(args.db)
+        survival.GAME_OVER_HOOK = lambda result: recorder.submit(args.player, result)
+        try:
+            survival.main_menu()
+        finally:
+            recorder.close()
+        return
+
+    conn = connect(args.db)
+    if args.cmd == 'top':
+        print(format_runs(top_runs(conn, args.difficulty, args.n)))
+    elif args.cmd == 'best':
+        print(format_runs(player_best(conn, args.player, args.n)))
+    else:
+        print(format_runs(recent_runs(conn, args.n)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Scripted-client load generator for the interactive game.
+
+Plays many games at once and measures, for every prompt, the time from
+sending a line of input to the next prompt appearing. Two transports:
+
+  subprocess  one `python -u survival.py` per game, driven over pipes from a
+              single selector loop (exercises the real main_menu()/main()).
+  inprocess   sessions.GameSession objects, one client thread each.
+
+Clients answer the `#>`, `>` and `Quit game?` prompts with a random policy
+(or lines from --script), leave the autopilot's routine prompt blank, and
+quit after --max-inputs inputs so games on easy difficulties still finish.
+Games still running GRACE seconds after --duration are killed. For each concurrency level the report gives
+p50/p95/p99 latency, games/sec and RSS per instance, i.e. a capacity curve:
+
+    python loadgen.py --mode subprocess --concurrency 1 2 4 8 16 --duration 10
+"""
+import argparse
+import os
+import random
+import re
+import selectors
+import subprocess
+import sys
+import threading
+import time
+
+import survival
+from stats import QuantileSketch
+
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'survival.py')
+AUTOPILOT_PROMPT = 'needs you): '
+PROMPTS = ('#> ', '\n> ', '(yes/no) ', 'dev> ', AUTOPILOT_PROMPT)
+GRACE = 5.0     # seconds after --duration before games that are still running are killed
+_OPTION_RE = re.compile(r'^(\d+)\. ', re.M)
+
+
+def is_prompt(text):
+    """True if `text` (output since the last input) ends at an input prompt."""
+    return text.endswith(PROMPTS) or text == '> '
+
+
+class RandomClient:
+    """Answers prompts like a random player; quits after `max_inputs` lines."""
+
+    def __init__(self, rng, max_inputs=200, script=None):
+        self.rng = rng
+        self.max_inputs = max_inputs
+        self.script = script
+        self.sent = 0
+
+    def answer(self, text):
+        self.sent += 1
+        quitting = self.sent > self.max_inputs
+        if text.endswith('#> '):
+            return '1'
+        if text.endswith('(yes/no) '):
+            return 'yes' if quitting else 'no'
+        if text.endswith('dev> '):
+            return 'exit'
+        if text.endswith(AUTOPILOT_PROMPT):
+            return ''       # the built-in routine
+        options = [int(n) for n in _OPTION_RE.findall(text)]
+        count = max(options) if options else 1
+        quit_option = survival.QUIT_ACTION + 1
+        if count >= quit_option and quitting:
+            return str(quit_option)
+        if self.script:
+            return self.script[(self.sent - 1) % len(self.script)]
+        return str(self.rng.randint(1, min(count, survival.QUIT_ACTION)))
+
+
+def rss_bytes(pid='self'):
+    """Resident set size of a process from /proc (None where unavailable)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class LevelResult:
+    """Measurements for one concurrency level."""
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.latency = QuantileSketch()
+        self.prompts = 0
+        self.games = 0
+        self.rss = []
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.latency.add(seconds)
+            self.prompts += 1
+
+    def finish_game(self, rss=None):
+        with self._lock:
+            self.games += 1
+        self.record_rss(rss)
+
+    def record_rss(self, rss):
+        if rss is not None:
+            with self._lock:
+                self.rss.append(rss)
+
+    def row(self):
+        q = {p: (self.latency.quantile(p) or 0.0) * 1000 for p in (0.5, 0.95, 0.99)}
+        rss = sum(self.rss) / len(self.rss) / 2 ** 20 if self.rss else float('nan')
+        return (f"{self.concurrency:>5} {self.games:>7} {self.games / self.elapsed:>9.1f} "
+                f"{self.prompts / self.elapsed:>10.0f} {q[0.5]:>8.2f} {q[0.95]:>8.2f} "
+                f"{q[0.99]:>8.2f} {rss:>10.1f}")
+
+
+HEADER = (f"{'conc':>5} {'games':>7} {'games/s':>9} {'prompts/s':>10} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS/inst MiB':>12}")
+
+
+# --- subprocess transport ------------------------------------------------------
+class _Proc:
+    def __init__(self, client):
+        self.client = client
+        self.proc = subprocess.Popen([sys.executable, '-u', GAME_SCRIPT], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        os.set_blocking(self.proc.stdout.fileno(), False)
+        self.buf = ''
+        self.sent_at = None     # None until the first prompt (start-up isn't a prompt latency)
+        self.peak_rss = None
+        self.killed = False     # stopped at the deadline: not a finished game
+
+    def send(self, line):
+        self.buf = ''
+        self.sent_at = time.perf_counter()
+        try:
+            self.proc.stdin.write((line + '\n').encode())
+        except BrokenPipeError:
+            pass
+
+    def kill(self):
+        self.killed = True
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.kill()
+
+
+def run_subprocess_level(concurrency, duration, seed, max_inputs, script):
+    result = LevelResult(concurrency)
+    rng = random.Random(seed)
+    sel = selectors.DefaultSelector()
+
+    def spawn():
+        p = _Proc(RandomClient(random.Random(rng.random()), max_inputs, script))
+        sel.register(p.proc.stdout, selectors.EVENT_READ, p)
+
+    start = time.perf_counter()
+    for _ in range(concurrency):
+        spawn()
+    while sel.get_map():
+        elapsed = time.perf_counter() - start
+        running = elapsed < duration
+        if elapsed >= duration + GRACE:
+            # not at a prompt since the deadline (e.g. autopilot days): stop it anyway
+            for key in list(sel.get_map().values()):
+                if key.data.proc.poll() is None:
+                    key.data.kill()
+        for key, _ in sel.select(timeout=0.5):
+            p = key.data
+            chunk = os.read(key.fd, 65536)
+            if not chunk:
+                sel.unregister(key.fileobj)
+                p.proc.wait()
+                if p.killed:
+                    result.record_rss(p.peak_rss)
+                else:
+                    result.finish_game(p.peak_rss)
+                if running:
+                    spawn()
+                continue
+            p.buf += chunk.decode(errors='replace')
+            if is_prompt(p.buf):
+                if p.sent_at is not None:
+                    result.record(time.perf_counter() - p.sent_at)
+                if p.client.sent % 20 == 0:
+                    rss = rss_bytes(p.proc.pid)
+                    if rss is not None:
+                        p.peak_rss = max(p.peak_rss or 0, rss)
+                if running:
+                    p.send(p.client.answer(p.buf))
+                else:
+                    # out of time: end this game promptly
+                    p.kill()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+# --- in-process transport ------------------------------------------------------
+def run_inprocess_level(concurrency, duration, seed, max_inputs, script, difficulty='Normal'):
+    import sessions   # only needed (and stdio routing only installed) for this mode
+
+    result = LevelResult(concurrency)
+    baseline = rss_bytes()
+    start = time.perf_counter()
+
+    def client_loop(n):
+        rng = random.Random(f"{seed}:{n}")
+        while time.perf_counter() - start < duration:
+            client = RandomClient(rng, max_inputs, script)
+            session = sessions.GameSession(difficulty, seed=rng.randrange(2 ** 32))
+            text = session.output()
+            while not session.finished and time.perf_counter() - start < duration:
+                line = client.answer(text)
+                t0 = time.perf_counter()
+                text = session.send(line)
+                result.record(time.perf_counter() - t0)
+            finished = session.finished
+            session.close()
+            if finished:
+                rss = rss_bytes()
+                result.finish_game(None if rss is None or baseline is None
+                                   else max(0, rss - baseline) / concurrency)
+
+    threads = [threading.Thread(target=client_loop, args=(n,), daemon=True) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure per-prompt latency of the interactive game.")
+    parser.add_argument('--mode', choices=('subprocess', 'inprocess'), default='subprocess')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument('--max-inputs', type=int, default=200, help="inputs before a client quits")
+    parser.add_argument('--script', help="file with input lines to cycle instead of random menu picks")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = [line.strip() for line in f if line.strip()]
+
+    print(HEADER)
+    for level in args.concurrency:
+        if args.mode == 'subprocess':
+            result = run_subprocess_level(level, args.duration, args.seed, args.max_inputs, script)
+        else:
+            result = run_inprocess_level(level, args.duration, args.seed, args.max_inputs, script)
+        print(result.row(), flush=True)
+
+
+if __name__ == "__main__":
+    main()
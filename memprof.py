@@ -0,0 +1,255 @@
+"""Opt-in memory profiler: where do the bytes of many simulated games go?
+
+Plays `games` games side by side, one day at a time (population.Rules.step,
+so every game's states stay alive together as they would in a server), with
+the status line rendered twice a day as main() does, under tracemalloc.
+Memory is attributed to game subsystems:
+
+    actions     perform_action() and the action functions
+    night       apply_night_effects(), status effects, the night table
+    events      danger_event() and its night phases (traps, bandits, merchant)
+    combat      handle_combat(), combat_round(), roll_attack()
+    validation  validate_state()
+    rendering   status_line() / show_status()
+    state       new_game_state(), season and item bookkeeping
+    other       policies, the harness, the standard library
+
+Two measures per subsystem:
+  peak    the largest transient allocation during one call of its entry
+          point (bytes allocated and freed again within the call, e.g.
+          formatted messages and the enemy dicts of a fight)
+  live    bytes still allocated when the games end, per game: state dicts,
+          status_effects sub-dicts and anything else a game keeps; the
+          growth of live bytes per game per in-game day shows leaks
+
+Live bytes are attributed to the innermost survival.py function that
+allocated them, so this needs tracemalloc frames deep enough to reach it
+(FRAMES). The run is several times slower than an unprofiled one.
+
+    python memprof.py --games 200 --difficulty Hard
+    python bench.py memory --budget memory.live_per_game=2500
+"""
+import argparse
+import bisect
+import contextlib
+import inspect
+import tracemalloc
+
+import population
+import survival
+
+FRAMES = 4
+SUBSYSTEMS = ('actions', 'night', 'events', 'combat', 'validation', 'rendering', 'state', 'other')
+# Function in survival.py -> subsystem; action_* functions are 'actions'
+FUNCTIONS = {
+    'perform_action': 'actions', 'use_bandage': 'actions', 'check_stat_increase': 'actions',
+    'roll_check': 'actions',
+    'apply_night_effects': 'night', 'apply_status_effects': 'night', 'night_table': 'night',
+    'compile_night_table': 'night', 'dice_pmf': 'night', 'night_death_cause': 'night',
+    'danger_event': 'events', 'check_trap': 'events', 'seasonal_hazard': 'events',
+    'major_event': 'events', 'infection_damage': 'events', 'handle_bandit_encounter': 'events',
+    'handle_shop': 'events',
+    'handle_combat': 'combat', 'combat_round': 'combat', 'roll_attack': 'combat',
+    'validate_state': 'validation',
+    'status_line': 'rendering', 'show_status': 'rendering', 'temperature_label': 'rendering',
+    'survival_odds': 'rendering',
+    'new_game_state': 'state', 'update_season': 'state', 'roll_item_discovery': 'state',
+    'game_result': 'state',
+}
+# Entry points whose calls are metered for transient peaks
+ENTRY_POINTS = {
+    'perform_action': 'actions', 'apply_night_effects': 'night', 'danger_event': 'events',
+    'handle_combat': 'combat', 'validate_state': 'validation', 'status_line': 'rendering',
+}
+
+
+def _function_spans():
+    """(first line, last line, subsystem) of every mapped survival.py function, sorted."""
+    spans = []
+    for name, fn in inspect.getmembers(survival, inspect.isfunction):
+        if fn.__module__ != survival.__name__:
+            continue
+        subsystem = 'actions' if name.startswith('action_') else FUNCTIONS.get(name)
+        if subsystem is None:
+            continue
+        lines, first = inspect.getsourcelines(fn)
+        spans.append((first, first + len(lines) - 1, subsystem))
+    spans.sort()
+    return spans
+
+
+class MemoryProfiler:
+    """tracemalloc session that meters the ENTRY_POINTS and attributes live memory."""
+
+    def __init__(self, frames=FRAMES):
+        self.frames = frames
+        self.peaks = dict.fromkeys(SUBSYSTEMS, 0)   # largest transient per call
+        self.calls = dict.fromkeys(SUBSYSTEMS, 0)
+        self.day_peak = 0                           # largest transient over one game-day
+        self._stack = []                            # [base, peak] of the open metered calls
+        self._spans = _function_spans()
+        self._starts = [span[0] for span in self._spans]
+        self._file = inspect.getsourcefile(survival)
+        self._saved = {}
+        self._seen = {}                             # traceback -> subsystem
+
+    # -- metering -----------------------------------------------------------------
+    def _enter(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        self._stack.append([current, current])
+        tracemalloc.reset_peak()
+
+    def _exit(self):
+        _, peak = tracemalloc.get_traced_memory()
+        base, top = self._stack.pop()
+        top = max(top, peak)
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], top)
+        tracemalloc.reset_peak()
+        return top - base
+
+    @contextlib.contextmanager
+    def metered(self, subsystem=None):
+        """Meter a block: its transient peak counts towards `subsystem` (or the day peak)."""
+        self._enter()
+        try:
+            yield
+        finally:
+            transient = self._exit()
+            if subsystem is None:
+                self.day_peak = max(self.day_peak, transient)
+            else:
+                self.peaks[subsystem] = max(self.peaks[subsystem], transient)
+                self.calls[subsystem] += 1
+
+    def _wrap(self, name, subsystem):
+        fn = getattr(survival, name)
+
+        def metered(*args, **kwargs):
+            with self.metered(subsystem):
+                return fn(*args, **kwargs)
+        return metered
+
+    def __enter__(self):
+        for name, subsystem in ENTRY_POINTS.items():
+            self._saved[name] = getattr(survival, name)
+            setattr(survival, name, self._wrap(name, subsystem))
+        tracemalloc.start(self.frames)
+        return self
+
+    def __exit__(self, *exc):
+        tracemalloc.stop()
+        for name, fn in self._saved.items():
+            setattr(survival, name, fn)
+        self._saved.clear()
+
+    # -- attribution --------------------------------------------------------------
+    def subsystem_of(self, traceback):
+        """Subsystem of the innermost mapped survival.py frame of an allocation."""
+        subsystem = self._seen.get(traceback)
+        if subsystem is not None:
+            return subsystem
+        subsystem = 'other'
+        for frame in reversed(traceback):
+            if frame.filename != self._file:
+                continue
+            i = bisect.bisect_right(self._starts, frame.lineno) - 1
+            if i >= 0 and frame.lineno <= self._spans[i][1]:
+                subsystem = self._spans[i][2]
+                break
+        self._seen[traceback] = subsystem
+        return subsystem
+
+    def live(self):
+        """Bytes currently allocated, by subsystem."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+        totals = dict.fromkeys(SUBSYSTEMS, 0)
+        for stat in snapshot.statistics('traceback'):
+            totals[self.subsystem_of(stat.traceback)] += stat.size
+        return totals
+
+
+def profile(difficulty='Normal', games=200, master_seed=0, policy='heuristic', days=None):
+    """Profile `games` games played side by side; returns a report dict (see format_report)."""
+    rules = population.Rules(difficulty, master_seed, policy, days)
+    survival.night_table(rules.content)     # built once per content version, not per game
+    with MemoryProfiler() as profiler:
+        with rules.installed():
+            baseline = profiler.live()
+            states = []
+            for _ in range(games):
+                with profiler.metered('state'):
+                    states.append(survival.new_game_state(rules.preset))
+            after_day = []
+            for day in range(1, rules.max_days + 1):
+                playing = [i for i, state in enumerate(states)
+                           if state['health'] > 0 and state['day'] == day]
+                if not playing:
+                    break
+                for index in playing:
+                    state = states[index]
+                    with profiler.metered():
+                        survival.show_status(state)
+                        rules.step(state, index)
+                        survival.show_status(state)
+                after_day.append(profiler.live())
+            _, peak = tracemalloc.get_traced_memory()
+    live = {s: max(0, after_day[-1][s] - baseline[s]) for s in SUBSYSTEMS}
+    days_played = len(after_day)
+    growth = {s: (after_day[-1][s] - after_day[0][s]) / max(1, days_played - 1) for s in SUBSYSTEMS}
+    return {
+        'difficulty': difficulty,
+        'games': games,
+        'days': days_played,
+        'peaks': profiler.peaks,
+        'calls': profiler.calls,
+        'live_per_game': {s: live[s] / games for s in SUBSYSTEMS},
+        'growth_per_day': {s: growth[s] / games for s in SUBSYSTEMS},
+        'peak_per_day': profiler.day_peak,
+        'peak_traced': peak,
+    }
+
+
+def metrics(report):
+    """Flat {name: bytes} view of a report, the names budgets refer to."""
+    flat = {
+        'live_per_game': sum(report['live_per_game'].values()),
+        'growth_per_day': sum(report['growth_per_day'].values()),
+        'peak_per_day': report['peak_per_day'],
+    }
+    for s in SUBSYSTEMS:
+        flat[f'{s}.peak'] = report['peaks'][s]
+        flat[f'{s}.live'] = report['live_per_game'][s]
+    return flat
+
+
+def format_report(report):
+    lines = [f"== Memory: {report['games']} {report['difficulty']} games side by side, "
+             f"{report['days']} days",
+             f"  {'subsystem':<11} {'calls':>8} {'peak/call':>10} {'live/game':>10} {'growth/day':>11}"]
+    for s in SUBSYSTEMS:
+        lines.append(f"  {s:<11} {report['calls'][s]:8} {report['peaks'][s]:10,} "
+                     f"{report['live_per_game'][s]:10,.0f} {report['growth_per_day'][s]:11,.1f}")
+    flat = metrics(report)
+    lines.append(f"  {'total':<11} {'':8} {'':10} {flat['live_per_game']:10,.0f} "
+                 f"{flat['growth_per_day']:11,.1f}")
+    lines.append(f"  peak per game-day {report['peak_per_day']:,} bytes; "
+                 f"peak traced {report['peak_traced']:,} bytes")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attribute the memory of simulated games to subsystems.")
+    parser.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    parser.add_argument('--games', type=int, default=200, help="games played side by side")
+    parser.add_argument('--seed', default=0, help="master seed")
+    parser.add_argument('--days', type=int, help="game length (default: MAX_DAYS)")
+    args = parser.parse_args(argv)
+    print(format_report(profile(args.difficulty, args.games, args.seed, days=args.days)))
+
+
+if __name__ == "__main__":
+    main()
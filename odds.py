@@ -0,0 +1,327 @@
+"""Precomputed survival odds: "am I going to make it?" as an O(1) table lookup.
+
+`python odds.py build` estimates, for the heuristic policy, the probability
+of surviving to MAX_DAYS from every cell of a discretised state space and
+writes it to a compact binary file (one byte per cell, in percent). The
+state space is (difficulty, day, health, hunger, thirst, food, water,
+shelter, fire); the season is implied by the day. Everything else (status
+effects, bandages, tools, stats) is taken at its starting value.
+
+The build samples one-day transitions from states drawn across each cell
+with the real game functions (simulation.play_day) and solves for the odds
+backwards from the last day. Every day gets its own independent samples:
+reusing one sample set for several days compounds its sampling error into
+a bias (a cell that happened to drift the wrong way does so every time),
+whereas fresh samples keep the estimate unbiased even with few per cell.
+Cost is cells x days x samples day-steps per difficulty.
+
+At run time OddsTable memory-maps the file read-only, so every process on a
+host shares the same pages and a lookup is an index computation plus one
+byte read. survival.status_line() shows the odds when survival.SHOW_ODDS is
+on, and the dev console has an `odds` command.
+
+The odds are an estimate, not a promise: `python odds.py check` compares
+them with simulated games. They are close at the top of the range, where
+most days are spent, and pessimistic in the middle (strength, gold and
+tools picked up along the way are not part of the state).
+
+    python odds.py build --samples 4 --workers 4
+    python odds.py query --difficulty Hard --day 8 --health 55 --food 1
+    python odds.py check --difficulty Hard --games 1000
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'odds.bin')
+MAGIC = b'SURVODDS'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sII')     # magic, format version, meta length
+_ALIGN = 64
+
+# Discretisation: (state key, bin lower edges, highest value). Edges sit on
+# the thresholds the rules and the heuristic policy use (eat/drink at 50,
+# night penalties at 80, bandage/rest/fight at 40/50/60 health) so a bin
+# never straddles a decision. Food and water are counted 0..4 (4 = "4 or more").
+DIMENSIONS = (
+    ('health', (1, 10, 20, 30, 40, 50, 60, 70, 80, 90), 100),
+    ('hunger', (0, 20, 35, 50, 65, 80), 100),
+    ('thirst', (0, 20, 35, 50, 65, 80), 100),
+    ('food', (0, 1, 2, 3, 4), 4),
+    ('water', (0, 1, 2, 3, 4), 4),
+    ('shelter', (0, 1), 1),
+    ('fire', (0, 1), 1),
+)
+CELLS = 1
+for _, _edges, _ in DIMENSIONS:
+    CELLS *= len(_edges)
+
+
+def cell_index(state):
+    """Flat index of the cell containing `state` (a game state dict, health > 0)."""
+    index = 0
+    for key, edges, top in DIMENSIONS:
+        value = min(max(int(state.get(key, 0)), edges[0]), top)
+        index = index * len(edges) + bisect.bisect_right(edges, value) - 1
+    return index
+
+
+def cell_sample(index, rng):
+    """A state (partial dict) drawn uniformly from the cell's value ranges.
+
+    Sampling across the cell, rather than always starting from its
+    midpoint, keeps the discretisation from biasing the estimate.
+    """
+    values = {}
+    for key, edges, top in reversed(DIMENSIONS):
+        index, b = divmod(index, len(edges))
+        hi = edges[b + 1] - 1 if b + 1 < len(edges) else top
+        values[key] = rng.randint(edges[b], hi)
+    values['shelter'] = bool(values['shelter'])
+    values['fire'] = bool(values['fire'])
+    return values
+
+
+def _data_offset(meta_len):
+    """The table data starts at the first aligned offset after the header and meta."""
+    return -(-(_HEADER.size + meta_len) // _ALIGN) * _ALIGN
+
+
+class OddsTable:
+    """Read-only, memory-mapped survival-odds table."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a survival odds table (v{FORMAT_VERSION})")
+        self.meta = json.loads(self._mm[_HEADER.size:_HEADER.size + meta_len])
+        self.max_days = self.meta['max_days']
+        self.difficulties = {label: i for i, label in enumerate(self.meta['difficulties'])}
+        self._data = _data_offset(meta_len)
+        if self.meta['cells'] != CELLS:
+            raise ValueError(f"{path} was built with a different discretisation")
+
+    def odds(self, difficulty, state):
+        """Probability (0-1) of surviving to the last day from `state`, or None
+        if the table has no entry for this difficulty."""
+        d = self.difficulties.get(difficulty)
+        if d is None:
+            return None
+        if state.get('health', 0) <= 0:
+            return 0.0
+        day = state.get('day', 1)
+        if day > self.max_days:
+            return 1.0
+        offset = self._data + (d * self.max_days + max(1, day) - 1) * CELLS + cell_index(state)
+        return self._mm[offset] / 100
+
+    def close(self):
+        self._mm.close()
+
+
+_TABLES = {}
+
+
+def open_table(path=DEFAULT_PATH):
+    """Shared OddsTable for `path`, or None if no table has been built there."""
+    table = _TABLES.get(path)
+    if table is None:
+        if not os.path.exists(path):
+            return None
+        table = _TABLES[path] = OddsTable(path)
+    return table
+
+
+# --- Offline build -----------------------------------------------------------
+def _sample_transitions(args):
+    """Sampled transitions from every cell on one (difficulty, day).
+
+    Returns (difficulty, day, next_cells) where next_cells[cell] holds
+    `samples` cells reached by the end of the day (-1: died).
+    """
+    difficulty, day, samples, master_seed = args
+    import contextlib
+    import random
+
+    import numpy as np
+
+    import content
+    import simulation
+    import survival
+
+    pinned = content.current()
+    preset = pinned.presets[difficulty]
+    policy = simulation.HeuristicPolicy()
+    nxt = np.empty((CELLS, samples), dtype=np.int32)
+    current = {}
+    saved = survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT
+    survival.CURRENT_DIFFICULTY, survival.CONTENT = preset, pinned
+    survival.CHOICE_HOOK = lambda options: policy.choose_option(
+        current, simulation.prompt_kind(options), options)
+    try:
+        with contextlib.redirect_stdout(simulation.NULL_OUTPUT):
+            for cell in range(CELLS):
+                random.seed(f"{master_seed}:{difficulty}:{day}:{cell}")
+                start = survival.new_game_state(preset)
+                for k in range(samples):
+                    current.clear()
+                    current.update(start)
+                    current.update(cell_sample(cell, random), day=day, status_effects={})
+                    simulation.play_day(current, policy)
+                    nxt[cell, k] = cell_index(current) if current['health'] > 0 else -1
+    finally:
+        survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT = saved
+    return difficulty, day, nxt
+
+
+def build(path=DEFAULT_PATH, difficulties=None, samples=4, master_seed=0, workers=1, progress=None):
+    """Estimate the odds table and write it to `path`. Returns the meta dict."""
+    import multiprocessing
+
+    import numpy as np
+
+    import content
+    import survival
+
+    difficulties = list(difficulties or survival.DIFFICULTY_PRESETS)
+    max_days = survival.MAX_DAYS
+    tasks = [(d, day, samples, master_seed) for d in difficulties for day in range(1, max_days + 1)]
+    transitions = {}
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            for d, day, nxt in pool.imap_unordered(_sample_transitions, tasks):
+                transitions[d, day] = nxt
+                if progress:
+                    progress(d, day)
+    else:
+        for task in tasks:
+            d, day, nxt = _sample_transitions(task)
+            transitions[d, day] = nxt
+            if progress:
+                progress(d, day)
+
+    table = np.empty((len(difficulties), max_days, CELLS), dtype=np.uint8)
+    for i, difficulty in enumerate(difficulties):
+        value = np.ones(CELLS + 1)      # survival odds after the last day; slot -1 = dead
+        value[-1] = 0.0
+        for day in range(max_days, 0, -1):
+            value = np.append(value[transitions[difficulty, day]].mean(axis=1), 0.0)
+            table[i, day - 1] = np.rint(value[:-1] * 100).astype(np.uint8)
+
+    meta = {
+        'max_days': max_days,
+        'difficulties': difficulties,
+        'cells': CELLS,
+        'dimensions': DIMENSIONS,
+        'samples': samples,
+        'master_seed': master_seed,
+        'policy': 'heuristic',
+        'content': content.current().version,
+    }
+    blob = json.dumps(meta).encode()
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(blob)))
+        f.write(blob)
+        f.write(b'\0' * (_data_offset(len(blob)) - f.tell()))
+        f.write(table.tobytes())
+    os.replace(tmp, path)
+    _TABLES.pop(path, None)
+    return meta
+
+
+class _Recorder:
+    """Policy wrapper that looks up the odds of each start-of-day state."""
+
+    def __init__(self, table, difficulty, policy):
+        self.table = table
+        self.difficulty = difficulty
+        self.policy = policy
+        self.name = policy.name
+        self.predictions = []
+        self._day = None
+
+    def choose_action(self, state):
+        if state['day'] != self._day:
+            self._day = state['day']
+            self.predictions.append(self.table.odds(self.difficulty, state))
+        return self.policy.choose_action(state)
+
+    def choose_option(self, state, kind, options):
+        return self.policy.choose_option(state, kind, options)
+
+
+def calibration(table, difficulty, games=1000, master_seed='check', bins=10):
+    """Compare the table with simulated games: predict survival from every
+    start-of-day state, then check whether that game was survived.
+
+    Returns [(low, high, days, mean predicted, observed rate)] per prediction bin.
+    """
+    import simulation
+
+    rows = [[0, 0.0, 0] for _ in range(bins)]
+    for index in range(games):
+        recorder = _Recorder(table, difficulty, simulation.HeuristicPolicy())
+        result = simulation.play_game(difficulty, recorder,
+                                      simulation.game_seed(master_seed, difficulty, index))
+        for p in recorder.predictions:
+            if p is None:
+                continue
+            row = rows[min(int(p * bins), bins - 1)]
+            row[0] += 1
+            row[1] += p
+            row[2] += result['survived']
+    return [(i / bins, (i + 1) / bins, n, total / n, hits / n)
+            for i, (n, total, hits) in enumerate(rows) if n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the survival-odds table.")
+    parser.add_argument('--table', default=DEFAULT_PATH)
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help="estimate the table offline")
+    b.add_argument('--difficulty', nargs='+', help="difficulties to include (default: all)")
+    b.add_argument('--samples', type=int, default=4, help="sampled transitions per cell and day")
+    b.add_argument('--seed', default=0)
+    b.add_argument('--workers', type=int, default=1)
+    c = sub.add_parser('check', help="compare the table with simulated games")
+    c.add_argument('--difficulty', default='Normal')
+    c.add_argument('--games', type=int, default=1000)
+    q = sub.add_parser('query', help="look up the odds for a state")
+    q.add_argument('--difficulty', default='Normal')
+    q.add_argument('--day', type=int, default=1)
+    for key, default in (('health', 100), ('hunger', 10), ('thirst', 10), ('food', 2), ('water', 2)):
+        q.add_argument(f'--{key}', type=int, default=default)
+    q.add_argument('--shelter', action='store_true')
+    q.add_argument('--fire', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'build':
+        meta = build(args.table, args.difficulty, args.samples, args.seed, args.workers,
+                     progress=lambda d, day: print(f"  sampled {d} day {day}", flush=True))
+        size = os.path.getsize(args.table)
+        print(f"Wrote {args.table}: {len(meta['difficulties'])} difficulties x {meta['max_days']} days "
+              f"x {CELLS} cells ({size / 1024:.0f} KiB)")
+        return
+    table = open_table(args.table)
+    if table is None:
+        raise SystemExit(f"No odds table at {args.table}; run 'python odds.py build' first.")
+    if args.cmd == 'check':
+        print(f"{'predicted':>11} {'days':>7} {'mean':>6} {'observed':>9}")
+        for low, high, n, mean, observed in calibration(table, args.difficulty, args.games):
+            print(f"{low:>4.0%}-{high:<5.0%} {n:>7} {mean:>6.1%} {observed:>9.1%}")
+        return
+    state = {k: getattr(args, k) for k in ('day', 'health', 'hunger', 'thirst', 'food', 'water',
+                                           'shelter', 'fire')}
+    p = table.odds(args.difficulty, state)
+    print("No odds for that difficulty." if p is None else f"{p:.0%}")
+
+
+if __name__ == "__main__":
+    main()
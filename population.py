@@ -0,0 +1,691 @@
+"""Step very large populations of games in place in shared memory.
+
+A Population keeps N game states as columns (one numpy array per state key,
+see COLUMNS) in a single `multiprocessing.shared_memory` block. Pool workers
+attach to the block once, when they start, and every task steps a slice of
+rows through one day of the real rules (simulation.play_day, then the
+end-of-day steps of simulation.play_game), decoding each row into a state
+dict and writing it back where it was. A task is just `(start, stop, day)`
+and returns two counts, so no game state is ever pickled: throughput scales
+with cores instead of with the cost of shipping `state` and
+`status_effects` dicts to and from the workers.
+
+The population advances in lock-step, one day per round. Each (game, day)
+step reseeds `random` from simulation.game_seed(seed, difficulty, game) and
+the day, so a game's outcome depends only on its index and the master seed,
+never on how rows are split between workers or how many there are. (It is
+not the same stream as simulation.play_game, which seeds once per game, so
+individual games differ from a simulate() run; the distributions do not.)
+
+apply_night_batch() runs the night phase on whole column slices from
+survival.night_table() (one damage draw per row from the table's PMF), for
+callers that step the columns with numpy instead of per-row dicts, and
+apply_actions_batch() does the same for the daytime actions (checked against
+the scalar functions by verify_actions()).
+
+    python population.py --games 200000 --difficulty Hard --workers 4
+    python population.py --games 20000 --compare    # vs. pickling state dicts
+    python population.py --games 20000 --verify-actions
+"""
+import argparse
+import contextlib
+import multiprocessing
+import os
+import random
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import content
+import shards
+import simulation
+import survival
+from stats import SimulationAggregator
+
+# Column name -> numpy dtype. Flags are 0/1; ITEMS are only put in the state
+# dict when set (the rules test them with state.get() and pop them when lost);
+# `effect_*` hold the turns left on a status effect, 0 meaning absent.
+COLUMNS = {
+    'day': '<i2',
+    'health': '<i2',
+    'hunger': '<i2',
+    'thirst': '<i2',
+    'food': '<i2',
+    'water': '<i2',
+    'gold': '<i4',
+    'bandages': '<i2',
+    'cloth': '<i2',
+    'strength': '<i2',
+    'agility': '<i2',
+    'endurance': '<i2',
+    'temperature': '<i2',
+    'season': '<u1',
+    'shelter': '<u1',
+    'fire': '<u1',
+    'infection': '<u1',
+    'merchant_hostile': '<u1',
+    'knife': '<u1',
+    'hatchet': '<u1',
+    'trap_set': '<u1',
+    'effect_poison': '<i1',
+    'effect_bleeding': '<i1',
+    'effect_fever': '<i1',
+    'effect_infection': '<i1',
+    'cause': '<u1',
+}
+NUMBERS = ('day', 'health', 'hunger', 'thirst', 'food', 'water', 'gold', 'bandages', 'cloth',
+           'strength', 'agility', 'endurance', 'temperature')
+FLAGS = ('shelter', 'fire', 'infection', 'merchant_hostile')
+ITEMS = ('knife', 'hatchet', 'trap_set')
+EFFECTS = ('poison', 'bleeding', 'fever', 'infection')
+# Causes of death, as simulation.play_day reports them; 0 means none
+CAUSES = [None, 'bleeding', *survival.ACTION_NAMES,
+          'dehydration', 'starvation', 'cold', 'poison', 'exposure', 'night event']
+_CAUSE_CODES = {cause: code for code, cause in enumerate(CAUSES)}
+_SEASON_CODES = {season: code for code, season in enumerate(survival.SEASONS)}
+_STATE_KEYS = set(NUMBERS) | set(FLAGS) | set(ITEMS) | {'season', 'status_effects'}
+_EFFECT_KEYS = set(EFFECTS)
+_ALIGN = 8
+
+
+def _layout(size):
+    """Byte offset of every column in a block holding `size` rows, and the block size."""
+    offsets = {}
+    total = 0
+    for name, dtype in COLUMNS.items():
+        offsets[name] = total
+        total += -(-size * np.dtype(dtype).itemsize // _ALIGN) * _ALIGN
+    return offsets, max(total, 1)
+
+
+class Population:
+    """N game states as columns of one shared-memory block.
+
+    Create one with `Population.create(size)` (the creator unlinks the block
+    on close) and attach to it from another process with
+    `Population.attach(population.spec)`. Use as a context manager.
+    """
+
+    def __init__(self, block, size, owner):
+        self.block = block
+        self.size = size
+        self.owner = owner
+        offsets, _ = _layout(size)
+        self.columns = {name: np.ndarray(size, dtype, block.buf, offsets[name])
+                        for name, dtype in COLUMNS.items()}
+
+    @classmethod
+    def create(cls, size):
+        _, nbytes = _layout(size)
+        population = cls(shared_memory.SharedMemory(create=True, size=nbytes), size, True)
+        for column in population.columns.values():
+            column[:] = 0
+        return population
+
+    @classmethod
+    def attach(cls, spec):
+        name, size = spec
+        return cls(shared_memory.SharedMemory(name=name), size, False)
+
+    @property
+    def spec(self):
+        """What another process needs to attach: (block name, rows)."""
+        return self.block.name, self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # the arrays export the block's buffer; drop them before closing it
+        self.columns = {}
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+    def __len__(self):
+        return self.size
+
+    def load(self, rows):
+        """The given rows as [(state, cause)]: state dicts the survival rules can play.
+
+        Columns are read one slice at a time, so decoding costs a few list
+        conversions per column rather than an array lookup per field.
+        """
+        c = self.columns
+        rows = np.asarray(rows)
+        numbers = zip(*(c[name][rows].tolist() for name in NUMBERS))
+        flags = zip(*(c[name][rows].astype(bool).tolist() for name in FLAGS))
+        items = zip(*(c[name][rows].tolist() for name in ITEMS))
+        effects = zip(*(c['effect_' + name][rows].tolist() for name in EFFECTS))
+        seasons = c['season'][rows].tolist()
+        causes = c['cause'][rows].tolist()
+        games = []
+        for values, flag, item, turns, season, cause in zip(numbers, flags, items, effects,
+                                                             seasons, causes):
+            state = dict(zip(NUMBERS, values))
+            state.update(zip(FLAGS, flag))
+            if any(item):
+                state.update((name, True) for name, held in zip(ITEMS, item) if held)
+            state['season'] = survival.SEASONS[season]
+            state['status_effects'] = ({name: t for name, t in zip(EFFECTS, turns) if t}
+                                       if any(turns) else {})
+            games.append((state, CAUSES[cause]))
+        return games
+
+    def store(self, rows, games):
+        """Write [(state, cause)] back into the given rows (the inverse of load)."""
+        states = [state for state, _ in games]
+        for state, cause in games:
+            effects = state.get('status_effects') or {}
+            if state.keys() - _STATE_KEYS or effects.keys() - _EFFECT_KEYS:
+                unknown = set(state) - _STATE_KEYS
+                unknown |= {f"status_effects.{name}" for name in set(effects) - _EFFECT_KEYS}
+                raise ValueError(f"No population column for {', '.join(sorted(unknown))}")
+            for name, turns in effects.items():
+                if turns <= 0:
+                    raise ValueError(f"Status effect {name} has {turns} turns left")
+            if cause not in _CAUSE_CODES:
+                raise ValueError(f"Unknown cause of death: {cause}")
+        c = self.columns
+        rows = np.asarray(rows)
+        for name in NUMBERS:
+            c[name][rows] = [state[name] for state in states]
+        for name in FLAGS + ITEMS:
+            c[name][rows] = [bool(state.get(name)) for state in states]
+        for name in EFFECTS:
+            c['effect_' + name][rows] = [(state.get('status_effects') or {}).get(name, 0)
+                                         for state in states]
+        c['season'][rows] = [_SEASON_CODES[state.get('season', 'Summer')] for state in states]
+        c['cause'][rows] = [_CAUSE_CODES[cause] for _, cause in games]
+
+    def reset(self, preset):
+        """Put every row at the start of a new game on a difficulty preset."""
+        if not self.size:
+            return
+        self.store([0], [(survival.new_game_state(preset), None)])
+        for column in self.columns.values():
+            column[1:] = column[0]
+
+
+# --- Stepping --------------------------------------------------------------
+class Rules:
+    """Everything but the population a step needs: difficulty, seed, policy and game length."""
+
+    def __init__(self, difficulty, master_seed=0, policy='heuristic', max_days=None):
+        if policy not in simulation.POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.difficulty = difficulty
+        self.master_seed = master_seed
+        self.policy_name = policy
+        self.policy = simulation.POLICIES[policy]()
+        self.max_days = max_days or survival.MAX_DAYS
+        self.content = content.current()
+        self.preset = self.content.presets[difficulty]
+
+    @property
+    def args(self):
+        """Constructor arguments, to rebuild the same Rules in a worker."""
+        return self.difficulty, self.master_seed, self.policy_name, self.max_days
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Install the difficulty and content globals and silence output, as play_game does."""
+        saved = survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT
+        survival.CURRENT_DIFFICULTY, survival.CONTENT = self.preset, self.content
+        try:
+            with contextlib.redirect_stdout(simulation.NULL_OUTPUT):
+                yield
+        finally:
+            survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT = saved
+
+    def step(self, state, index):
+        """Play day state['day'] of game `index` in place; returns the cause of death, if any.
+
+        Call inside installed(). Mirrors one pass of play_game's day loop,
+        including replaying a day whose night phase failed.
+        """
+        seed = f"{simulation.game_seed(self.master_seed, self.difficulty, index)}:{state['day']}"
+        random.seed(seed)
+        policy = self.policy
+        policy.start_game(seed)
+        survival.CHOICE_HOOK = lambda options: policy.choose_option(
+            state, simulation.prompt_kind(options), options)
+        cause = None
+        event = None
+        while event is None:
+            _, event, day_cause = simulation.play_day(state, policy)
+            cause = day_cause or cause
+        state['day'] += 1
+        over, _ = survival.check_game_over(state, self.max_days)
+        if not over:
+            survival.roll_item_discovery(state)
+        return cause
+
+
+def step_rows(population, rules, start, stop, day):
+    """Step the active rows in [start, stop) through `day`; returns (stepped, died)."""
+    c = population.columns
+    rows = np.flatnonzero((c['health'][start:stop] > 0) & (c['day'][start:stop] == day)) + start
+    games = []
+    with rules.installed():
+        for index, (state, cause) in zip(rows.tolist(), population.load(rows)):
+            games.append((state, rules.step(state, index) or cause))
+    population.store(rows, games)
+    return len(rows), sum(state['health'] <= 0 for state, _ in games)
+
+
+_worker = {}
+
+
+def _attach(spec, rules_args):
+    _worker['population'] = Population.attach(spec)
+    _worker['rules'] = Rules(*rules_args)
+
+
+def _step_slice(task):
+    start, stop, day = task
+    return step_rows(_worker['population'], _worker['rules'], start, stop, day)
+
+
+def slices(size, parts):
+    """Split rows 0..size-1 into `parts` contiguous (start, stop) slices."""
+    bounds = [size * i // parts for i in range(parts + 1)]
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+
+def run(population, rules, workers=None, chunk=None, progress=None):
+    """Play every row of a (reset) population to the end, `workers` processes at a time.
+
+    Each day is one round of `(start, stop, day)` tasks; the rows are split
+    into `chunk`-row slices (default: four per worker, to even out the load).
+    `progress(day, stepped, died)` is called after every round.
+    """
+    workers = workers or os.cpu_count()
+    parts = -(-population.size // chunk) if chunk else workers * 4
+    bounds = slices(population.size, parts)
+
+    def rounds(step):
+        for day in range(1, rules.max_days + 1):
+            counts = step([(lo, hi, day) for lo, hi in bounds])
+            stepped = sum(s for s, _ in counts)
+            if progress:
+                progress(day, stepped, sum(d for _, d in counts))
+            if not stepped:
+                break
+
+    if workers <= 1:
+        rounds(lambda tasks: [step_rows(population, rules, *task) for task in tasks])
+        return
+    with multiprocessing.Pool(workers, _attach, (population.spec, rules.args)) as pool:
+        rounds(lambda tasks: pool.map(_step_slice, tasks))
+
+
+def aggregate(population, rules):
+    """SimulationAggregator of the finished population, as if simulate() had played it."""
+    agg = SimulationAggregator(rules.max_days)
+    with rules.installed():
+        for index, (state, cause) in enumerate(population.load(np.arange(population.size))):
+            outcome = 'survived' if state['health'] > 0 else 'died'
+            seed = simulation.game_seed(rules.master_seed, rules.difficulty, index)
+            agg.add(survival.game_result(state, rules.difficulty, outcome, cause, seed, rules.max_days))
+    return agg
+
+
+# --- Batched night ---------------------------------------------------------
+_NIGHT_ARRAYS = {}  # content version -> survival.night_table() as arrays
+
+
+def night_arrays(compiled):
+    """A content version's night table as arrays indexed by season * 4 + shelter * 2 + fire.
+
+    Damage is stored as an inverse CDF (`damage` values, `cdf` thresholds,
+    padded to a common width) so a batch samples it with one uniform draw per row.
+    """
+    arrays = _NIGHT_ARRAYS.get(compiled.version)
+    if arrays is not None:
+        return arrays
+    table = survival.night_table(compiled)
+    keys = [(season, shelter, fire) for season in survival.SEASONS
+            for shelter in (False, True) for fire in (False, True)]
+    width = max(len(table[key].damage_pmf) for key in keys)
+    damage = np.zeros((len(keys), width), np.int16)
+    cdf = np.ones((len(keys), width))
+    for i, key in enumerate(keys):
+        pmf = table[key].damage_pmf
+        values = [value for value, _ in pmf]
+        damage[i] = values + values[-1:] * (width - len(pmf))
+        cdf[i, :len(pmf) - 1] = np.cumsum([p for _, p in pmf])[:-1]
+    arrays = {name: np.array([getattr(table[key], name) for key in keys], np.int16)
+              for name in ('temperature', 'heat_thirst', 'hunger', 'thirst', 'health',
+                           'hunger_penalty', 'thirst_penalty')}
+    arrays['damage'], arrays['cdf'] = damage, cdf
+    return _NIGHT_ARRAYS.setdefault(compiled.version, arrays)
+
+
+def apply_night_batch(population, rows, survived, rng, compiled=None):
+    """survival.apply_night_effects() for many rows at once, in place.
+
+    `survived` is the per-row survived_night flag and `rng` a numpy
+    Generator. The outcome distribution is the scalar function's; the random
+    stream is not, so single games differ from a scalar replay.
+    """
+    c = population.columns
+    rows = np.asarray(rows)
+    night = night_arrays(compiled or survival.CONTENT)
+    health = c['health'][rows].astype(np.int32)
+    hunger = c['hunger'][rows].astype(np.int32)
+    thirst = c['thirst'][rows].astype(np.int32)
+
+    # status effects tick first: poison 1d4, bleeding 1d3, fever +10 thirst
+    for name, sides in (('poison', 4), ('bleeding', 3), ('fever', 0)):
+        turns = c['effect_' + name][rows]
+        active = turns > 0
+        if sides:
+            health -= np.where(active, rng.integers(1, sides + 1, len(rows)), 0)
+        else:
+            thirst = np.where(active, np.minimum(100, thirst + 10), thirst)
+        c['effect_' + name][rows] = turns - active
+
+    key = c['season'][rows].astype(np.intp) * 4 + c['shelter'][rows] * 2 + c['fire'][rows]
+    c['temperature'][rows] = night['temperature'][key]
+    draw = (night['cdf'][key] <= rng.random(len(rows))[:, None]).sum(axis=1)
+    health -= night['damage'][key, draw]
+    thirst = np.minimum(100, thirst + night['heat_thirst'][key])
+    hunger = np.minimum(100, hunger + night['hunger'][key])
+    thirst = np.minimum(100, thirst + night['thirst'][key])
+    health += night['health'][key]
+    health -= np.where(hunger >= 80, night['hunger_penalty'][key], 0)
+    health -= np.where(thirst >= 80, night['thirst_penalty'][key], 0)
+    health -= np.where(np.asarray(survived, bool), 0, rng.integers(1, 5, len(rows)))
+
+    c['health'][rows] = np.clip(health, 0, 100)
+    c['hunger'][rows] = hunger
+    c['thirst'][rows] = thirst
+
+
+# --- Batched day actions ---------------------------------------------------
+# Action codes are indices into survival.ACTION_OPTIONS; trading needs the
+# merchant prompt and cannot be batched.
+BATCH_ACTIONS = tuple(code for code, name in enumerate(survival.ACTION_NAMES)
+                      if name not in ('trade', 'quit'))
+_A = {name: code for code, name in enumerate(survival.ACTION_NAMES)}
+_SCAVENGE_FINDS = ('food', 'water', 'cloth', 'bandages', 'knife', 'hatchet')
+
+
+def apply_actions_batch(population, rows, actions, rng, preset, compiled=None):
+    """survival.perform_action() for many rows at once, in place.
+
+    `actions[i]` is the action row `rows[i]` takes (one of BATCH_ACTIONS),
+    `rng` a numpy Generator and `preset` the difficulty preset (for its
+    player_roll_bonus). Rolls are drawn array-wide and every threshold
+    branch is a mask, so the outcome distribution is that of the scalar
+    action functions, stat growth and lost or found tools included; the
+    random stream is not. Returns perform_action()'s result per row.
+    """
+    compiled = compiled or survival.CONTENT
+    limits = compiled.thresholds
+    c = population.columns
+    rows = np.asarray(rows)
+    actions = np.asarray(actions)
+    unsupported = set(np.unique(actions).tolist()) - set(BATCH_ACTIONS)
+    if unsupported:
+        raise ValueError(f"Cannot batch action(s) {sorted(unsupported)}")
+    n = len(rows)
+    s = {name: c[name][rows].astype(np.int32) for name in COLUMNS}
+    bonus = int(preset.get('player_roll_bonus', 0))
+    check = rng.integers(1, 21, n) + bonus            # roll_check(1, 20)
+    failed = np.zeros(n, bool)
+
+    def dice(sides, mask):
+        return np.where(mask, rng.integers(1, sides + 1, n), 0)
+
+    def grade(action, roll):
+        mask = actions == _A[action]
+        success, partial = limits[action]['success'], limits[action].get('partial')
+        won = mask & (roll >= success)
+        if partial is None:
+            return won, mask & ~won
+        return won, mask & ~won & (roll >= partial), mask & (roll < partial)
+
+    def grow(stat, mask, chance):
+        s[stat] += mask & (rng.random(n) < chance) & (s[stat] < 10)
+
+    won, partial, lost = grade('forage', check)
+    s['food'] += dice(3, won) + partial
+    s['water'] += dice(2, won)
+    grow('endurance', won, 0.15)
+    s['health'] -= dice(6, lost)
+    failed |= lost
+
+    roll = check + s['knife'] * limits['hunt']['knife_bonus'] + s['strength']
+    won, partial, lost = grade('hunt', roll)
+    s['food'] += np.where(won, rng.integers(2, 6, n), 0) + partial
+    grow('strength', won, 0.2)
+    s['health'] -= dice(8, lost)
+    failed |= lost
+
+    won, partial, lost = grade('explore_river', check)
+    s['food'] += dice(3, won)
+    s['water'] += dice(3, won) + partial
+    grow('agility', won, 0.15)
+    s['health'] -= dice(8, lost)
+    s['knife'] &= ~(lost & (rng.random(n) < limits['explore_river']['knife_loss_chance']))
+    failed |= lost
+
+    roll = check + s['hatchet'] * limits['scavenge_ruins']['hatchet_bonus']
+    won, partial, lost = grade('scavenge_ruins', roll)
+    found = rng.integers(0, len(_SCAVENGE_FINDS), n)
+    qty = rng.integers(1, 4, n)
+    for i, name in enumerate(_SCAVENGE_FINDS):
+        hit = won & (found == i)
+        if name in ('knife', 'hatchet'):
+            s[name] |= hit
+        else:
+            s[name] += np.where(hit, qty if name in ('food', 'water') else 1, 0)
+    s['food'] += partial
+    s['health'] -= dice(10, lost)
+    s['infection'] |= lost & (rng.random(n) < limits['scavenge_ruins']['infection_chance'])
+    failed |= lost
+
+    mask = actions == _A['rest']
+    heal = dice(6, mask) + np.where(mask, s['endurance'] // 2, 0)
+    s['health'] = np.where(mask, np.minimum(100, s['health'] + heal), s['health'])
+    grow('endurance', mask, 0.1)
+
+    for action, stock, need in (('eat', 'food', 'hunger'), ('drink', 'water', 'thirst')):
+        mask = (actions == _A[action]) & (s[stock] > 0)
+        s[stock] -= mask
+        s[need] = np.where(mask, np.maximum(0, s[need] - limits[action]['relief']), s[need])
+
+    season_mod = np.array([compiled.fire_season_mod[name] for name in survival.SEASONS])
+    roll = (check + s['hatchet'] * limits['make_fire']['hatchet_bonus']
+            + season_mod[s['season']])
+    won, lost = grade('make_fire', roll)
+    s['fire'] = np.where(won, 1, np.where(lost, 0, s['fire']))
+    s['temperature'] = np.where(won, np.maximum(s['temperature'], 5), s['temperature'])
+    s['food'] += won & (s['food'] > 0) & (rng.random(n) < 0.3)
+
+    won, _ = grade('set_trap', np.where(s['trap_set'] > 0, 0, check))
+    s['trap_set'] |= won
+
+    roll = rng.integers(1, 21, n) + limits['build_shelter']['bonus']     # roll_dice, no bonus
+    won, _ = grade('build_shelter', roll)
+    s['shelter'] |= won
+
+    mask = actions == _A['craft_bandage']
+    cloth = mask & (s['cloth'] > 0)
+    won, _ = grade('craft_bandage', check)
+    s['cloth'] -= cloth
+    s['bandages'] += cloth | (won & ~cloth)
+
+    mask = (actions == _A['use_bandage']) & (s['bandages'] > 0)
+    s['bandages'] -= mask
+    s['health'] = np.where(mask, np.minimum(100, s['health'] + 8), s['health'])
+    for name in ('effect_bleeding', 'effect_infection', 'infection'):
+        s[name] = np.where(mask, 0, s[name])
+
+    for name, values in s.items():
+        c[name][rows] = values
+    return ~failed | (s['health'] > 0)
+
+
+def _random_states(population, rng):
+    """Fill a population with varied mid-game states (for verify_actions)."""
+    c = population.columns
+    n = population.size
+    for name, low, high in (('health', 1, 101), ('hunger', 0, 101), ('thirst', 0, 101),
+                            ('food', 0, 4), ('water', 0, 4), ('cloth', 0, 3), ('bandages', 0, 3),
+                            ('gold', 0, 30), ('strength', 1, 11), ('agility', 1, 11),
+                            ('endurance', 1, 11), ('temperature', -20, 40), ('day', 1, 21),
+                            ('season', 0, len(survival.SEASONS))):
+        c[name][:] = rng.integers(low, high, n)
+    for name in FLAGS + ITEMS:
+        c[name][:] = rng.random(n) < 0.3
+    for name in EFFECTS:
+        c['effect_' + name][:] = rng.integers(1, 4, n) * (rng.random(n) < 0.2)
+    c['cause'][:] = 0
+
+
+def _homogeneity_z(a, b):
+    # chi-square test that two equal-size samples share a distribution;
+    # values seen fewer than 10 times in total are pooled into one bin
+    values, inverse = np.unique(np.concatenate([a, b]), return_inverse=True)
+    counts = np.zeros((2, len(values)))
+    np.add.at(counts, (np.repeat([0, 1], len(a)), inverse), 1)
+    rare = counts.sum(axis=0) < 10
+    counts = np.column_stack([counts[:, ~rare], counts[:, rare].sum(axis=1)])
+    counts = counts[:, counts.sum(axis=0) > 0]
+    k = counts.shape[1] - 1
+    if k < 1:
+        return 0.0
+    chi2 = ((counts[0] - counts[1]) ** 2 / counts.sum(axis=0)).sum()
+    return ((chi2 / k) ** (1 / 3) - (1 - 2 / (9 * k))) / np.sqrt(2 / (9 * k))
+
+
+def verify_actions(games=20000, difficulty='Normal', seed=0, threshold=5.0):
+    """Compare apply_actions_batch() with the scalar action functions.
+
+    For every batchable action, `games` random states are resolved both ways
+    and the distribution of every column afterwards is compared with a
+    chi-square test of homogeneity, expressed as a z score (Wilson-Hilferty).
+    Returns [(action, column, scalar mean, batch mean, z)] for every column
+    whose z exceeds `threshold` (empty if they all agree).
+    """
+    rules = Rules(difficulty, seed)
+    rng = np.random.default_rng(random.Random(f"{seed}:verify").getrandbits(64))
+    mismatches = []
+    with Population.create(games) as scalar, Population.create(games) as batch:
+        rows = np.arange(games)
+        for code in BATCH_ACTIONS:
+            _random_states(scalar, np.random.default_rng([code, games]))
+            _random_states(batch, np.random.default_rng([code, games]))
+            played = scalar.load(rows)
+            random.seed(f"{seed}:verify:{code}")
+            with rules.installed():
+                ok = np.array([survival.perform_action(state, code) for state, _ in played])
+            scalar.store(rows, played)
+            batch_ok = apply_actions_batch(batch, rows, np.full(games, code), rng, rules.preset,
+                                           rules.content)
+            pairs = [(name, scalar.columns[name], batch.columns[name]) for name in COLUMNS]
+            pairs.append(('result', ok, batch_ok))
+            for name, a, b in pairs:
+                z = _homogeneity_z(a, b)
+                if z > threshold:
+                    mismatches.append((survival.ACTION_NAMES[code], name, a.mean(), b.mean(), z))
+    return mismatches
+
+
+# --- Pickling baseline -----------------------------------------------------
+def _step_states(task):
+    # the same step, but with the states themselves crossing the process boundary
+    day, games = task
+    rules = _worker['rules']
+    stepped = []
+    with rules.installed():
+        for index, state, cause in games:
+            if state['health'] > 0 and state['day'] == day:
+                cause = rules.step(state, index) or cause
+            stepped.append((index, state, cause))
+    return stepped
+
+
+def _attach_rules(rules_args):
+    _worker['rules'] = Rules(*rules_args)
+
+
+def run_pickled(size, rules, workers=None, chunk=None):
+    """Play `size` games the way run() does but keep the states as dicts and send
+    them to the workers and back every day. Returns [(state, cause)], for comparison.
+    """
+    workers = workers or os.cpu_count()
+    parts = -(-size // chunk) if chunk else workers * 4
+    games = [(index, survival.new_game_state(rules.preset), None) for index in range(size)]
+    with multiprocessing.Pool(workers, _attach_rules, (rules.args,)) as pool:
+        for day in range(1, rules.max_days + 1):
+            tasks = [(day, games[lo:hi]) for lo, hi in slices(size, parts)]
+            games = [game for part in pool.map(_step_states, tasks) for game in part]
+    return [(state, cause) for _, state, cause in games]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step a large population of games in shared memory.")
+    parser.add_argument('--games', type=int, default=100000, help="population size")
+    parser.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    parser.add_argument('--policy', default='heuristic', choices=list(simulation.POLICIES))
+    parser.add_argument('--seed', default=0, help="master seed")
+    parser.add_argument('--days', type=int, default=None, help="game length (default: MAX_DAYS)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--chunk', type=int, help="rows per task (default: four tasks per worker)")
+    parser.add_argument('--compare', action='store_true',
+                        help="also run the same games sending state dicts to the workers, "
+                             "check the results match and compare the times")
+    parser.add_argument('--verify-actions', action='store_true',
+                        help="check the batched day actions against the scalar ones and exit")
+    parser.add_argument('--quiet', action='store_true', help="no per-day progress")
+    args = parser.parse_args(argv)
+
+    if args.verify_actions:
+        mismatches = verify_actions(args.games, args.difficulty, args.seed)
+        for action, column, scalar, batch, z in mismatches:
+            print(f"{action:<15} {column:<16} scalar mean {scalar:8.3f}  batch mean {batch:8.3f}  z {z:5.1f}")
+        print(f"{len(BATCH_ACTIONS)} actions x {args.games} states: "
+              f"{len(mismatches) or 'no'} column distributions differ")
+        raise SystemExit(1 if mismatches else 0)
+
+    try:
+        rules = Rules(args.difficulty, args.seed, args.policy, args.days)
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+
+    def progress(day, stepped, died):
+        if not args.quiet:
+            print(f"day {day:3}: {stepped} games stepped, {died} died")
+
+    with Population.create(args.games) as population:
+        population.reset(rules.preset)
+        start, cpu = time.perf_counter(), time.process_time()
+        run(population, rules, args.workers, args.chunk, progress)
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+        spec = {'difficulty': rules.difficulty, 'policy': rules.policy_name,
+                'master_seed': rules.master_seed, 'max_days': rules.max_days}
+        print(shards.format_report(spec, aggregate(population, rules)))
+        print(f"\nshared memory: {args.games} games in {elapsed:.2f}s "
+              f"({args.games / elapsed:.0f} games/s), {cpu:.2f}s CPU in this process")
+
+        if args.compare:
+            start, cpu = time.perf_counter(), time.process_time()
+            games = run_pickled(args.games, rules, args.workers, args.chunk)
+            pickled, cpu = time.perf_counter() - start, time.process_time() - cpu
+            loaded = population.load(np.arange(args.games))
+            mismatched = sum(mine != theirs for mine, theirs in zip(loaded, games))
+            print(f"pickled dicts: {args.games} games in {pickled:.2f}s "
+                  f"({args.games / pickled:.0f} games/s), {cpu:.2f}s CPU in this process; "
+                  f"{mismatched} games differ")
+
+
+if __name__ == "__main__":
+    main()
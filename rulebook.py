@@ -0,0 +1,402 @@
+"""Bot and autopilot rules in a small rule language, compiled once into closures.
+
+A rule file is a list of rules, one per line (or separated by ';'), in
+sections named after the prompt they answer:
+
+    [actions]                 # the default section: the daytime action menu
+    if thirst > 60 and water > 0 then drink
+    if season is Winter and not fire then make fire
+    if bandages > 0 and (bleeding or infection) then use bandage
+    forage                    # a rule without a condition always matches
+    [combat]
+    if health < 30 then flee
+    [bandit]
+    if gold >= 18 then pay
+    [shop]
+    if gold >= 2 and water < 2 then buy water
+
+Rules are tried top to bottom and the first one that matches decides.
+Conditions combine with `and`, `or`, `not` and parentheses over:
+
+    NUMBER op 12 / NUMBER op NUMBER   op is one of < <= > >= == !=
+    season is [not] Summer|Fall|Winter|Spring
+    FLAG                              true when set (items and status effects too)
+
+The choices of each section are the keys of CHOICES; a daytime action can
+also be named by its input macro (`fire`, `river`...). Unknown fields,
+seasons and choices, conditions of the wrong type and rules that can never
+match are reported with their line when the file is loaded. Each section
+compiles into one closure over nested condition closures, so no rule text is
+looked at again: a ROUTINE decision takes about 2 us, against 0.5 us for the
+hand-written routine_action() (`python bench.py rules`).
+
+RulePolicy plays a rule set in simulations; where no rule of a section
+matches it falls back to HeuristicPolicy. `game` starts the interactive
+game with the file's [actions] rules driving the autopilot (through
+survival.AUTOPILOT_POLICY).
+
+    python rulebook.py check bot.rules
+    python rulebook.py play bot.rules --difficulty Hard --games 2000 --workers 4
+    python rulebook.py game bot.rules
+"""
+import argparse
+import functools
+import os
+import re
+import time
+
+import simulation
+import survival
+
+NUMBERS = ('health', 'hunger', 'thirst', 'food', 'water', 'gold', 'day', 'temperature',
+           'bandages', 'cloth', 'strength', 'agility', 'endurance')
+FLAGS = ('shelter', 'fire', 'infection', 'merchant_hostile', 'knife', 'hatchet', 'trap_set')
+EFFECTS = ('poison', 'bleeding', 'fever')
+# Section -> {choice name: option index}; 'actions' indices are into ACTION_OPTIONS,
+# the others into the options of the combat, bandit and merchant prompts
+CHOICES = {
+    'actions': {
+        **{name: i for i, name in enumerate(survival.ACTION_NAMES[:survival.QUIT_ACTION])},
+        **{word: int(n) - 1 for word, n in survival.INPUT_MACROS.items()
+           if int(n) - 1 < survival.QUIT_ACTION},
+    },
+    'combat': {'attack': 0, 'flee': 1},
+    'bandit': {'fight': 0, 'pay': 1, 'flee': 2},
+    'shop': {'buy_bandage': 0, 'buy_water': 1, 'sell_cloth': 2, 'leave': 3},
+}
+
+# The built-in routine (survival.routine_action and HeuristicPolicy's answers) as rules
+ROUTINE = """\
+[actions]
+if bandages > 0 and (infection or bleeding or health < 40) then use bandage
+if thirst >= 50 and water > 0 then drink
+if hunger >= 50 and food > 0 then eat
+if not fire and (season is Fall or season is Winter) then make fire
+if not shelter then build shelter
+if health < 50 then rest
+if water < 2 then explore river
+forage
+[combat]
+if health < 30 then flee
+attack
+[bandit]
+if health >= 60 then fight
+pay
+[shop]
+if gold >= 2 and water < 2 then buy water
+if gold >= 5 then buy bandage
+leave
+"""
+
+_TOKEN = re.compile(r'\s*(?:(-?\d+)|([A-Za-z_][\w-]*)|(<=|>=|==|!=|<|>|\(|\)))')
+_SEASONS = {season.lower(): season for season in survival.SEASONS}
+
+# Comparison closures: field against a constant, field against a field
+_COMPARE = {
+    '<': lambda a, b: lambda s: s.get(a, 0) < b,
+    '<=': lambda a, b: lambda s: s.get(a, 0) <= b,
+    '>': lambda a, b: lambda s: s.get(a, 0) > b,
+    '>=': lambda a, b: lambda s: s.get(a, 0) >= b,
+    '==': lambda a, b: lambda s: s.get(a, 0) == b,
+    '!=': lambda a, b: lambda s: s.get(a, 0) != b,
+}
+_COMPARE_FIELDS = {
+    '<': lambda a, b: lambda s: s.get(a, 0) < s.get(b, 0),
+    '<=': lambda a, b: lambda s: s.get(a, 0) <= s.get(b, 0),
+    '>': lambda a, b: lambda s: s.get(a, 0) > s.get(b, 0),
+    '>=': lambda a, b: lambda s: s.get(a, 0) >= s.get(b, 0),
+    '==': lambda a, b: lambda s: s.get(a, 0) == s.get(b, 0),
+    '!=': lambda a, b: lambda s: s.get(a, 0) != s.get(b, 0),
+}
+
+
+class RuleError(ValueError):
+    """A rule that does not parse or names an unknown field, season or choice."""
+
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"unexpected '{text[pos:].strip()}'")
+        number, word, symbol = match.groups()
+        if number is not None:
+            tokens.append(int(number))
+        else:
+            tokens.append(word.lower() if word else symbol)
+        pos = match.end()
+    return tokens
+
+
+def _flag(name):
+    if name in EFFECTS:
+        return lambda s: name in (s.get('status_effects') or ())
+    return lambda s: s.get(name)
+
+
+def _both(a, b):
+    return lambda s: a(s) and b(s)
+
+
+def _either(a, b):
+    return lambda s: a(s) or b(s)
+
+
+def _negate(a):
+    return lambda s: not a(s)
+
+
+class _Condition:
+    """Recursive-descent parser of one condition that returns its compiled closure."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, what='more', exact=None):
+        token = self.peek()
+        if token is None:
+            raise ValueError(f"condition ends early, expected {what}")
+        if exact is not None and token != exact:
+            raise ValueError(f"expected '{exact}', got '{token}'")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        test = self.either()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected '{self.peek()}'")
+        return test
+
+    def either(self):
+        test = self.both()
+        while self.peek() == 'or':
+            self.take()
+            test = _either(test, self.both())
+        return test
+
+    def both(self):
+        test = self.factor()
+        while self.peek() == 'and':
+            self.take()
+            test = _both(test, self.factor())
+        return test
+
+    def factor(self):
+        token = self.take('a condition')
+        if token == 'not':
+            return _negate(self.factor())
+        if token == '(':
+            test = self.either()
+            self.take("')'", ')')
+            return test
+        if token == 'season':
+            self.take("'is'", 'is')
+            negate = self.peek() == 'not'
+            if negate:
+                self.take()
+            name = self.take('a season')
+            season = _SEASONS.get(name) if isinstance(name, str) else None
+            if season is None:
+                raise ValueError(f"unknown season '{name}' (seasons: {', '.join(survival.SEASONS)})")
+            return (lambda s: s.get('season') != season) if negate else (lambda s: s.get('season') == season)
+        if token in NUMBERS:
+            op = self.take('a comparison')
+            if op not in _COMPARE:
+                raise ValueError(f"{token} must be compared, e.g. '{token} > 0'")
+            value = self.take('a number or field')
+            if isinstance(value, int):
+                return _COMPARE[op](token, value)
+            if value in NUMBERS:
+                return _COMPARE_FIELDS[op](token, value)
+            raise ValueError(f"cannot compare {token} with '{value}'")
+        if token in FLAGS or token in EFFECTS:
+            if self.peek() in _COMPARE:
+                raise ValueError(f"{token} is a flag: write '{token}' or 'not {token}'")
+            return _flag(token)
+        raise ValueError(f"unknown field '{token}'")
+
+
+def _decider(tests, default):
+    """One closure that returns the choice of the first matching rule, else `default`."""
+    tests = tuple(tests)
+
+    def decide(state):
+        for test, choice in tests:
+            if test(state):
+                return choice
+        return default
+    return decide
+
+
+class RuleSet:
+    """A rule file parsed, validated and compiled: one decision closure per section.
+
+    `deciders[section](state)` returns the option index the rules choose,
+    or None when no rule matches; `action` is the 'actions' decider.
+    """
+
+    def __init__(self, text, name='<rules>'):
+        self.text = text
+        self.name = name
+        self.rules = {section: [] for section in CHOICES}   # section -> [(line, choice name)]
+        tests = {section: [] for section in CHOICES}
+        defaults = {}
+        section = 'actions'
+        for lineno, line in enumerate(text.splitlines(), 1):
+            for statement in line.split('#', 1)[0].split(';'):
+                statement = statement.strip()
+                if not statement:
+                    continue
+                try:
+                    header = re.fullmatch(r'\[\s*(\w+)\s*\]', statement)
+                    if header:
+                        section = header.group(1).lower()
+                        if section not in CHOICES:
+                            raise ValueError(f"unknown section [{section}] (sections: {', '.join(CHOICES)})")
+                        continue
+                    if section in defaults:
+                        raise ValueError(f"unreachable: the rule on line {defaults[section][0]} "
+                                         f"always matches")
+                    test, choice = self._rule(_tokenize(statement), section)
+                except ValueError as e:
+                    raise RuleError(f"{name}:{lineno}: {e}") from None
+                self.rules[section].append((lineno, choice))
+                index = CHOICES[section][choice]
+                if test is None:
+                    defaults[section] = (lineno, index)
+                else:
+                    tests[section].append((test, index))
+        self.deciders = {s: _decider(tests[s], defaults.get(s, (None, None))[1]) for s in CHOICES}
+        self.action = self.deciders['actions']
+
+    @staticmethod
+    def _rule(tokens, section):
+        if tokens[0] == 'if':
+            if 'then' not in tokens:
+                raise ValueError("'if' without 'then'")
+            then = tokens.index('then')
+            if then == 1:
+                raise ValueError("'if' without a condition")
+            test = _Condition(tokens[1:then]).parse()
+            tokens = tokens[then + 1:]
+        elif 'then' in tokens:
+            raise ValueError("'then' without 'if'")
+        else:
+            test = None
+        if not tokens or not all(isinstance(t, str) and re.fullmatch(r'[a-z][\w-]*', t) for t in tokens):
+            raise ValueError(f"expected a choice for [{section}]: {', '.join(CHOICES[section])}")
+        choice = '_'.join(tokens).replace('-', '_')
+        if choice not in CHOICES[section]:
+            raise ValueError(f"unknown choice '{choice.replace('_', ' ')}' for [{section}] "
+                             f"(choices: {', '.join(CHOICES[section])})")
+        return test, choice
+
+    def __reduce__(self):
+        # closures don't pickle: ship the source and compile again on arrival
+        return RuleSet, (self.text, self.name)
+
+    def option(self, state, kind):
+        """Option index the rules choose at a prompt_kind() prompt, or None."""
+        decide = self.deciders.get(kind)
+        return None if decide is None else decide(state)
+
+
+def load(path):
+    """RuleSet from a rule file; RuleError if it cannot be read or is invalid."""
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError as e:
+        raise RuleError(f"cannot read {path}: {e.strerror}") from None
+    return RuleSet(text, os.path.basename(path))
+
+
+class RulePolicy(simulation.HeuristicPolicy):
+    """Plays a RuleSet (ROUTINE by default); where no rule matches, plays the heuristic."""
+    name = 'rules'
+
+    def __init__(self, rules=None, flee_below=30):
+        super().__init__(flee_below)
+        self.rules = rules if isinstance(rules, RuleSet) else RuleSet(rules or ROUTINE)
+        self._action = self.rules.action
+        self._options = self.rules.deciders
+
+    def choose_action(self, state):
+        choice = self._action(state)
+        return super().choose_action(state) if choice is None else choice
+
+    def choose_option(self, state, kind, options):
+        decide = self._options.get(kind)
+        choice = None if decide is None else decide(state)
+        return super().choose_option(state, kind, options) if choice is None else choice
+
+
+def sample_states(difficulty='Normal', games=100, master_seed=0):
+    """States met at the action menu in `games` heuristic games, to time decisions on."""
+    states = []
+
+    class Recorder(simulation.HeuristicPolicy):
+        def choose_action(self, state):
+            states.append(dict(state, status_effects=dict(state.get('status_effects') or {})))
+            return super().choose_action(state)
+
+    simulation.simulate_range(difficulty, 0, games, master_seed, Recorder)
+    return states
+
+
+def throughput(decide, states, repeat=5):
+    """Best-of-`repeat` seconds per call of decide(state) over `states`."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for state in states:
+            decide(state)
+        best = min(best, time.perf_counter() - start)
+    return best / len(states)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or play a bot rule file.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    check = sub.add_parser('check', help="parse and validate a rule file")
+    check.add_argument('path')
+    play = sub.add_parser('play', help="simulate games played by a rule file")
+    play.add_argument('path', nargs='?', help="rule file (default: the built-in ROUTINE)")
+    play.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    play.add_argument('--games', type=int, default=1000)
+    play.add_argument('--seed', default=0, help="master seed")
+    play.add_argument('--workers', type=int, default=1)
+    game = sub.add_parser('game', help="play the game with the rule file as the autopilot")
+    game.add_argument('path')
+    args = parser.parse_args(argv)
+
+    try:
+        rules = load(args.path) if args.path else RuleSet(ROUTINE, 'ROUTINE')
+    except RuleError as e:
+        raise SystemExit(f"invalid: {e}")
+    counts = ", ".join(f"{len(rules.rules[s])} {s}" for s in CHOICES)
+    if args.cmd == 'check':
+        print(f"ok: {counts} rules")
+        return
+    if args.cmd == 'game':
+        survival.AUTOPILOT_POLICY = rules.action
+        survival.main_menu()
+        return
+    start = time.perf_counter()
+    agg = simulation.simulate(args.difficulty, args.games, args.seed, workers=args.workers,
+                              policy_factory=functools.partial(RulePolicy, rules))
+    summary = agg.summary()
+    rate, (lo, hi) = summary['survival_rate']
+    print(f"{rules.name} ({counts} rules) on {args.difficulty}: survival {rate:.1%} "
+          f"[{lo:.1%}, {hi:.1%}], mean days {summary['means']['days_survived']:.2f} "
+          f"({agg.games} games in {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
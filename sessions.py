@@ -0,0 +1,394 @@
+"""In-process game sessions for a long-lived server, with LRU paging to disk.
+
+Each GameSession runs `survival.main()` in its own thread. The game still
+just calls print()/input(): sys.stdout and sys.stdin are replaced by proxies
+that route reads and writes to the session owning the current thread (other
+threads fall through to the real streams). Only one session runs game code at
+a time (the "baton"), and each session keeps its own RNG state and difficulty
+preset, swapped in whenever it resumes, so sessions are independent and
+deterministic.
+
+A game's position inside main() (day, actions left, a pending combat
+prompt...) lives on a thread stack and cannot be pickled, but it is fully
+determined by the seed, difficulty and the lines typed so far. SessionStore
+therefore evicts a cold session by writing just that (plus a state snapshot
+used to verify the replay) to a small compressed file, and pages it back in by
+replaying the input log with output discarded.
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+
+import content
+import survival
+from stats import QuantileSketch
+
+# Rough cost of a live session beyond its data: thread stack, frames, queues
+SESSION_OVERHEAD = 64 * 1024
+
+_BATON = threading.Lock()
+_current = threading.local()
+_install_lock = threading.Lock()
+
+
+class SessionClosed(BaseException):
+    """Raised inside a session thread to unwind it (BaseException so the
+    game's own `except Exception` recovery blocks don't swallow it)."""
+
+
+class _RoutedStream:
+    """Process-wide stdin/stdout stand-in that routes session threads' I/O."""
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+
+    def write(self, s):
+        session = getattr(_current, 'session', None)
+        if session is None:
+            return self._fallback.write(s)
+        return session._write(s)
+
+    def readline(self, *args):
+        session = getattr(_current, 'session', None)
+        if session is None:
+            return self._fallback.readline(*args)
+        return session._readline()
+
+    def flush(self):
+        if getattr(_current, 'session', None) is None:
+            self._fallback.flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._fallback, name)
+
+
+def install_routing():
+    """Route print()/input() per session thread (idempotent)."""
+    with _install_lock:
+        if not isinstance(sys.stdout, _RoutedStream):
+            sys.stdout = _RoutedStream(sys.stdout)
+        if not isinstance(sys.stdin, _RoutedStream):
+            sys.stdin = _RoutedStream(sys.stdin)
+
+
+class GameSession:
+    """One interactive game driven by send() instead of a terminal.
+
+    The constructor runs the game up to its first prompt; `output()` returns
+    what it printed. `send(line)` feeds one line of input and returns the
+    output produced until the next prompt (or the end of the game).
+    """
+
+    def __init__(self, difficulty='Normal', seed=None, session_id=None, echo=None, content_version=None):
+        install_routing()
+        self.id = session_id or os.urandom(8).hex()
+        self.difficulty = difficulty
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.inputs = []
+        self.state = None
+        self.finished = False
+        self.result = None
+        self.last_output = ''
+        self.last_active = time.monotonic()
+        self.echo = echo            # optional callable(text) fed every output chunk
+        # content tables this game is pinned to (None: newest, fixed at game start)
+        self._content = None if content_version is None else content.get(content_version)
+        self._out = []
+        self._inbox = queue.Queue()
+        self._events = queue.Queue()
+        self._rng_state = None
+        self._saved = None
+        self._type_ahead = deque()
+        self._advisor = None        # this game's survival.ADVISOR while it is swapped out
+        self._replaying = False
+        self._preset = survival.DIFFICULTY_PRESETS.get(difficulty, survival.DIFFICULTY_PRESETS['Normal'])
+        self._thread = threading.Thread(target=self._run, name=f"game-{self.id}", daemon=True)
+        self._thread.start()
+        self._events.get()
+
+    # -- game thread side -----------------------------------------------------
+    def _run(self):
+        _current.session = self
+        _BATON.acquire()
+        self._enter()
+        try:
+            survival.main(self.difficulty, seed=self.seed,
+                          content_version=self._content and self._content.version)
+        except (SystemExit, SessionClosed):
+            pass
+        except Exception as e:
+            self._write(f"Session error: {e}\n")
+        finally:
+            self.finished = True
+            self._leave()
+            _BATON.release()
+            self._events.put('done')
+
+    def _enter(self):
+        """Swap this session's globals (hooks, difficulty, content version,
+        type-ahead queue, advisor, RNG) in; called with the baton held."""
+        self._saved = (survival.GAME_START_HOOK, survival.GAME_OVER_HOOK, survival.CHOICE_HOOK,
+                       survival.CURRENT_DIFFICULTY, survival.CONTENT, survival.TYPE_AHEAD,
+                       survival.ADVISOR, survival.REPLAYING, random.getstate())
+        survival.TYPE_AHEAD = self._type_ahead
+        survival.ADVISOR = self._advisor
+        survival.REPLAYING = self._replaying
+        survival.GAME_START_HOOK = self._bind_state
+        survival.GAME_OVER_HOOK = self._finish
+        survival.CHOICE_HOOK = None
+        survival.CURRENT_DIFFICULTY = self._preset
+        if self._content is not None:
+            survival.CONTENT = self._content
+        if self._rng_state is not None:
+            random.setstate(self._rng_state)
+
+    def _leave(self):
+        """Save this session's globals and put the host's back."""
+        self._rng_state = random.getstate()
+        self._preset = survival.CURRENT_DIFFICULTY
+        self._content = survival.CONTENT
+        self._advisor = survival.ADVISOR
+        (survival.GAME_START_HOOK, survival.GAME_OVER_HOOK, survival.CHOICE_HOOK,
+         survival.CURRENT_DIFFICULTY, survival.CONTENT, survival.TYPE_AHEAD,
+         survival.ADVISOR, survival.REPLAYING, host_rng) = self._saved
+        random.setstate(host_rng)
+
+    def _bind_state(self, state):
+        self.state = state
+
+    def _finish(self, result):
+        self.result = result
+        outer = self._saved[1]
+        if outer is not None:
+            outer(result)
+
+    def _write(self, s):
+        self._out.append(s)
+        if self.echo is not None:
+            self.echo(s)
+        return len(s)
+
+    def _readline(self):
+        self._leave()
+        _BATON.release()
+        self._events.put('prompt')
+        line = self._inbox.get()
+        _BATON.acquire()
+        self._enter()
+        if line is None:
+            raise SessionClosed()
+        self.inputs.append(line)
+        return line + '\n'
+
+    # -- caller side --------------------------------------------------------------
+    def output(self):
+        """Return and clear output printed since the last call."""
+        text = ''.join(self._out)
+        self._out.clear()
+        if text:
+            self.last_output = text
+        return text
+
+    @property
+    def prompt(self):
+        """The prompt the player is currently looking at (e.g. '> ')."""
+        return self.last_output.rsplit('\n', 1)[-1]
+
+    def send(self, line):
+        if self.finished:
+            raise RuntimeError(f"Session {self.id} has finished")
+        self.last_active = time.monotonic()
+        self._inbox.put(line.rstrip('\n'))
+        self._events.get()
+        return self.output()
+
+    def close(self):
+        """Stop the game thread without finishing the game."""
+        if not self.finished:
+            self._inbox.put(None)
+            self._events.get()
+        self._thread.join()
+
+    def estimated_size(self):
+        """Approximate bytes held by this live session."""
+        size = SESSION_OVERHEAD + sum(len(s) + 49 for s in self._out)
+        size += sum(len(s) + 49 for s in self.inputs) + 56 + 8 * len(self.inputs)
+        if self.state is not None:
+            size += sys.getsizeof(self.state) + 64 * len(self.state)
+        return size
+
+    # -- paging -------------------------------------------------------------------
+    def snapshot(self):
+        """Compact, JSON-able description sufficient to rebuild this session."""
+        return {
+            'v': 1,
+            'id': self.id,
+            'difficulty': self.difficulty,
+            'seed': self.seed,
+            'content': self._content.version,
+            'inputs': list(self.inputs),
+            'state': self.state,
+            'last_output': self.last_output,
+        }
+
+    @classmethod
+    def restore(cls, snap):
+        """Rebuild a session by replaying its input log; output is discarded
+        and no advice is computed."""
+        session = cls(snap['difficulty'], snap['seed'], snap['id'], content_version=snap.get('content'))
+        session._replaying = True
+        for line in snap['inputs']:
+            session.send(line)
+        session._replaying = False
+        session.output()
+        if snap.get('state') is not None and session.state != snap['state']:
+            raise RuntimeError(f"Replay of session {session.id} diverged from its snapshot")
+        session.last_output = snap.get('last_output', '')
+        return session
+
+
+class SessionStore:
+    """Keeps hot sessions live within `memory_budget` bytes; pages cold ones to `directory`."""
+
+    def __init__(self, directory, memory_budget=64 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self._live = OrderedDict()     # id -> GameSession, least recently used first
+        self._paged = set()
+        self.evictions = 0
+        self.reloads = 0
+        self.evict_latency = QuantileSketch()
+        self.reload_latency = QuantileSketch()
+
+    def _path(self, session_id):
+        return os.path.join(self.directory, f"{session_id}.session")
+
+    def create(self, difficulty='Normal', seed=None):
+        """Start a new game. Returns (session_id, opening output)."""
+        session = GameSession(difficulty, seed)
+        self._live[session.id] = session
+        self._enforce_budget(keep=session.id)
+        return session.id, session.output()
+
+    def send(self, session_id, line):
+        """Feed a line to a session (paging it in if needed) and return its output."""
+        session = self._get(session_id)
+        out = session.send(line)
+        if session.finished:
+            self.discard(session_id)
+        else:
+            self._enforce_budget(keep=session_id)
+        return out
+
+    def discard(self, session_id):
+        session = self._live.pop(session_id, None)
+        if session is not None:
+            session.close()
+        if session_id in self._paged:
+            self._paged.discard(session_id)
+            os.remove(self._path(session_id))
+
+    def _get(self, session_id):
+        session = self._live.get(session_id)
+        if session is not None:
+            self._live.move_to_end(session_id)
+            return session
+        if session_id not in self._paged:
+            raise KeyError(session_id)
+        start = time.perf_counter()
+        with open(self._path(session_id), 'rb') as f:
+            snap = json.loads(zlib.decompress(f.read()))
+        session = GameSession.restore(snap)
+        os.remove(self._path(session_id))
+        self._paged.discard(session_id)
+        self._live[session_id] = session
+        self.reloads += 1
+        self.reload_latency.add(time.perf_counter() - start)
+        return session
+
+    def evict(self, session_id):
+        """Write a live session to disk and stop its thread."""
+        start = time.perf_counter()
+        session = self._live.pop(session_id)
+        data = zlib.compress(json.dumps(session.snapshot(), separators=(',', ':')).encode(), 6)
+        tmp = self._path(session_id) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self._path(session_id))
+        session.close()
+        self._paged.add(session_id)
+        self.evictions += 1
+        self.evict_latency.add(time.perf_counter() - start)
+
+    def live_bytes(self):
+        return sum(s.estimated_size() for s in self._live.values())
+
+    def _enforce_budget(self, keep=None):
+        used = self.live_bytes()
+        for session_id in list(self._live):
+            if used <= self.memory_budget:
+                break
+            if session_id == keep:
+                continue
+            used -= self._live[session_id].estimated_size()
+            self.evict(session_id)
+
+    def metrics(self):
+        def ms(sketch, q):
+            v = sketch.quantile(q)
+            return None if v is None else v * 1000
+        return {
+            'live': len(self._live),
+            'paged': len(self._paged),
+            'live_bytes': self.live_bytes(),
+            'evictions': self.evictions,
+            'reloads': self.reloads,
+            'evict_ms_p50': ms(self.evict_latency, 0.5),
+            'evict_ms_p99': ms(self.evict_latency, 0.99),
+            'reload_ms_p50': ms(self.reload_latency, 0.5),
+            'reload_ms_p99': ms(self.reload_latency, 0.99),
+        }
+
+    def close(self):
+        """Stop all live threads; paged sessions stay on disk."""
+        for session in self._live.values():
+            session.close()
+        self._live.clear()
+
+
+def _demo(args):
+    """Drive many sessions with random menu input under a budget and print metrics."""
+    rng = random.Random(args.seed)
+    store = SessionStore(args.dir, args.budget * 1024)
+    ids = [store.create(args.difficulty)[0] for _ in range(args.sessions)]
+    for _ in range(args.inputs):
+        if not ids:
+            break
+        sid = rng.choice(ids)
+        store.send(sid, str(rng.randint(1, 13)))
+        if sid not in store._live and sid not in store._paged:
+            ids.remove(sid)
+    print(json.dumps(store.metrics(), indent=2), file=sys.__stdout__)
+    store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exercise the session pager with random players.")
+    parser.add_argument('--dir', default='sessions')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--inputs', type=int, default=5000)
+    parser.add_argument('--budget', type=int, default=2048, help="live-session budget in KiB")
+    parser.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    parser.add_argument('--seed', type=int, default=0)
+    _demo(parser.parse_args())
@@ -0,0 +1,294 @@
+"""Simulation campaigns split into shards that run anywhere and merge exactly.
+
+A campaign spec names a difficulty, a policy, a number of games, a master
+seed and a day limit. Game i of a campaign is always played with
+simulation.game_seed(master_seed, difficulty, i), so the spec can be split
+into shards over disjoint ranges of game numbers and run on as many
+machines as there are shards.
+
+Each shard writes one self-describing JSON result file: the campaign spec,
+its game range, the content version it played with, its
+SimulationAggregator and, optionally, the day-by-day records of its first
+few games. `merge` checks that a set of files is one whole campaign (same
+spec and content, every game exactly once) and combines them. Aggregates
+are integer sums and counts, so the merged report is identical to the one
+a single-host run of the same spec prints.
+
+    python shards.py plan --difficulty Hard --games 100000 --shards 8 --out hard.json
+    python shards.py run hard.json --shard 3 --out hard-3.json     # on any machine
+    python shards.py merge hard-*.json
+    python shards.py local --difficulty Hard --games 20000 --shards 4 --dir runs/hard --check
+"""
+import argparse
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import content
+import simulation
+import survival
+from stats import SimulationAggregator
+
+FORMAT_NAME = 'survival-shard'
+FORMAT_VERSION = 1
+SPEC_KEYS = ('difficulty', 'policy', 'games', 'master_seed', 'max_days')
+# end-of-day fields kept for each day of a sampled game
+SAMPLE_FIELDS = ('day', 'health', 'hunger', 'thirst', 'food', 'water', 'gold', 'season')
+SCRIPT = os.path.abspath(__file__)
+
+
+# --- Specs & shards ----------------------------------------------------------------
+def make_spec(difficulty, games, master_seed=0, policy='heuristic', max_days=None):
+    """A campaign spec (a plain dict, so it can be saved and sent around)."""
+    if difficulty not in survival.DIFFICULTY_PRESETS:
+        raise ValueError(f"Unknown difficulty: {difficulty}")
+    if policy not in simulation.POLICIES:
+        raise ValueError(f"Unknown policy: {policy}")
+    if games <= 0:
+        raise ValueError("A campaign needs at least one game")
+    return {'difficulty': difficulty, 'policy': policy, 'games': games,
+            'master_seed': str(master_seed), 'max_days': max_days or survival.MAX_DAYS}
+
+
+def split(spec, shards):
+    """The campaign's shards: [{'campaign', 'shard', 'shards', 'start', 'stop'}]."""
+    shards = max(1, min(shards, spec['games']))
+    bounds = [spec['games'] * i // shards for i in range(shards + 1)]
+    return [{'campaign': spec, 'shard': i, 'shards': shards, 'start': lo, 'stop': hi}
+            for i, (lo, hi) in enumerate(zip(bounds, bounds[1:]))]
+
+
+def save_plan(spec, shards, path):
+    """Write the spec and its shards to `path` for `run --shard i` to pick up."""
+    plan = {'format': FORMAT_NAME + '-plan', 'version': FORMAT_VERSION, 'campaign': spec,
+            'shards': split(spec, shards)}
+    _write_json(plan, path)
+    return plan
+
+
+def load_plan(path):
+    plan = _read_json(path)
+    if plan.get('format') != FORMAT_NAME + '-plan':
+        raise ValueError(f"{path} is not a campaign plan")
+    return plan
+
+
+# --- Running a shard -------------------------------------------------------------------
+def _sample_day(days):
+    def on_day(state, actions, event):
+        record = {f: state[f] for f in SAMPLE_FIELDS}
+        record['actions'] = [survival.ACTION_NAMES[a] for a in actions]
+        record['night_event'] = event
+        days.append(record)
+    return on_day
+
+
+def run_shard(shard, sample=0):
+    """Play a shard's games; returns its result dict (see module docstring).
+
+    The first `sample` games of the shard also keep their end-of-day records.
+    """
+    spec = shard['campaign']
+    policy = simulation.POLICIES[spec['policy']]()
+    agg = SimulationAggregator(spec['max_days'])
+    trajectories = []
+    start = time.perf_counter()
+    for index in range(shard['start'], shard['stop']):
+        days = [] if index - shard['start'] < sample else None
+        result = simulation.play_game(
+            spec['difficulty'], policy, simulation.game_seed(spec['master_seed'], spec['difficulty'], index),
+            spec['max_days'], on_day=None if days is None else _sample_day(days))
+        agg.add(result)
+        if days is not None:
+            trajectories.append({'game': index, 'days': days})
+    return {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'campaign': spec,
+        'shard': shard['shard'],
+        'shards': shard['shards'],
+        'start': shard['start'],
+        'stop': shard['stop'],
+        'content': content.current().version,
+        'host': socket.gethostname(),
+        'elapsed': time.perf_counter() - start,
+        'aggregate': agg.to_dict(),
+        'trajectories': trajectories,
+    }
+
+
+def load_result(path):
+    result = _read_json(path)
+    if result.get('format') != FORMAT_NAME:
+        raise ValueError(f"{path} is not a shard result file")
+    if result.get('version') != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported shard format version {result.get('version')}")
+    return result
+
+
+# --- Merging -------------------------------------------------------------------------
+def merge(results):
+    """Combine shard results into (spec, SimulationAggregator, trajectories).
+
+    Raises ValueError unless the results are one campaign, played with one
+    content version, covering every game exactly once.
+    """
+    if not results:
+        raise ValueError("No shard results to merge")
+    spec = results[0]['campaign']
+    version = results[0]['content']
+    for r in results:
+        if r['campaign'] != spec:
+            raise ValueError(f"Shard {r['shard']} belongs to a different campaign: {r['campaign']}")
+        if r['content'] != version:
+            raise ValueError(f"Shard {r['shard']} played content {r['content']}, not {version}")
+    results = sorted(results, key=lambda r: r['start'])
+    covered = 0
+    for r in results:
+        if r['start'] < covered:
+            raise ValueError(f"Shard {r['shard']} repeats games {r['start']}..{covered - 1}")
+        if r['start'] > covered:
+            raise ValueError(f"Games {covered}..{r['start'] - 1} are missing")
+        covered = r['stop']
+    if covered != spec['games']:
+        raise ValueError(f"Games {covered}..{spec['games'] - 1} are missing")
+    total = SimulationAggregator(spec['max_days'])
+    trajectories = []
+    for r in results:
+        total.merge(SimulationAggregator.from_dict(r['aggregate']))
+        trajectories.extend(r['trajectories'])
+    return spec, total, trajectories
+
+
+def format_report(spec, agg, confidence=0.95):
+    """Plain-text report of a whole campaign (the same however it was sharded)."""
+    days = agg.moments['days_survived']
+    lines = [f"== {spec['difficulty']}, {spec['policy']} policy: {agg.games} games "
+             f"(seed {spec['master_seed']}, {spec['max_days']} days)"]
+    lines.append(f"  {'survival rate':<20}: {_fmt_ci(agg.survival.value, agg.survival.interval(confidence), True)}")
+    lines.append(f"  {'days survived':<20}: {_fmt_ci(days.mean, days.interval(confidence))}")
+    lines.append(f"  {'days p10/p50/p90':<20}: "
+                 + " / ".join(f"{agg.days_sketch.quantile(q):.1f}" for q in (0.1, 0.5, 0.9)))
+    for f in ('health', 'hunger', 'thirst', 'food', 'water', 'gold'):
+        lines.append(f"  {'final ' + f:<20}: {agg.moments[f].mean:6.2f}")
+    for cause, _ in agg.causes.most_common():
+        p = agg.death_rate(cause)
+        lines.append(f"  {'death/' + cause:<20}: {_fmt_ci(p.value, p.interval(confidence), True)}")
+    return "\n".join(lines)
+
+
+def _fmt_ci(value, interval, pct=False):
+    lo, hi = interval
+    if pct:
+        return f"{value:6.1%} [{lo:.1%}, {hi:.1%}]"
+    return f"{value:6.2f} [{lo:.2f}, {hi:.2f}]"
+
+
+# --- Files ---------------------------------------------------------------------------
+def _write_json(data, path):
+    # write-then-rename, so a half-written file is never mistaken for a result
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"cannot read {path}: {e}") from None
+
+
+# --- Local runs ----------------------------------------------------------------------
+def run_local(spec, shards, directory, sample=0):
+    """Run every shard as a separate local process and return the result paths."""
+    os.makedirs(directory, exist_ok=True)
+    plan_path = os.path.join(directory, 'plan.json')
+    plan = save_plan(spec, shards, plan_path)
+    procs = []
+    for shard in plan['shards']:
+        out = os.path.join(directory, f"shard-{shard['shard']}.json")
+        procs.append((out, subprocess.Popen([sys.executable, SCRIPT, 'run', plan_path,
+                                             '--shard', str(shard['shard']), '--out', out,
+                                             '--sample', str(sample)])))
+    failed = [out for out, proc in procs if proc.wait() != 0]
+    if failed:
+        raise RuntimeError(f"{len(failed)} shard(s) failed: {', '.join(failed)}")
+    return [out for out, _ in procs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split, run and merge sharded simulation campaigns.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    def spec_args(p):
+        p.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+        p.add_argument('--policy', default='heuristic', choices=list(simulation.POLICIES))
+        p.add_argument('--games', type=int, default=10000)
+        p.add_argument('--seed', default=0, help="master seed")
+        p.add_argument('--max-days', type=int)
+        p.add_argument('--shards', type=int, default=4)
+
+    plan = sub.add_parser('plan', help="write a campaign plan split into shards")
+    spec_args(plan)
+    plan.add_argument('--out', required=True)
+    run = sub.add_parser('run', help="play one shard of a plan and write its result file")
+    run.add_argument('plan')
+    run.add_argument('--shard', type=int, required=True)
+    run.add_argument('--out', required=True)
+    run.add_argument('--sample', type=int, default=0, help="games whose day-by-day records are kept")
+    merged = sub.add_parser('merge', help="combine shard result files into one report")
+    merged.add_argument('results', nargs='+', help="result files (glob patterns allowed)")
+    merged.add_argument('--confidence', type=float, default=0.95)
+    local = sub.add_parser('local', help="run every shard as a local process, then merge")
+    spec_args(local)
+    local.add_argument('--dir', required=True, help="directory for the plan and result files")
+    local.add_argument('--sample', type=int, default=0)
+    local.add_argument('--check', action='store_true',
+                       help="also run the campaign in this process and compare")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.cmd == 'plan':
+            spec = make_spec(args.difficulty, args.games, args.seed, args.policy, args.max_days)
+            plan = save_plan(spec, args.shards, args.out)
+            for shard in plan['shards']:
+                print(f"shard {shard['shard']}: games {shard['start']}..{shard['stop'] - 1}  "
+                      f"python shards.py run {args.out} --shard {shard['shard']} --out shard-{shard['shard']}.json")
+        elif args.cmd == 'run':
+            shards = load_plan(args.plan)['shards']
+            if not 0 <= args.shard < len(shards):
+                raise ValueError(f"The plan has shards 0..{len(shards) - 1}")
+            result = run_shard(shards[args.shard], args.sample)
+            _write_json(result, args.out)
+            print(f"shard {result['shard']}: {result['stop'] - result['start']} games "
+                  f"in {result['elapsed']:.1f}s -> {args.out}", file=sys.stderr)
+        elif args.cmd == 'merge':
+            paths = [p for pattern in args.results for p in (sorted(glob.glob(pattern)) or [pattern])]
+            spec, agg, _ = merge([load_result(p) for p in paths])
+            print(format_report(spec, agg, args.confidence))
+        else:
+            spec = make_spec(args.difficulty, args.games, args.seed, args.policy, args.max_days)
+            start = time.perf_counter()
+            paths = run_local(spec, args.shards, args.dir, args.sample)
+            _, agg, _ = merge([load_result(p) for p in paths])
+            print(f"{len(paths)} shards in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            print(format_report(spec, agg))
+            if args.check:
+                single = run_shard(split(spec, 1)[0])
+                same = single['aggregate'] == agg.to_dict()
+                print(f"single-host run: {'identical' if same else 'DIFFERENT'}", file=sys.stderr)
+                if not same:
+                    raise SystemExit(1)
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,600 @@
+"""Headless simulation of the survival game for balance work.
+
+Games are played by a policy instead of the keyboard: the policy picks the
+daytime actions and answers the combat / bandit / shop prompts (through
+`survival.CHOICE_HOOK`), and all game output is discarded. The day loop below
+mirrors `survival.main()` step for step so results reflect the real rules.
+
+Run `python simulation.py --help` for the campaign command line.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import content
+import survival
+from stats import SimulationAggregator, wilson_interval
+
+class _NullWriter:
+    """stdout replacement that throws everything away."""
+
+    def write(self, s):
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+NULL_OUTPUT = _NullWriter()
+
+
+def prompt_kind(options):
+    """Classify a prompt_choice() options list: 'combat', 'bandit', 'shop', 'menu' or 'other'."""
+    first = options[0] if options else ''
+    if first == 'Attack':
+        return 'combat'
+    if first == 'Fight':
+        return 'bandit'
+    if first.startswith('Buy bandage'):
+        return 'shop'
+    if first == survival.ACTION_OPTIONS[0]:
+        return 'menu'
+    return 'other'
+
+
+# --- Policies --------------------------------------------------------------
+class Policy:
+    """Decides what a headless player does.
+
+    `choose_action` returns an index into survival.ACTION_OPTIONS (never the
+    quit option); `choose_option` answers the sub-prompts raised during
+    combat, bandit encounters and merchant visits.
+    """
+    name = 'policy'
+
+    def start_game(self, seed):
+        """Called by play_game() before each game with the game's seed."""
+
+    def choose_action(self, state):
+        raise NotImplementedError
+
+    def choose_option(self, state, kind, options):
+        # default: the last option is always the "walk away" choice
+        return len(options) - 1
+
+
+class HeuristicPolicy(Policy):
+    """Sensible default player: keep fed and watered, fortify, then gather."""
+    name = 'heuristic'
+
+    def __init__(self, flee_below=30):
+        self.flee_below = flee_below
+
+    def choose_action(self, state):
+        return survival.routine_action(state)
+
+    def choose_option(self, state, kind, options):
+        if kind == 'combat':
+            return 1 if state['health'] < self.flee_below else 0
+        if kind == 'bandit':
+            return 0 if state['health'] >= 60 else 1
+        if kind == 'shop':
+            if state.get('gold', 0) >= 2 and state.get('water', 0) < 2:
+                return 1
+            if state.get('gold', 0) >= 5:
+                return 0
+            return 3
+        return super().choose_option(state, kind, options)
+
+
+# --- Reference bots ------------------------------------------------------------
+# Simple fixed strategies to rank against each other (see tournament.py).
+# Action indices are into survival.ACTION_OPTIONS.
+FORAGE, REST, EAT, DRINK, MAKE_FIRE, BUILD_SHELTER, USE_BANDAGE = 0, 4, 5, 6, 7, 9, 11
+
+
+class RandomPolicy(Policy):
+    """Uniformly random actions and answers; the baseline every bot should beat.
+
+    Draws from its own RNG, reseeded from each game's seed, so its choices
+    don't disturb the game's random stream and don't depend on which worker
+    plays the game.
+    """
+    name = 'random'
+
+    def __init__(self):
+        self.rng = random.Random()
+
+    def start_game(self, seed):
+        self.rng.seed(f"{seed}:{self.name}")
+
+    def choose_action(self, state):
+        return self.rng.randrange(survival.QUIT_ACTION)
+
+    def choose_option(self, state, kind, options):
+        return self.rng.randrange(len(options))
+
+
+class GreedyPolicy(HeuristicPolicy):
+    """Eats and drinks as soon as there is anything to eat or drink, else forages."""
+    name = 'greedy'
+
+    def choose_action(self, state):
+        if state['thirst'] > 0 and state['water'] > 0:
+            return DRINK
+        if state['hunger'] > 0 and state['food'] > 0:
+            return EAT
+        return FORAGE
+
+
+class ForageFirstPolicy(HeuristicPolicy):
+    """Forages every action unless hunger, thirst or health is critical."""
+    name = 'forage-first'
+
+    def choose_action(self, state):
+        if state['thirst'] >= 70 and state['water'] > 0:
+            return DRINK
+        if state['hunger'] >= 70 and state['food'] > 0:
+            return EAT
+        if state['health'] < 25:
+            return REST
+        return FORAGE
+
+
+class FortifyPolicy(HeuristicPolicy):
+    """Builds shelter and keeps a fire going before anything else, then plays the routine."""
+    name = 'fortify'
+
+    def choose_action(self, state):
+        if not state.get('shelter'):
+            return BUILD_SHELTER
+        if not state.get('fire'):
+            return MAKE_FIRE
+        return super().choose_action(state)
+
+
+class CautiousPolicy(HeuristicPolicy):
+    """The routine, but avoids fights: flees combat below `flee_below` health
+    and never fights bandits (pays when it surely can, else runs)."""
+    name = 'cautious'
+
+    def __init__(self, flee_below=60):
+        super().__init__(flee_below)
+
+    def choose_option(self, state, kind, options):
+        if kind == 'bandit':
+            return 1 if state.get('gold', 0) >= 18 else 2
+        return super().choose_option(state, kind, options)
+
+
+# Policies by name, for specs and command lines that name one
+POLICIES = {policy.name: policy for policy in (
+    HeuristicPolicy, RandomPolicy, GreedyPolicy, ForageFirstPolicy, FortifyPolicy, CautiousPolicy)}
+
+
+# --- Single game -------------------------------------------------------------
+def game_seed(master_seed, difficulty, index):
+    """Deterministic per-game seed; games of a campaign never share a stream."""
+    return f"{master_seed}:{difficulty}:{index}"
+
+
+def play_day(state, policy):
+    """Play one day of a headless game in place: two actions, the night and its event.
+
+    The caller installs the policy's CHOICE_HOOK, the difficulty and content
+    globals and silences output (see play_game). Returns (actions, night_event,
+    cause): the action indices taken, the danger_event() result (None if the
+    night phase failed and the day must be replayed) and the step that took
+    health to zero, if any.
+    """
+    cause = None
+
+    def track(step, before):
+        nonlocal cause
+        if before > 0 and state['health'] <= 0:
+            cause = step
+
+    before = state['health']
+    survival.validate_state(state)
+    track('bleeding', before)
+    survival.update_season(state)
+
+    survived_day = True
+    actions = []
+    for _ in range(2):
+        choice = policy.choose_action(state)
+        actions.append(choice)
+        before = state['health']
+        if not survival.perform_action(state, choice):
+            survived_day = False
+        track(survival.ACTION_NAMES[choice], before)
+        if state['health'] <= 0:
+            break
+
+    try:
+        before = state['health']
+        survival.apply_night_effects(state, survived_day)
+        track(survival.night_death_cause(state), before)
+        before = state['health']
+        event = survival.danger_event(state)
+        track('night event', before)
+    except Exception:
+        state['status_effects'] = {}
+        return actions, None, cause
+    return actions, event, cause
+
+
+def play_game(difficulty='Normal', policy=None, seed=None, max_days=None, on_day=None):
+    """Play one full game headlessly and return a summary dict.
+
+    The game ends when the player dies or survives `max_days` days (defaults
+    to survival.MAX_DAYS). `cause` is the step that took health to zero,
+    e.g. 'hunt', 'cold', 'night event'; None if the player survived.
+
+    If given, `on_day(state, actions, night_event)` is called after every
+    night with the list of action indices taken that day.
+    """
+    policy = policy or HeuristicPolicy()
+    max_days = max_days or survival.MAX_DAYS
+    if seed is not None:
+        random.seed(seed)
+    policy.start_game(seed)
+    pinned = content.current()
+    preset = pinned.presets[difficulty]
+    state = survival.new_game_state(preset)
+    cause = None
+
+    saved = survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT
+    survival.CURRENT_DIFFICULTY, survival.CONTENT = preset, pinned
+    survival.CHOICE_HOOK = lambda options: policy.choose_option(state, prompt_kind(options), options)
+    try:
+        with contextlib.redirect_stdout(NULL_OUTPUT):
+            while state['day'] <= max_days:
+                actions, event, day_cause = play_day(state, policy)
+                cause = day_cause or cause
+                if event is None:
+                    continue
+                if on_day is not None:
+                    on_day(state, actions, event)
+
+                state['day'] += 1
+                over, _ = survival.check_game_over(state, max_days)
+                if over:
+                    break
+                survival.roll_item_discovery(state)
+    finally:
+        survival.CURRENT_DIFFICULTY, survival.CHOICE_HOOK, survival.CONTENT = saved
+
+    outcome = 'survived' if state['health'] > 0 else 'died'
+    result = survival.game_result(state, difficulty, outcome, cause, seed, max_days)
+    result['policy'] = policy.name
+    return result
+
+
+# --- Aggregated runs ---------------------------------------------------------
+def simulate_range(difficulty, start, stop, master_seed=0, policy_factory=HeuristicPolicy,
+                   max_days=None):
+    """Play games `start`..`stop-1` of a difficulty and return their SimulationAggregator."""
+    policy = policy_factory()
+    agg = SimulationAggregator(max_days or survival.MAX_DAYS)
+    for index in range(start, stop):
+        agg.add(play_game(difficulty, policy, game_seed(master_seed, difficulty, index), max_days))
+    return agg
+
+
+def _simulate_range_task(args):
+    return simulate_range(*args)
+
+
+def simulate(difficulty, games, master_seed=0, start=0, workers=1, policy_factory=HeuristicPolicy,
+             max_days=None, pool=None):
+    """Play `games` games (numbered from `start`), spread over `workers` processes.
+
+    Each worker returns its own aggregator and the parts are merged, so only
+    constant-size summaries ever cross the process boundary. Pass an existing
+    multiprocessing `pool` to avoid paying process start-up per call.
+    """
+    if workers <= 1 and pool is None:
+        return simulate_range(difficulty, start, start + games, master_seed, policy_factory, max_days)
+    parts = max(1, workers)
+    bounds = [start + games * i // parts for i in range(parts + 1)]
+    tasks = [(difficulty, lo, hi, master_seed, policy_factory, max_days)
+             for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+    if pool is None:
+        with multiprocessing.Pool(workers) as own_pool:
+            results = own_pool.map(_simulate_range_task, tasks)
+    else:
+        results = pool.map(_simulate_range_task, tasks)
+    total = SimulationAggregator(max_days or survival.MAX_DAYS)
+    for agg in results:
+        total.merge(agg)
+    return total
+
+
+# --- Sequential-stopping campaigns ---------------------------------------------
+# Default target CI widths (full width, not half width) per metric
+DEFAULT_TARGETS = {
+    'survival_rate': 0.02,   # proportion
+    'mean_days': 0.5,        # days
+    'death_rates': 0.02,     # proportion, checked for every cause seen so far
+}
+
+
+class DifficultyTally:
+    """Streaming estimates for one difficulty within a campaign."""
+
+    def __init__(self, difficulty, max_days=None):
+        self.difficulty = difficulty
+        self.agg = SimulationAggregator(max_days or survival.MAX_DAYS)
+        self.elapsed = 0.0
+        self.stopped = None
+
+    @property
+    def games(self):
+        return self.agg.games
+
+    def add(self, result):
+        self.agg.add(result)
+
+    def widths(self, confidence):
+        """Current CI width of each metric (death_rates: widest cause, counting
+        causes not seen yet as 0 deaths in all the games played)."""
+        lo, hi = self.agg.survival.interval(confidence)
+        widths = {'survival_rate': hi - lo}
+        lo, hi = self.agg.moments['days_survived'].interval(confidence)
+        widths['mean_days'] = hi - lo
+        lo, hi = wilson_interval(0, self.games, confidence)
+        death_width = hi - lo
+        for cause in self.agg.causes:
+            lo, hi = self.agg.death_rate(cause).interval(confidence)
+            death_width = max(death_width, hi - lo)
+        widths['death_rates'] = death_width
+        return widths
+
+    def converged(self, targets, confidence):
+        widths = self.widths(confidence)
+        return all(widths[m] < width for m, width in targets.items())
+
+    def to_dict(self):
+        return {'difficulty': self.difficulty, 'agg': self.agg.to_dict(), 'elapsed': self.elapsed,
+                'stopped': self.stopped}
+
+    @classmethod
+    def from_dict(cls, data):
+        tally = cls(data['difficulty'])
+        tally.agg = SimulationAggregator.from_dict(data['agg'])
+        tally.elapsed, tally.stopped = data['elapsed'], data['stopped']
+        return tally
+
+    def report(self, confidence):
+        deaths = {}
+        for cause, _ in self.agg.causes.most_common():
+            p = self.agg.death_rate(cause)
+            deaths[cause] = (p.value, p.interval(confidence))
+        days = self.agg.moments['days_survived']
+        return {
+            'difficulty': self.difficulty,
+            'games': self.games,
+            'elapsed': self.elapsed,
+            'stopped': self.stopped,
+            'survival_rate': (self.agg.survival.value, self.agg.survival.interval(confidence)),
+            'mean_days': (days.mean, days.interval(confidence)),
+            'death_rates': deaths,
+        }
+
+
+class Checkpointer:
+    """Persists a campaign's progress to `path`, atomically, at most every
+    `interval` seconds (see run_campaign).
+
+    Games are seeded one by one (game_seed), so a game never continues
+    another's random stream: between batches the tallies (aggregates, games
+    played, elapsed time) are the campaign's whole state.
+    """
+    FORMAT = 'survival-campaign-checkpoint'
+    VERSION = 1
+
+    def __init__(self, path, interval=60.0):
+        self.path = path
+        self.interval = interval
+        self.written = 0
+        self.seconds = 0.0        # spent writing checkpoints
+        self._last = time.perf_counter()
+
+    def due(self):
+        return time.perf_counter() - self._last >= self.interval
+
+    def save(self, params, tallies, wall):
+        start = time.perf_counter()
+        data = {'format': self.FORMAT, 'version': self.VERSION, 'params': params, 'wall': wall,
+                'tallies': [t.to_dict() for t in tallies.values()]}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)  # a crash leaves the previous checkpoint intact
+        self._last = time.perf_counter()
+        self.written += 1
+        self.seconds += self._last - start
+
+    def load(self, params):
+        """(tallies, wall seconds so far) from the checkpoint, or None if there is none.
+
+        Raises ValueError if it was written by a campaign with other parameters.
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            raise ValueError(f"{self.path}: unreadable checkpoint ({e})") from None
+        if data.get('format') != self.FORMAT or data.get('version') != self.VERSION:
+            raise ValueError(f"{self.path} is not a campaign checkpoint")
+        changed = [k for k in params if data['params'].get(k) != params[k]]
+        if changed:
+            raise ValueError(f"{self.path} is from a campaign with different {', '.join(changed)}")
+        tallies = {}
+        for item in data['tallies']:
+            tally = DifficultyTally.from_dict(item)
+            if tally.stopped == 'time budget':
+                tally.stopped = None    # a resumed run gets a new budget
+            tallies[tally.difficulty] = tally
+        return tallies, data['wall']
+
+
+def run_campaign(difficulties=None, targets=None, confidence=0.95, batch_size=500,
+                 min_games=200, max_games=None, time_budget=None, master_seed=0,
+                 policy_factory=HeuristicPolicy, progress=None, workers=1,
+                 checkpoint=None, resume=False):
+    """Play games in batches until every target metric's CI is narrow enough.
+
+    `targets` maps metric name ('survival_rate', 'mean_days', 'death_rates')
+    to the wanted full CI width; only the listed metrics are checked. Each
+    difficulty stops on its own once converged (or at `max_games`); the whole
+    campaign stops when `time_budget` seconds have passed. Returns a list of
+    per-difficulty report dicts (see DifficultyTally.report). With
+    `workers` > 1 each batch is split across a process pool.
+
+    With a Checkpointer the campaign's progress is saved after a batch
+    whenever its interval has passed, and once at the end; with `resume`
+    a saved checkpoint is picked up where it stopped. Each difficulty plays
+    the same batches either way, so the reports are identical to an
+    uninterrupted run's. A resumed run gets the whole `time_budget` again:
+    difficulties stopped by the budget carry on, and time spent before the
+    checkpoint only counts towards the reported elapsed time.
+    """
+    difficulties = list(difficulties or survival.DIFFICULTY_PRESETS)
+    targets = dict(DEFAULT_TARGETS if targets is None else targets)
+    unknown = set(targets) - set(DEFAULT_TARGETS)
+    if unknown:
+        raise ValueError(f"Unknown campaign metric(s): {', '.join(sorted(unknown))}")
+    tallies = {d: DifficultyTally(d) for d in difficulties}
+    wall = 0.0
+    params = {'difficulties': difficulties, 'targets': targets, 'confidence': confidence,
+              'batch_size': batch_size, 'min_games': min_games, 'max_games': max_games,
+              'master_seed': str(master_seed), 'policy': policy_factory.name,
+              'content': content.current().version}
+    if checkpoint is not None and resume:
+        saved = checkpoint.load(params)
+        if saved is not None:
+            tallies, wall = saved
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    start = time.perf_counter() - wall       # elapsed time, saved runs included
+    budget_start = time.perf_counter()       # the time budget counts this run only
+
+    active = [d for d in difficulties if tallies[d].stopped is None]
+    try:
+        while active:
+            for difficulty in list(active):
+                if time_budget is not None and time.perf_counter() - budget_start >= time_budget:
+                    for d in active:
+                        tallies[d].stopped = 'time budget'
+                    active = []
+                    break
+                tally = tallies[difficulty]
+                batch_start = time.perf_counter()
+                n = batch_size if max_games is None else min(batch_size, max_games - tally.games)
+                tally.agg.merge(simulate(difficulty, n, master_seed, tally.games, workers,
+                                         policy_factory, pool=pool))
+                tally.elapsed += time.perf_counter() - batch_start
+
+                if tally.games >= min_games and tally.converged(targets, confidence):
+                    tally.stopped = 'converged'
+                elif max_games is not None and tally.games >= max_games:
+                    tally.stopped = 'max games'
+                if tally.stopped:
+                    active.remove(difficulty)
+                if progress:
+                    progress(tally)
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save(params, tallies, time.perf_counter() - start)
+        if checkpoint is not None:
+            checkpoint.save(params, tallies, time.perf_counter() - start)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return [tallies[d].report(confidence) for d in difficulties]
+
+
+def _fmt_ci(value, interval, pct=False):
+    lo, hi = interval
+    if pct:
+        return f"{value:6.1%} [{lo:.1%}, {hi:.1%}]"
+    return f"{value:6.2f} [{lo:.2f}, {hi:.2f}]"
+
+
+def format_report(reports):
+    """Render campaign reports as a plain-text table, one block per difficulty."""
+    lines = []
+    for r in reports:
+        lines.append(f"== {r['difficulty']}: {r['games']} games in {r['elapsed']:.1f}s ({r['stopped']})")
+        lines.append(f"  {'survival rate':<20}: {_fmt_ci(*r['survival_rate'], pct=True)}")
+        lines.append(f"  {'days survived':<20}: {_fmt_ci(*r['mean_days'])}")
+        for cause, (value, interval) in r['death_rates'].items():
+            lines.append(f"  {'death/' + cause:<20}: {_fmt_ci(value, interval, pct=True)}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a sequential-stopping simulation campaign.")
+    parser.add_argument('--difficulty', nargs='+', choices=list(survival.DIFFICULTY_PRESETS),
+                        help="difficulties to simulate (default: all)")
+    parser.add_argument('--metric', nargs='+', choices=list(DEFAULT_TARGETS),
+                        help="metrics that must converge (default: all)")
+    parser.add_argument('--width-survival', type=float, default=DEFAULT_TARGETS['survival_rate'])
+    parser.add_argument('--width-days', type=float, default=DEFAULT_TARGETS['mean_days'])
+    parser.add_argument('--width-deaths', type=float, default=DEFAULT_TARGETS['death_rates'])
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--min-games', type=int, default=200)
+    parser.add_argument('--max-games', type=int)
+    parser.add_argument('--time-budget', type=float, help="seconds before the campaign stops")
+    parser.add_argument('--seed', default=0, help="master seed")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes per batch")
+    parser.add_argument('--quiet', action='store_true', help="no per-batch progress lines")
+    parser.add_argument('--checkpoint', help="file to save progress to (and resume from)")
+    parser.add_argument('--checkpoint-interval', type=float, default=60.0,
+                        help="seconds between checkpoints (default 60)")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from --checkpoint if it exists; --time-budget "
+                             "starts afresh, so a run stopped by its budget carries on")
+    args = parser.parse_args(argv)
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+
+    widths = {'survival_rate': args.width_survival, 'mean_days': args.width_days,
+              'death_rates': args.width_deaths}
+    targets = {m: widths[m] for m in (args.metric or DEFAULT_TARGETS)}
+
+    def progress(tally):
+        print(f"[{tally.difficulty}] {tally.games} games, widths "
+              + ", ".join(f"{m}={w:.3f}" for m, w in tally.widths(args.confidence).items()
+                          if m in targets),
+              file=sys.stderr)
+
+    checkpoint = Checkpointer(args.checkpoint, args.checkpoint_interval) if args.checkpoint else None
+    start = time.perf_counter()
+    try:
+        reports = run_campaign(args.difficulty, targets, args.confidence, args.batch_size,
+                               args.min_games, args.max_games, args.time_budget, args.seed,
+                               progress=None if args.quiet else progress, workers=args.workers,
+                               checkpoint=checkpoint, resume=args.resume)
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+    print(format_report(reports))
+    if checkpoint is not None:
+        wall = time.perf_counter() - start
+        print(f"{checkpoint.written} checkpoint(s) in {checkpoint.seconds:.3f}s "
+              f"({checkpoint.seconds / wall:.2%} of {wall:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
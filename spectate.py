@@ -0,0 +1,284 @@
+"""Spectator mode: broadcast a running game to any number of local watchers.
+
+The game publishes each chunk of output once into a bounded RingBuffer
+(O(1), no locks, no per-watcher work). A single broadcaster thread owns the
+listening Unix socket and every watcher connection; it copies from the ring
+to each watcher at that watcher's own pace using non-blocking sends. A
+watcher that falls more than a ring's worth behind skips ahead to the oldest
+retained chunk (and is told how much it missed) instead of slowing the game.
+New watchers get the latest status_line() snapshot, then the live tail.
+
+    python spectate.py play --socket /tmp/survival.sock     # play, broadcasting
+    python spectate.py watch /tmp/survival.sock             # in another terminal
+"""
+import argparse
+import os
+import selectors
+import socket
+import sys
+import threading
+
+import survival
+
+
+class RingBuffer:
+    """Fixed-capacity sequence of items addressed by an ever-increasing sequence number.
+
+    Single writer, any number of readers; readers hold their own cursor.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self.next_seq = 0
+
+    def append(self, item):
+        self._slots[self.next_seq % self.capacity] = item
+        self.next_seq += 1
+
+    @property
+    def oldest(self):
+        return max(0, self.next_seq - self.capacity)
+
+    def read(self, seq, limit=256):
+        """Return (items, new_seq, skipped) for items from `seq` on.
+
+        If `seq` has already been overwritten the read starts at the oldest
+        retained item and `skipped` says how many were lost.
+        """
+        end = self.next_seq
+        skipped = 0
+        if seq < end - self.capacity:
+            skipped = end - self.capacity - seq
+            seq = end - self.capacity
+        stop = min(end, seq + limit)
+        items = [self._slots[i % self.capacity] for i in range(seq, stop)]
+        # the writer may have lapped us while copying; drop anything overwritten
+        lapped = self.next_seq - self.capacity - seq
+        if lapped > 0:
+            items = items[lapped:]
+            skipped += lapped
+            seq += lapped
+        return items, seq + len(items), skipped
+
+
+class _Watcher:
+    def __init__(self, sock, cursor, greeting):
+        self.sock = sock
+        self.cursor = cursor
+        self.pending = greeting
+
+
+class Broadcaster:
+    """Fans game output out from a RingBuffer to Unix-socket watchers."""
+
+    def __init__(self, path, capacity=4096):
+        self.path = path
+        self.ring = RingBuffer(capacity)
+        self.snapshot = ''
+        self.watchers = 0
+        if os.path.exists(path):
+            os.remove(path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(path)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._armed = False
+        self._closing = False
+        self._thread = threading.Thread(target=self._serve, name='spectator-broadcast', daemon=True)
+        self._thread.start()
+
+    # -- game side (constant cost, independent of watcher count) ------------------
+    def publish(self, text):
+        if not text:
+            return
+        self.ring.append(text)
+        if self._armed:
+            self._armed = False
+            os.write(self._wake_w, b'.')
+
+    def update_snapshot(self, text):
+        self.snapshot = text
+
+    def close(self):
+        self._closing = True
+        os.write(self._wake_w, b'.')
+        self._thread.join()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # -- broadcaster thread ------------------------------------------------------
+    def _serve(self):
+        sel = selectors.DefaultSelector()
+        sel.register(self._listener, selectors.EVENT_READ)
+        sel.register(self._wake_r, selectors.EVENT_READ)
+        watchers = {}
+        while True:
+            self._armed = True
+            for w in list(watchers.values()):
+                self._fill(w)
+                self._flush(sel, watchers, w)
+            if self._closing:
+                break
+            for key, mask in sel.select(timeout=1.0):
+                if key.fileobj is self._listener:
+                    self._accept(sel, watchers)
+                elif key.fileobj == self._wake_r:
+                    try:
+                        os.read(self._wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                elif mask & selectors.EVENT_READ:
+                    self._poll_hangup(sel, watchers, key.data)
+        for w in list(watchers.values()):
+            self._drop(sel, watchers, w)
+        sel.close()
+        self._listener.close()
+
+    def _accept(self, sel, watchers):
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        greeting = f"[spectating] {self.snapshot or 'game starting...'}\n".encode()
+        w = _Watcher(sock, self.ring.next_seq, greeting)
+        watchers[sock.fileno()] = w
+        self.watchers = len(watchers)
+        sel.register(sock, selectors.EVENT_READ, w)   # readable == watcher hung up
+
+    def _poll_hangup(self, sel, watchers, w):
+        try:
+            data = w.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(sel, watchers, w)
+
+    def _fill(self, w):
+        if w.pending:
+            return
+        items, w.cursor, skipped = self.ring.read(w.cursor)
+        text = ''.join(items)
+        if skipped:
+            text = f"\n[... skipped {skipped} updates ...]\n" + text
+        w.pending = text.encode()
+
+    def _flush(self, sel, watchers, w):
+        while w.pending:
+            try:
+                sent = w.sock.send(w.pending)
+            except BlockingIOError:
+                break
+            except OSError:
+                self._drop(sel, watchers, w)
+                return
+            w.pending = w.pending[sent:]
+            if not w.pending:
+                self._fill(w)
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if w.pending else 0)
+        try:
+            sel.modify(w.sock, events, w)
+        except (KeyError, ValueError):
+            pass
+
+    def _drop(self, sel, watchers, w):
+        watchers.pop(w.sock.fileno(), None)
+        try:
+            sel.unregister(w.sock)
+        except (KeyError, ValueError):
+            pass
+        w.sock.close()
+        self.watchers = len(watchers)
+
+
+class _TeeOut:
+    """stdout wrapper: write to the terminal and publish to spectators."""
+
+    def __init__(self, real, broadcaster):
+        self._real = real
+        self._broadcaster = broadcaster
+
+    def write(self, s):
+        self._broadcaster.publish(s)
+        return self._real.write(s)
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+
+class _TeeIn:
+    """stdin wrapper: refresh the status snapshot at each prompt and echo input."""
+
+    def __init__(self, real, broadcaster):
+        self._real = real
+        self._broadcaster = broadcaster
+        self.state = None
+
+    def readline(self, *args):
+        if self.state is not None:
+            self._broadcaster.update_snapshot(survival.status_line(self.state))
+        line = self._real.readline(*args)
+        self._broadcaster.publish(line)
+        return line
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+
+def play(path, capacity=4096):
+    """Run the normal main menu with output broadcast to spectators at `path`."""
+    broadcaster = Broadcaster(path, capacity)
+    tee_in = _TeeIn(sys.stdin, broadcaster)
+    saved = sys.stdout, sys.stdin, survival.GAME_START_HOOK
+    sys.stdout, sys.stdin = _TeeOut(sys.stdout, broadcaster), tee_in
+
+    def bind(state):
+        tee_in.state = state
+        if saved[2] is not None:
+            saved[2](state)
+
+    survival.GAME_START_HOOK = bind
+    try:
+        survival.main_menu()
+    finally:
+        sys.stdout, sys.stdin, survival.GAME_START_HOOK = saved
+        broadcaster.close()
+
+
+def watch(path):
+    """Print a broadcast game until it ends."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            sys.stdout.write(data.decode(errors='replace'))
+            sys.stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Broadcast a game to spectators, or watch one.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('play', help="play with spectators allowed")
+    p.add_argument('--socket', default=f"/tmp/survival-{os.getpid()}.sock")
+    p.add_argument('--capacity', type=int, default=4096, help="ring buffer size in output chunks")
+    w = sub.add_parser('watch', help="watch a broadcast game")
+    w.add_argument('socket')
+    args = parser.parse_args(argv)
+    if args.cmd == 'play':
+        print(f"[spectators can join with: python spectate.py watch {args.socket}]")
+        play(args.socket, args.capacity)
+    else:
+        watch(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""Streaming statistics used by the simulation tools.
+
+Everything here is updated one observation at a time so campaigns never have
+to keep per-game results around, and every accumulator has a `merge()` so
+partial results from worker processes can be combined. Memory use depends
+only on the configured bin/bucket counts, never on the number of games.
+Accumulators also round-trip through plain JSON-able dicts (`to_dict()` /
+`from_dict()`), so partial results can come from other machines too.
+"""
+import math
+from collections import Counter
+from statistics import NormalDist
+
+
+def z_score(confidence):
+    """Two-sided normal critical value for a confidence level (e.g. 0.95 -> 1.96)."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2.0)
+
+
+def wilson_interval(hits, n, confidence=0.95):
+    """Wilson score interval for a proportion. Returns (low, high).
+
+    Unlike the plain normal approximation this stays sensible at 0% / 100%,
+    so a campaign can't "converge" after a handful of games that all died.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    z = z_score(confidence)
+    p = hits / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+class RunningStat:
+    """Online mean/variance from running sums.
+
+    Game metrics are integers, so the sums stay exact Python ints and merging
+    partial results gives bit-for-bit the same answer however the games were
+    split up (Welford's update would drift in the last float digits).
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0
+        self.total_sq = 0
+
+    def add(self, x):
+        self.n += 1
+        self.total += x
+        self.total_sq += x * x
+
+    def merge(self, other):
+        """Fold another RunningStat into this one."""
+        self.n += other.n
+        self.total += other.total
+        self.total_sq += other.total_sq
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else 0.0
+
+    @property
+    def variance(self):
+        if self.n < 2:
+            return 0.0
+        return max(0.0, (self.n * self.total_sq - self.total * self.total) / (self.n * (self.n - 1)))
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def interval(self, confidence=0.95):
+        """Normal-approximation confidence interval for the mean. Returns (low, high)."""
+        if self.n < 2:
+            return float('-inf'), float('inf')
+        half = z_score(confidence) * self.stdev / math.sqrt(self.n)
+        return self.mean - half, self.mean + half
+
+    def to_dict(self):
+        return {'n': self.n, 'total': self.total, 'total_sq': self.total_sq}
+
+    @classmethod
+    def from_dict(cls, data):
+        stat = cls()
+        stat.n, stat.total, stat.total_sq = data['n'], data['total'], data['total_sq']
+        return stat
+
+
+class RunningProportion:
+    """Counts successes out of trials and reports a Wilson interval."""
+
+    def __init__(self):
+        self.n = 0
+        self.hits = 0
+
+    def add(self, hit):
+        self.n += 1
+        if hit:
+            self.hits += 1
+
+    def merge(self, other):
+        self.n += other.n
+        self.hits += other.hits
+        return self
+
+    @property
+    def value(self):
+        return self.hits / self.n if self.n else 0.0
+
+    def interval(self, confidence=0.95):
+        return wilson_interval(self.hits, self.n, confidence)
+
+    def to_dict(self):
+        return {'n': self.n, 'hits': self.hits}
+
+    @classmethod
+    def from_dict(cls, data):
+        p = cls()
+        p.n, p.hits = data['n'], data['hits']
+        return p
+
+
+class Histogram:
+    """Fixed-width bins over [low, high]; values outside land in the end bins."""
+
+    def __init__(self, low, high, bins):
+        self.low = low
+        self.high = high
+        self.counts = [0] * bins
+        self._scale = bins / float(high - low) if high > low else 0.0
+
+    def add(self, x, count=1):
+        i = int((x - self.low) * self._scale)
+        self.counts[max(0, min(len(self.counts) - 1, i))] += count
+
+    def merge(self, other):
+        if (other.low, other.high, len(other.counts)) != (self.low, self.high, len(self.counts)):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def edges(self):
+        width = (self.high - self.low) / len(self.counts)
+        return [self.low + i * width for i in range(len(self.counts) + 1)]
+
+    def to_dict(self):
+        return {'low': self.low, 'high': self.high, 'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data['low'], data['high'], len(data['counts']))
+        hist.counts = list(data['counts'])
+        return hist
+
+
+class QuantileSketch:
+    """Mergeable streaming quantiles with bounded relative error.
+
+    Log-spaced buckets (the DDSketch scheme): a value x > 0 goes in bucket
+    ceil(log(x) / log(gamma)), so any quantile is reported within
+    `relative_accuracy` of the true value. Zero and negative values get their
+    own stores. If more than `max_buckets` buckets are in use the lowest ones
+    are collapsed together, which only costs accuracy at the very bottom.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, x):
+        return int(math.ceil(math.log(x) / self._log_gamma))
+
+    def add(self, x, count=1):
+        self.n += count
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if x > 0:
+            k = self._key(x)
+            self.positive[k] = self.positive.get(k, 0) + count
+            self._collapse(self.positive)
+        elif x < 0:
+            k = self._key(-x)
+            self.negative[k] = self.negative.get(k, 0) + count
+            self._collapse(self.negative)
+        else:
+            self.zeros += count
+
+    def _collapse(self, store):
+        if len(store) <= self.max_buckets:
+            return
+        keys = sorted(store)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for k in keys[:excess]:
+            store[target] += store.pop(k)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for k, c in theirs.items():
+                mine[k] = mine.get(k, 0) + c
+            self._collapse(mine)
+        self.zeros += other.zeros
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _value(self, k):
+        return 2 * self.gamma ** k / (self.gamma + 1)
+
+    def to_dict(self):
+        # JSON object keys are strings; min/max are None while empty
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_buckets': self.max_buckets,
+            'positive': {str(k): c for k, c in self.positive.items()},
+            'negative': {str(k): c for k, c in self.negative.items()},
+            'zeros': self.zeros,
+            'n': self.n,
+            'min': self.min if self.n else None,
+            'max': self.max if self.n else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'], data['max_buckets'])
+        sketch.positive = {int(k): c for k, c in data['positive'].items()}
+        sketch.negative = {int(k): c for k, c in data['negative'].items()}
+        sketch.zeros, sketch.n = data['zeros'], data['n']
+        if sketch.n:
+            sketch.min, sketch.max = data['min'], data['max']
+        return sketch
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1); None if nothing was added."""
+        if self.n == 0:
+            return None
+        rank = q * (self.n - 1)
+        seen = 0
+        for k in sorted(self.negative, reverse=True):
+            seen += self.negative[k]
+            if seen > rank:
+                return max(self.min, -self._value(k))
+        seen += self.zeros
+        if seen > rank:
+            return 0
+        for k in sorted(self.positive):
+            seen += self.positive[k]
+            if seen > rank:
+                return min(self.max, self._value(k))
+        return self.max
+
+
+# Per-game numeric fields summarised by SimulationAggregator
+AGGREGATED_FIELDS = ('days_survived', 'health', 'hunger', 'thirst', 'food', 'water', 'gold')
+
+
+class SimulationAggregator:
+    """Constant-memory summary of any number of simulation.play_game() results.
+
+    Keeps online moments for every AGGREGATED_FIELDS entry, fixed-bin
+    histograms of days survived and final health, quantile sketches of the
+    same, and counters keyed by cause of death, final season and difficulty.
+    Aggregators built in different processes combine with `merge()`.
+    """
+
+    def __init__(self, max_days=20):
+        self.max_days = max_days
+        self.survival = RunningProportion()
+        self.moments = {f: RunningStat() for f in AGGREGATED_FIELDS}
+        self.days_hist = Histogram(0, max_days + 1, max_days + 1)
+        self.health_hist = Histogram(0, 100, 20)
+        self.days_sketch = QuantileSketch()
+        self.health_sketch = QuantileSketch()
+        self.causes = Counter()
+        self.seasons = Counter()
+        self.difficulties = Counter()
+
+    @property
+    def games(self):
+        return self.survival.n
+
+    def add(self, result):
+        self.survival.add(result['survived'])
+        for f in AGGREGATED_FIELDS:
+            self.moments[f].add(result[f])
+        self.days_hist.add(result['days_survived'])
+        self.health_hist.add(result['health'])
+        self.days_sketch.add(result['days_survived'])
+        self.health_sketch.add(result['health'])
+        if result['cause']:
+            self.causes[result['cause']] += 1
+        self.seasons[result['season']] += 1
+        self.difficulties[result['difficulty']] += 1
+
+    def merge(self, other):
+        self.survival.merge(other.survival)
+        for f in AGGREGATED_FIELDS:
+            self.moments[f].merge(other.moments[f])
+        self.days_hist.merge(other.days_hist)
+        self.health_hist.merge(other.health_hist)
+        self.days_sketch.merge(other.days_sketch)
+        self.health_sketch.merge(other.health_sketch)
+        self.causes.update(other.causes)
+        self.seasons.update(other.seasons)
+        self.difficulties.update(other.difficulties)
+        return self
+
+    def to_dict(self):
+        """Everything needed to rebuild this aggregator, as JSON-able data."""
+        return {
+            'max_days': self.max_days,
+            'survival': self.survival.to_dict(),
+            'moments': {f: self.moments[f].to_dict() for f in AGGREGATED_FIELDS},
+            'days_hist': self.days_hist.to_dict(),
+            'health_hist': self.health_hist.to_dict(),
+            'days_sketch': self.days_sketch.to_dict(),
+            'health_sketch': self.health_sketch.to_dict(),
+            'causes': dict(self.causes),
+            'seasons': dict(self.seasons),
+            'difficulties': dict(self.difficulties),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        agg = cls(data['max_days'])
+        agg.survival = RunningProportion.from_dict(data['survival'])
+        agg.moments = {f: RunningStat.from_dict(data['moments'][f]) for f in AGGREGATED_FIELDS}
+        agg.days_hist = Histogram.from_dict(data['days_hist'])
+        agg.health_hist = Histogram.from_dict(data['health_hist'])
+        agg.days_sketch = QuantileSketch.from_dict(data['days_sketch'])
+        agg.health_sketch = QuantileSketch.from_dict(data['health_sketch'])
+        agg.causes = Counter(data['causes'])
+        agg.seasons = Counter(data['seasons'])
+        agg.difficulties = Counter(data['difficulties'])
+        return agg
+
+    def death_rate(self, cause):
+        p = RunningProportion()
+        p.n, p.hits = self.games, self.causes.get(cause, 0)
+        return p
+
+    def summary(self, confidence=0.95):
+        """Plain-dict snapshot of the headline numbers."""
+        return {
+            'games': self.games,
+            'survival_rate': (self.survival.value, self.survival.interval(confidence)),
+            'means': {f: self.moments[f].mean for f in AGGREGATED_FIELDS},
+            'days_quantiles': {q: self.days_sketch.quantile(q) for q in (0.1, 0.5, 0.9)},
+            'health_quantiles': {q: self.health_sketch.quantile(q) for q in (0.1, 0.5, 0.9)},
+            'causes': dict(self.causes.most_common()),
+            'seasons': dict(self.seasons),
+            'difficulties': dict(self.difficulties),
+        }
@@ -1,106 +1,114 @@
 import random
+import re
 import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+import content
+import odds
 
 # --- Game Constants -------------------------------------------------------
-SEASONS = ['Summer', 'Fall', 'Winter', 'Spring']
-SEASON_DATA = {
-    'Summer': {
-        'base_temp': 25,
-        'hunger_mod': 0,
-        'thirst_mod': 5,
-        'health_mod': 0,
-        'trap_chance': 0.6,
-        'description': 'Hot days require more water'
-    },
-    'Fall': {
-        'base_temp': 5,
-        'hunger_mod': 2,
-        'thirst_mod': 0,
-        'health_mod': 0,
-        'trap_chance': 0.5,
-        'description': 'Mild temperatures, good for survival'
-    },
-    'Winter': {
-        'base_temp': -15,
-        'hunger_mod': 5,
-        'thirst_mod': -5,
-        'health_mod': -2,
-        'trap_chance': 0.3,
-        'description': 'Freezing nights require fire and shelter'
-    },
-    'Spring': {
-        'base_temp': 10,
-        'hunger_mod': -2,
-        'thirst_mod': 0,
-        'health_mod': 1,
-        'trap_chance': 0.7,
-        'description': 'Cool temperatures, occasional rain'
-    }
-}
+SEASONS = list(content.SEASON_NAMES)
+
+# --- Content tables -------------------------------------------------------
+# Season data, difficulty presets, enemies, shop prices and action thresholds
+# are loaded from content.json (see content.py). CONTENT is the version the
+# running game is pinned to; SEASON_DATA and DIFFICULTY_PRESETS always show
+# the newest loaded version (menus, new games). refresh_content() picks up
+# edits without touching games already in progress.
+CONTENT = content.current()
+SEASON_DATA = CONTENT.seasons
+
+def refresh_content(force=False):
+    """Make newly edited content the default for new games.
+
+    Checks the file's mtime (or reloads unconditionally with `force`) and
+    returns the newest version. An invalid file is reported, the previous
+    version kept, and None returned.
+    """
+    global SEASON_DATA, DIFFICULTY_PRESETS
+    try:
+        latest = content.reload() if force else content.refresh()
+    except content.ContentError as e:
+        say(f"Content file rejected, keeping version {content.current().version}: {e}")
+        return None
+    SEASON_DATA, DIFFICULTY_PRESETS = latest.seasons, latest.presets
+    return latest
 
 # --- Difficulty presets & runtime modifier --------------------------------
-DIFFICULTY_PRESETS = {
-	'Easy': {
-		'start_gold': 10,
-		'start_food': 3,
-		'start_water': 3,
-		'start_strength': 1,
-		'bandit_multiplier': 0.6,    # fewer/less aggressive bandits
-		'trap_success_mod': 1.2,
-		'merchant_chance_mod': 1.1
-        ,
-        # small positive bonus to player's d20 checks
-        'player_roll_bonus': 2
-	},
-	'Normal': {
-		'start_gold': 5,
-		'start_food': 1,
-		'start_water': 1,
-		'start_strength': 1,
-		'bandit_multiplier': 1.0,
-        'trap_success_mod': 1.0,
-        'merchant_chance_mod': 1.0,
-        # no change to player's d20 checks
-        'player_roll_bonus': 0
-	},
-	'Hard': {
-		'start_gold': 2,
-		'start_food': 0,
-		'start_water': 0,
-		'start_strength': 1,
-		'bandit_multiplier': 1.5,    # more/fiercer bandits
-        'trap_success_mod': 0.8,
-        'merchant_chance_mod': 0.8,
-        # small negative bonus to player's d20 checks
-        'player_roll_bonus': -2
-	},
-     'impossible': {
-		'start_gold': 0,
-		'start_food': 0,
-		'start_water': 0,
-		'start_strength': 1,
-		'bandit_multiplier': 10.0,
-        'trap_success_mod': 0.1,
-        'merchant_chance_mod': 0.1,
-        # massive negative modifier to player's d20 checks
-        'player_roll_bonus': -5
-	},
-     'HARDCORE': {
-		'start_gold': 0,
-		'start_food': 0,
-		'start_water': 0,
-		'start_strength': 1,
-		'bandit_multiplier': 100.0,
-        'trap_success_mod': 0.0,
-        'merchant_chance_mod': 0.0,
-        # massive negative modifier to player's d20 checks
-        'player_roll_bonus': -50
-	}
-}
+DIFFICULTY_PRESETS = CONTENT.presets
 
 # runtime mod (set by menu/main)
 CURRENT_DIFFICULTY = DIFFICULTY_PRESETS['Normal']
 
+# Game length / season pacing
+MAX_DAYS = 20
+DAYS_PER_SEASON = 5
+
+# Daytime action menu shown by main(); indices are what prompt_choice() returns
+ACTION_OPTIONS = [
+    "Forage (search for food/water)",
+    "Hunt (bigger risk, bigger reward)",
+    "Explore river (fish / water)",
+    "Scavenge ruins (risk of traps)",
+    "Rest (recover health)",
+    "Eat food",
+    "Drink water",
+    "Make fire (improve nights / cooking)",
+    "Set trap (passive food overnight)",
+    "Build shelter (reduce night penalties)",
+    "Craft bandage (requires cloth/herbs)",
+    "Use bandage (heal/cure effects)",
+    "Trade with merchant (if available)",
+    "Check status / Quit"
+]
+QUIT_ACTION = len(ACTION_OPTIONS) - 1
+# Short names for the same actions (used in logs, results and causes of death)
+ACTION_NAMES = [
+    'forage', 'hunt', 'explore_river', 'scavenge_ruins', 'rest', 'eat', 'drink',
+    'make_fire', 'set_trap', 'build_shelter', 'craft_bandage', 'use_bandage',
+    'trade', 'quit'
+]
+# The menu main() shows each action: the daytime actions, then the autopilot
+# and advice entries (see their sections below)
+AUTOPILOT_ACTION = len(ACTION_OPTIONS)
+ADVISE_ACTION = AUTOPILOT_ACTION + 1
+MENU_OPTIONS = ACTION_OPTIONS + [
+    "Autopilot (play routine days until something needs you)",
+    "Advise (odds of surviving after each action)",
+]
+
+# Optional override for prompt_choice(): a callable taking the options list and
+# returning a zero-based index. Headless runners (simulations, bots) set this
+# instead of feeding stdin; None means read from the keyboard.
+CHOICE_HOOK = None
+
+# Optional callable(options) that shows a prompt's numbered options instead of
+# prompt_choice() printing them, and callable(state) that shows the status
+# instead of main() printing status_line(). Used by front ends with fixed
+# menu/status panels (tui.py).
+MENU_HOOK = None
+STATUS_HOOK = None
+
+# Optional callable(result) invoked when main() ends a game (death or quit),
+# with the dict built by game_result(). Used e.g. to persist a leaderboard.
+GAME_OVER_HOOK = None
+
+# Optional callable(state) invoked once main() has built the game state, so
+# hosts (e.g. the session store) can inspect the live state dict.
+GAME_START_HOOK = None
+
+# Game output goes through say(). While the autopilot drives, MUTED_THREAD is
+# the thread playing that game and its output is dropped; other threads (e.g.
+# other sessions) still print.
+MUTED_THREAD = None
+
+def say(*args, **kwargs):
+    """print() for game output, silent in the thread the autopilot has muted."""
+    if MUTED_THREAD != threading.get_ident():
+        print(*args, **kwargs)
+
 # Add customizable debug preset defaults for the dev console
 DEFAULT_DEBUG_STATE = {
     'health': 100,
@@ -128,11 +136,26 @@ DEFAULT_DEBUG_STATE = {
 # Mutable preset that the dev console can modify
 DEV_DEBUG_PRESET = dict(DEFAULT_DEBUG_STATE)
 
+# status_line() appends the precomputed odds of surviving to MAX_DAYS when
+# this is on and an odds table has been built (python odds.py build)
+SHOW_ODDS = False
+
 # --- Utilities -------------------------------------------------------------
 def roll_dice(num_dice, sides):
     """Return the sum of rolling `num_dice` d`sides` (keeps randomness centralized)."""
     return sum(random.randint(1, sides) for _ in range(num_dice))
 
+def dice_pmf(num_dice, sides):
+    """Exact distribution of roll_dice(num_dice, sides): ((total, probability), ...)."""
+    pmf = {0: 1.0}
+    for _ in range(num_dice):
+        step = {}
+        for total, p in pmf.items():
+            for face in range(1, sides + 1):
+                step[total + face] = step.get(total + face, 0.0) + p / sides
+        pmf = step
+    return tuple(sorted(pmf.items()))
+
 
 def roll_check(num_dice=1, sides=20):
     """Roll `num_dice` d`sides` for player skill checks and apply difficulty bonus.
@@ -149,15 +172,64 @@ def roll_check(num_dice=1, sides=20):
         bonus = 0
     return base + bonus
 
+# --- Type-ahead input -----------------------------------------------------
+# Players may answer several prompts in one line ("1 6 7", "eat,drink",
+# "14 yes"). The extra answers wait in TYPE_AHEAD as (kind, answer) pairs and
+# are consumed by the following prompts of the same kind; a prompt of any
+# other kind (e.g. a surprise combat at night) discards them.
+INPUT_MACROS = {
+    'forage': '1', 'hunt': '2', 'river': '3', 'ruins': '4', 'rest': '5',
+    'eat': '6', 'drink': '7', 'fire': '8', 'trap': '9', 'shelter': '10',
+    'craft': '11', 'bandage': '12', 'trade': '13', 'status': '14', 'auto': '15',
+    'advise': '16'
+}
+CONFIRM_KIND = 'confirm'
+TYPE_AHEAD = deque()
+
+def flush_type_ahead():
+    """Drop any queued answers, telling the player what was discarded."""
+    if TYPE_AHEAD:
+        dropped = ' '.join(answer for _, answer in TYPE_AHEAD)
+        TYPE_AHEAD.clear()
+        say(f"(Something came up - discarding queued input: {dropped})")
+
+def read_input(prompt, kind=None):
+    """input() with type-ahead: return a queued answer for this kind of prompt
+    if there is one, otherwise read a line and queue any extra answers on it."""
+    if TYPE_AHEAD:
+        queued_kind, answer = TYPE_AHEAD[0]
+        if queued_kind == kind:
+            TYPE_AHEAD.popleft()
+            say(f"{prompt}{answer}")
+            return answer
+        flush_type_ahead()
+    answers = [a for a in re.split(r'[\s,;]+', input(prompt)) if a]
+    if not answers:
+        return ''
+    if kind == ACTION_OPTIONS[0]:
+        answers = [INPUT_MACROS.get(a.lower(), a) for a in answers]
+    for answer in answers[1:]:
+        TYPE_AHEAD.append((CONFIRM_KIND if answer.lower() in ('yes', 'no') else kind, answer))
+    return answers[0]
+
 def prompt_choice(options):
     """Print numbered options and return zero-based index of the chosen option."""
-    for i, opt in enumerate(options, 1):
-        print(f"{i}. {opt}")
+    if CHOICE_HOOK is not None:
+        return CHOICE_HOOK(options)
+    if ACTIVE_AUTOPILOT is not None:
+        # any prompt raised while the autopilot drives needs the player
+        stop_autopilot(AUTOPILOT_INTERRUPTS.get(options[0].split(' (')[0], "a decision is needed"))
+    if MENU_HOOK is not None:
+        MENU_HOOK(options)
+    else:
+        for i, opt in enumerate(options, 1):
+            say(f"{i}. {opt}")
     while True:
-        choice = input("> ").strip()
+        choice = read_input("> ", kind=options[0])
         if choice.isdigit() and 1 <= int(choice) <= len(options):
             return int(choice) - 1
-        print("Please enter the number of your choice.")
+        flush_type_ahead()
+        say("Please enter the number of your choice.")
 
 # --- Game logic helpers ----------------------------------------------------
 def apply_status_effects(state):
@@ -174,33 +246,35 @@ def apply_status_effects(state):
         damage = roll_dice(1, 4)
         state['health'] -= damage
         effects['poison'] -= 1
-        print(f"Poison courses through your veins (-{damage} health)")
+        say(f"Poison courses through your veins (-{damage} health)")
         if effects['poison'] <= 0:
             del effects['poison']
-            print("The poison has worn off.")
+            say("The poison has worn off.")
     
     if 'bleeding' in effects:
         damage = roll_dice(1, 3)
         state['health'] -= damage
         effects['bleeding'] -= 1
-        print(f"Your wounds continue bleeding (-{damage} health)")
+        say(f"Your wounds continue bleeding (-{damage} health)")
         if effects['bleeding'] <= 0:
             del effects['bleeding']
-            print("The bleeding has stopped.")
+            say("The bleeding has stopped.")
     
     if 'fever' in effects:
         state['thirst'] = min(100, state['thirst'] + 10)
         effects['fever'] -= 1
-        print("The fever makes you extremely thirsty")
+        say("The fever makes you extremely thirsty")
         if effects['fever'] <= 0:
             del effects['fever']
-            print("Your fever breaks.")
+            say("Your fever breaks.")
+
+def temperature_label(temp):
+    return "Freezing" if temp <= -10 else "Cold" if temp <= 0 else "Mild" if temp <= 20 else "Hot" if temp <= 30 else "Scorching"
 
 def status_line(state):
     """Enhanced status line with stats and status effects."""
     season = state.get('season', 'Summer')
-    temp = state.get('temperature', 0)
-    temp_status = "Freezing" if temp <= -10 else "Cold" if temp <= 0 else "Mild" if temp <= 20 else "Hot" if temp <= 30 else "Scorching"
+    temp_status = temperature_label(state.get('temperature', 0))
     status_effects = state.get('status_effects') or {}
     if not isinstance(status_effects, dict):
         try:
@@ -215,6 +289,8 @@ def status_line(state):
         if 'infection' not in effects_keys:
             effects_keys.append('infection')
     effects_str = f" | Effects: {', '.join(effects_keys) if effects_keys else 'None'}"
+    chance = survival_odds(state) if SHOW_ODDS else None
+    odds_str = f" | Odds: {chance:.0%}" if chance is not None else ""
     stats_str = (f"Str: {state.get('strength',1)} | "
                  f"Agi: {state.get('agility',1)} | "
                  f"End: {state.get('endurance',1)}")
@@ -223,60 +299,114 @@ def status_line(state):
             f"Food: {state.get('food',0)} | Water: {state.get('water',0)} | "
             f"{stats_str} | "
             f"Shelter: {'Yes' if state.get('shelter') else 'No'} | "
-            f"Fire: {'Yes' if state.get('fire') else 'No'}" + effects_str)
+            f"Fire: {'Yes' if state.get('fire') else 'No'}" + effects_str + odds_str)
+
+def show_status(state):
+    """Print the status line (or hand the state to STATUS_HOOK)."""
+    if STATUS_HOOK is not None:
+        STATUS_HOOK(state)
+    else:
+        say(status_line(state))
+
+def difficulty_label():
+    """Label of the running difficulty preset ('Normal' if it isn't a named preset)."""
+    for presets in (CONTENT.presets, DIFFICULTY_PRESETS):
+        for label, preset in presets.items():
+            if preset is CURRENT_DIFFICULTY:
+                return label
+    return 'Normal'
+
+def survival_odds(state, label=None):
+    """Precomputed probability (0-1) of surviving to MAX_DAYS from `state`,
+    or None if no odds table covers it. One table lookup, no simulation."""
+    try:
+        table = odds.open_table()
+        if table is None:
+            return None
+        return table.odds(label or difficulty_label(), state)
+    except Exception as e:
+        say(f"Error reading odds table: {e}")
+        return None
+
+# --- Night table -----------------------------------------------------------
+# Everything apply_night_effects() works out from the season, shelter and fire
+# alone, compiled once per content version (a new version gets a new table;
+# games pinned to an older one keep theirs). Difficulty does not enter the
+# night phase. `die` is the (num_dice, sides) roll to make, if any; `hurts`
+# says whether it is taken off health (a fire stops freezing damage, but the
+# dice are still rolled so seeded games keep their random stream) and
+# `damage_pmf` is the distribution of the damage actually taken.
+NightEffects = namedtuple('NightEffects', [
+    'temperature', 'die', 'hurts', 'message', 'damage_pmf', 'heat_thirst',
+    'hunger', 'thirst', 'health', 'hunger_penalty', 'thirst_penalty'])
+
+NIGHT_TABLES = {}  # content version -> {(season, shelter, fire): NightEffects}
+
+def compile_night_table(compiled):
+    """NightEffects for every (season, shelter, fire) under one Content version."""
+    table = {}
+    for season, data in compiled.seasons.items():
+        hunger_mod, thirst_mod, health_mod = compiled.night_mods[season]
+        for shelter in (False, True):
+            for fire in (False, True):
+                temperature = data['base_temp'] + (10 if shelter else 0) + (15 if fire else 0)
+                die, hurts, message, heat_thirst = None, False, None, 0
+                if temperature <= -10:
+                    die, hurts = (2, 6), not fire
+                    message = "The freezing cold causes {} damage!"
+                elif temperature <= 0 and not fire:
+                    die, hurts = (1, 4), True
+                    message = "The cold causes {} damage."
+                elif temperature >= 35:
+                    heat_thirst = 10
+                table[season, shelter, fire] = NightEffects(
+                    temperature=temperature, die=die, hurts=hurts, message=message,
+                    damage_pmf=dice_pmf(*die) if hurts else ((0, 1.0),),
+                    heat_thirst=heat_thirst,
+                    hunger=(10 if shelter else 15) + hunger_mod,
+                    thirst=(12 if shelter else 20) + thirst_mod,
+                    health=0 if shelter else health_mod,
+                    hunger_penalty=6 if shelter else 10,
+                    thirst_penalty=9 if shelter else 15)
+    return table
+
+def night_table(compiled=None):
+    """The night table of a Content version (default: the running CONTENT), built on first use."""
+    compiled = compiled or CONTENT
+    table = NIGHT_TABLES.get(compiled.version)
+    if table is None:
+        table = NIGHT_TABLES[compiled.version] = compile_night_table(compiled)
+    return table
 
 def apply_night_effects(state, survived_night):
     """Apply hunger/thirst increases and health penalties overnight."""
     # Apply status effects first
     apply_status_effects(state)
-    
-    season = state.get('season', 'Summer')
-    base_temp = SEASON_DATA[season]['base_temp']
-    
-    # Modify temperature based on shelter and fire
-    temp_mod = 0
-    if state['shelter']:
-        temp_mod += 10
-    if state.get('fire'):
-        temp_mod += 15
-    
-    state['temperature'] = base_temp + temp_mod
-    
+
+    night = night_table()[state.get('season', 'Summer'), bool(state['shelter']), bool(state.get('fire'))]
+    state['temperature'] = night.temperature
+
     # Temperature effects on health
-    if state['temperature'] <= -10:
-        damage = roll_dice(2, 6)
-        if not state.get('fire'):
-            state['health'] -= damage
-            print(f"The freezing cold causes {damage} damage!")
-    elif state['temperature'] <= 0:
-        if not state.get('fire'):
-            damage = roll_dice(1, 4)
+    if night.die:
+        damage = roll_dice(*night.die)
+        if night.hurts:
             state['health'] -= damage
-            print(f"The cold causes {damage} damage.")
-    elif state['temperature'] >= 35:
+            say(night.message.format(damage))
+    if night.heat_thirst:
         # Extreme heat increases thirst
-        state['thirst'] = min(100, state['thirst'] + 10)
-        print("The scorching heat increases your thirst significantly.")
-    
-    mods = {
-        'hunger': SEASON_DATA[season]['hunger_mod'],
-        'thirst': SEASON_DATA[season]['thirst_mod'],
-        'health': SEASON_DATA[season]['health_mod']
-    }
-    
+        state['thirst'] = min(100, state['thirst'] + night.heat_thirst)
+        say("The scorching heat increases your thirst significantly.")
+
     # Apply season-modified penalties
-    state['hunger'] = min(100, state['hunger'] + (15 if not state['shelter'] else 10) + mods['hunger'])
-    state['thirst'] = min(100, state['thirst'] + (20 if not state['shelter'] else 12) + mods['thirst'])
-    
-    # Season-specific health effects
-    if not state['shelter']:
-        state['health'] += mods['health']
-    
+    state['hunger'] = min(100, state['hunger'] + night.hunger)
+    state['thirst'] = min(100, state['thirst'] + night.thirst)
+    state['health'] += night.health
+
     # If player couldn't do enough during day, surviving_night False indicates extra penalty
     if state['hunger'] >= 80:
-        state['health'] -= 10 if not state['shelter'] else 6
+        state['health'] -= night.hunger_penalty
     if state['thirst'] >= 80:
-        state['health'] -= 15 if not state['shelter'] else 9
+        state['health'] -= night.thirst_penalty
     if not survived_night:
         # small random damage from wounds/exposure if action failed
         state['health'] -= roll_dice(1, 4)
@@ -290,69 +420,114 @@ def check_game_over(state, max_days):
         return True, "You succumbed to your injuries and the harsh wilds."
     return False, ""
 
+def night_death_cause(state):
+    """Best guess at what killed the player during the night phase."""
+    if state['thirst'] >= 80:
+        return 'dehydration'
+    if state['hunger'] >= 80:
+        return 'starvation'
+    if state.get('temperature', 0) <= 0 and not state.get('fire'):
+        return 'cold'
+    effects = state.get('status_effects') or {}
+    for effect in ('poison', 'bleeding'):
+        if effect in effects:
+            return effect
+    return 'exposure'
+
+def game_result(state, difficulty_label, outcome, cause=None, seed=None, max_days=MAX_DAYS):
+    """Summarise a finished game. `outcome` is 'survived', 'died' or 'quit'."""
+    alive = outcome == 'survived'
+    if alive:
+        days_survived = max_days
+    elif outcome == 'quit':
+        days_survived = max(0, state['day'] - 1)
+    else:
+        days_survived = max(0, state['day'] - 2)
+    return {
+        'difficulty': difficulty_label,
+        'outcome': outcome,
+        'seed': seed,
+        'survived': alive,
+        'days_survived': days_survived,
+        'cause': None if outcome != 'died' else (cause or 'unknown'),
+        'day': state['day'],
+        'season': state.get('season', 'Summer'),
+        'health': state['health'],
+        'hunger': state['hunger'],
+        'thirst': state['thirst'],
+        'food': state['food'],
+        'water': state['water'],
+        'gold': state.get('gold', 0),
+        'shelter': bool(state.get('shelter')),
+        'fire': bool(state.get('fire')),
+        'content': CONTENT.version,
+    }
+
 # --- Actions (easy to extend/add more) -----------------------------------
 def action_forage(state):
     """Forage for food and water. Risk small injury."""
-    print("\nYou search the nearby underbrush and streambeds for edible plants and water.")
+    say("\nYou search the nearby underbrush and streambeds for edible plants and water.")
+    limits = CONTENT.thresholds['forage']
     roll = roll_check(1, 20)
-    # success thresholds: 10+ find small food/water, 5-9 partial, <5 minor injury
-    if roll >= 15:
+    # success thresholds: full find, partial (a little food), below that a minor injury
+    if roll >= limits['success']:
         food_found = random.randint(1, 3)
         water_found = random.randint(1, 2)
         state['food'] += food_found
         state['water'] += water_found
-        print(f"Success! You find {food_found} food and {water_found} water.")
+        say(f"Success! You find {food_found} food and {water_found} water.")
         check_stat_increase(state, 'endurance')
         return True
-    elif roll >= 8:
+    elif roll >= limits['partial']:
         food_found = 1
         state['food'] += food_found
-        print("You scavenge a little food (1). No clean water found.")
+        say("You scavenge a little food (1). No clean water found.")
         return True
     else:
         wound = roll_dice(1, 6)
         state['health'] -= wound
-        print(f"You stumble and injure yourself (-{wound} health). You find nothing useful.")
+        say(f"You stumble and injure yourself (-{wound} health). You find nothing useful.")
         return False
 
 def action_hunt(state):
     """Enhanced hunting with strength bonus and stat progression."""
-    print("\nYou set traps and stalk game deeper in the woods.")
-    roll = roll_check(1, 20) + (0 if not state.get('knife') else 2) + state.get('strength', 0)
-    if roll >= 16:
+    say("\nYou set traps and stalk game deeper in the woods.")
+    limits = CONTENT.thresholds['hunt']
+    roll = roll_check(1, 20) + (0 if not state.get('knife') else limits['knife_bonus']) + state.get('strength', 0)
+    if roll >= limits['success']:
         food_found = random.randint(2, 5)
         state['food'] += food_found
-        print(f"Great hunt! You secure {food_found} food.")
+        say(f"Great hunt! You secure {food_found} food.")
         check_stat_increase(state, 'strength', 0.2)  # Higher chance for successful hunt
         return True
-    elif roll >= 9:
+    elif roll >= limits['partial']:
         food_found = 1
         state['food'] += food_found
-        print("You catch something small (1 food).")
+        say("You catch something small (1 food).")
         return True
     else:
         injury = roll_dice(1, 8)
         state['health'] -= injury
-        print(f"The hunt goes poorly and you get hurt (-{injury} health).")
+        say(f"The hunt goes poorly and you get hurt (-{injury} health).")
         return False
 
 def action_rest(state):
     """Rest to regain small amounts of health, but time passes."""
-    print("\nYou take time to rest and recover.")
+    say("\nYou take time to rest and recover.")
     heal = roll_dice(1, 6) + state.get('endurance', 1) // 2  # Endurance helps healing
     state['health'] = min(100, state['health'] + heal)
     check_stat_increase(state, 'endurance', 0.1)  # Small chance while resting
-    print(f"You recover {heal} health.")
+    say(f"You recover {heal} health.")
 
 def action_drink(state):
     """Consume stored water to reduce thirst."""
     if state['water'] > 0:
         state['water'] -= 1
         old = state['thirst']
-        state['thirst'] = max(0, state['thirst'] - 35)
-        print(f"You drink water. Thirst {old} -> {state['thirst']}.")
+        state['thirst'] = max(0, state['thirst'] - CONTENT.thresholds['drink']['relief'])
+        say(f"You drink water. Thirst {old} -> {state['thirst']}.")
         return True
-    print("No clean water to drink.")
+    say("No clean water to drink.")
     return False
 
 def action_eat(state):
@@ -360,154 +535,154 @@ def action_eat(state):
     if state['food'] > 0:
         state['food'] -= 1
         old = state['hunger']
-        state['hunger'] = max(0, state['hunger'] - 40)
-        print(f"You eat some food. Hunger {old} -> {state['hunger']}.")
+        state['hunger'] = max(0, state['hunger'] - CONTENT.thresholds['eat']['relief'])
+        say(f"You eat some food. Hunger {old} -> {state['hunger']}.")
         return True
-    print("No food to eat.")
+    say("No food to eat.")
     return False
 
 def action_build_shelter(state):
     """Attempt to build or reinforce shelter to reduce future penalties."""
     if state['shelter']:
-        print("Your shelter is already secure.")
+        say("Your shelter is already secure.")
         return True
-    print("\nYou work to build a simple shelter for the night.")
-    roll = roll_dice(1, 20) + 2
-    if roll >= 12:
+    say("\nYou work to build a simple shelter for the night.")
+    limits = CONTENT.thresholds['build_shelter']
+    roll = roll_dice(1, 20) + limits['bonus']
+    if roll >= limits['success']:
         state['shelter'] = True
-        print("You build a shelter. Nights will be less harsh now.")
+        say("You build a shelter. Nights will be less harsh now.")
         return True
     else:
-        print("Work is tiring, and the shelter is only half-built.")
+        say("Work is tiring, and the shelter is only half-built.")
         return False
 
 # --- New actions / dangers -------------------------------------------------
 def action_explore_river(state):
     """Explore the river for water, fish, or danger (slip/drown)."""
-    print("\nYou head to the river, scanning for fish and clean water.")
+    say("\nYou head to the river, scanning for fish and clean water.")
+    limits = CONTENT.thresholds['explore_river']
     roll = roll_check(1, 20)
-    if roll >= 15:
+    if roll >= limits['success']:
         food_found = random.randint(1, 3)
         water_found = random.randint(1, 3)
         state['food'] += food_found
         state['water'] += water_found
-        print(f"You catch fish and scoop fresh water: +{food_found} food, +{water_found} water.")
+        say(f"You catch fish and scoop fresh water: +{food_found} food, +{water_found} water.")
         check_stat_increase(state, 'agility')
         return True
-    elif roll >= 8:
+    elif roll >= limits['partial']:
         water_found = 1
         state['water'] += water_found
-        print("You find a clean pool and refill your water (+1).")
+        say("You find a clean pool and refill your water (+1).")
         return True
     else:
         injury = roll_dice(1, 8)
         state['health'] -= injury
-        print(f"You slip on slick rocks and injure yourself (-{injury} health).")
+        say(f"You slip on slick rocks and injure yourself (-{injury} health).")
         # small chance of losing gear
-        if random.random() < 0.12 and state.get('knife'):
+        if random.random() < limits['knife_loss_chance'] and state.get('knife'):
             state.pop('knife')
-            print("Your knife is lost to the river.")
+            say("Your knife is lost to the river.")
         return False
 
 def action_scavenge_ruins(state):
     """Search nearby ruins for supplies; traps or useful gear may be found."""
-    print("\nYou cautiously search ruins and crumbling buildings.")
-    bonus = 2 if state.get('hatchet') else 0
+    say("\nYou cautiously search ruins and crumbling buildings.")
+    limits = CONTENT.thresholds['scavenge_ruins']
+    bonus = limits['hatchet_bonus'] if state.get('hatchet') else 0
     roll = roll_check(1, 20) + bonus
-    if roll >= 16:
+    if roll >= limits['success']:
         found = random.choice(['food', 'water', 'cloth', 'bandage', 'knife', 'hatchet'])
         if found in ('food', 'water'):
             qty = random.randint(1, 3)
             state[found] += qty
-            print(f"You find {qty} {found}.")
+            say(f"You find {qty} {found}.")
         elif found == 'cloth':
             state['cloth'] = state.get('cloth', 0) + 1
-            print("You salvage some cloth (useful for bandages).")
+            say("You salvage some cloth (useful for bandages).")
         elif found == 'bandage':
             state['bandages'] = state.get('bandages', 0) + 1
-            print("You find a clean bandage.")
+            say("You find a clean bandage.")
         else:
             state[found] = True
-            print(f"You find a useful {found}.")
+            say(f"You find a useful {found}.")
         return True
-    elif roll >= 9:
+    elif roll >= limits['partial']:
         # small find
         state['food'] += 1
-        print("You scavenge a little food (1).")
+        say("You scavenge a little food (1).")
         return True
     else:
         damage = roll_dice(1, 10)
         state['health'] -= damage
         # chance of bleeding/infection
-        if random.random() < 0.4:
+        if random.random() < limits['infection_chance']:
             state['infection'] = True
-            print(f"A trap wounds you (-{damage} health) and you may be infected.")
+            say(f"A trap wounds you (-{damage} health) and you may be infected.")
         else:
-            print(f"A trap wounds you (-{damage} health).")
+            say(f"A trap wounds you (-{damage} health).")
         return False
 
 def action_craft_bandage(state):
     """Turn cloth/herbs into bandages for later use to heal bleeding or infection."""
-    print("\nYou attempt to craft bandages from cloth/herbs.")
+    say("\nYou attempt to craft bandages from cloth/herbs.")
     if state.get('cloth', 0) > 0:
         state['cloth'] -= 1
         state['bandages'] = state.get('bandages', 0) + 1
-        print("You craft a bandage from cloth.")
+        say("You craft a bandage from cloth.")
         return True
     # try to make from herbs with a skill check
     roll = roll_check(1, 20)
-    if roll >= 12:
+    if roll >= CONTENT.thresholds['craft_bandage']['success']:
         state['bandages'] = state.get('bandages', 0) + 1
-        print("You improvise a bandage from herbs.")
+        say("You improvise a bandage from herbs.")
         return True
-    print("You fail to craft a usable bandage.")
+    say("You fail to craft a usable bandage.")
     return False
 
 def action_make_fire(state):
     """Make a fire to cook food, warm the night, and improve success chances."""
-    print("\nYou attempt to make a fire.")
+    say("\nYou attempt to make a fire.")
     
     # Harder to make fire in certain conditions
+    # (wet/frozen wood in winter, dry conditions in summer)
     season = state.get('season', 'Summer')
-    season_mod = {
-        'Winter': -2,  # Wet/frozen wood
-        'Summer': 2,   # Dry conditions
-        'Spring': 0,
-        'Fall': 1
-    }[season]
+    limits = CONTENT.thresholds['make_fire']
+    season_mod = CONTENT.fire_season_mod[season]
     
-    bonus = 2 if state.get('hatchet') else 0
+    bonus = limits['hatchet_bonus'] if state.get('hatchet') else 0
     roll = roll_check(1, 20) + bonus + season_mod
     
-    if roll >= 10:
+    if roll >= limits['success']:
         state['fire'] = True
         # Fire provides immediate warmth
         state['temperature'] = max(state.get('temperature', 0), 5)  # Won't let you freeze with fire
-        print("You build a fire. Its warmth will help against the cold tonight.")
+        say("You build a fire. Its warmth will help against the cold tonight.")
         
         # Chance to cook food if you have any
         if state['food'] > 0 and random.random() < 0.3:
             state['food'] += 1
-            print("You cook your food more efficiently, making it last longer (+1 food).")
+            say("You cook your food more efficiently, making it last longer (+1 food).")
         return True
     else:
         state['fire'] = False
-        print("You fail to get a proper fire going.")
+        say("You fail to get a proper fire going.")
         return False
 
 def action_set_trap(state):
     """Set a trap to passively catch food overnight."""
     if state.get('trap_set'):
-        print("You already have a trap set.")
+        say("You already have a trap set.")
         return True
-    print("\nYou set a simple trap near trails.")
+    say("\nYou set a simple trap near trails.")
     roll = roll_check(1, 20)
-    if roll >= 8:
+    if roll >= CONTENT.thresholds['set_trap']['success']:
         state['trap_set'] = True
-        print("Trap set. You might get food in the morning.")
+        say("Trap set. You might get food in the morning.")
         return True
     else:
-        print("The trap is improperly set and likely will not work.")
+        say("The trap is improperly set and likely will not work.")
         return False
 
 def use_bandage(state):
@@ -528,23 +703,23 @@ def use_bandage(state):
         if 'bleeding' in effects:
             del effects['bleeding']
             bleeding_stopped = True
-            print("The bandage stops your bleeding.")
+            say("The bandage stops your bleeding.")
         if 'infection' in effects:
             del effects['infection']
-            print("The bandage helps clear the infection.")
+            say("The bandage helps clear the infection.")
 
         # Always clear top-level infection flag when using a bandage
         if state.get('infection'):
             state['infection'] = False
-            print("The bandage helps clear your infection.")
+            say("The bandage helps clear your infection.")
         else:
             # Force the infection flag to False even if it wasn't properly set
             state['infection'] = False
 
-        print(f"You use a bandage: health {old_health} -> {state['health']}.")
+        say(f"You use a bandage: health {old_health} -> {state['health']}.")
         return True
 
-    print("No bandages available.")
+    say("No bandages available.")
     return False
 
 def roll_attack(state, enemy):
@@ -561,9 +736,9 @@ def check_stat_increase(state, stat, chance=0.15):
             current = state.get(stat, 1)
             if current < 10:  # Cap stats at 10
                 state[stat] = current + 1
-                print(f"Your {stat} has increased to {state[stat]}!")
+                say(f"Your {stat} has increased to {state[stat]}!")
     except Exception as e:
-        print(f"Error in stat increase: {e}")
+        say(f"Error in stat increase: {e}")
 
 def validate_state(state):
     """Ensure all state values are valid."""
@@ -587,11 +762,11 @@ def validate_state(state):
         # Check for bleeding damage
         if state.get('status_effects', {}).get('bleeding'):
             state['health'] -= 5
-            print("You take 5 damage from bleeding!")
+            say("You take 5 damage from bleeding!")
             if state['health'] <= 0:
-                print("You bleed out...")
+                say("You bleed out...")
             else:
-                print(f"Health: {state['health']}")
+                say(f"Health: {state['health']}")
         
         # Ensure non-negative resources
         for key in ['food', 'water', 'bandages', 'cloth', 'gold']:
@@ -612,74 +787,84 @@ def validate_state(state):
             
         return True
     except Exception as e:
-        print(f"Error validating state: {e}")
+        say(f"Error validating state: {e}")
         return False
 
+def combat_round(state, enemy):
+    """Play one exchange of a fight: prompt, then attack or try to flee.
+
+    Returns None while the fight goes on, False once the player has fled.
+    """
+    options = ["Attack", "Try to flee"]
+    choice = prompt_choice(options)
+
+    if choice == 0:  # Attack
+        player_roll, enemy_roll = roll_attack(state, enemy)
+        say(f"You roll {player_roll} vs enemy's {enemy_roll}")
+
+        if player_roll >= enemy_roll:
+            damage = roll_dice(1, 6) + state.get('strength', 0)
+            enemy['health'] -= damage
+            say(f"You hit for {damage} damage!")
+            # Chance for special effects on critical hit
+            if player_roll >= enemy_roll + 10:
+                if random.random() < 0.3:
+                    enemy['bleeding'] = True
+                    say("Your attack causes the enemy to bleed!")
+        else:
+            damage = roll_dice(1, 6) + enemy.get('strength', 0)
+            state['health'] -= damage
+            say(f"You are hit for {damage} damage!")
+            # Enemy special attacks
+            if enemy['name'] == 'Snake':
+                if random.random() < 0.4:
+                    state.setdefault('status_effects', {})['poison'] = 3
+                    say("The snake's venom enters your bloodstream!")
+            elif enemy['name'] == 'Bear' and enemy_roll >= player_roll + 5:
+                state.setdefault('status_effects', {})['bleeding'] = 2
+                say("The bear's claws leave you bleeding!")
+    else:  # Flee
+        flee_roll = roll_dice(1, 20) + state.get('agility', 0)
+        if flee_roll >= 12:
+            check_stat_increase(state, 'agility', 0.2)
+            say("You successfully escape!")
+            return False  # Escaped
+        else:
+            damage = roll_dice(1, 4) + enemy.get('strength', 0)
+            state['health'] -= damage
+            say(f"Failed to escape! You take {damage} damage while retreating!")
+            return False  # Still escaped, but took damage
+    return None  # the fight goes on
+
 def handle_combat(state, enemy):
     """Handle combat with improved error checking."""
     try:
         # Validate enemy
         if not isinstance(enemy, dict):
-            print("Invalid enemy data")
+            say("Invalid enemy data")
             return False
         
         required_enemy = {'name': 'Unknown', 'health': 10, 'strength': 1}
         for key, default in required_enemy.items():
             enemy[key] = enemy.get(key, default)
         
-        print(f"\nA {enemy['name']} appears! ({enemy['health']} health, {enemy['strength']} strength)")
+        say(f"\nA {enemy['name']} appears! ({enemy['health']} health, {enemy['strength']} strength)")
         
         while enemy['health'] > 0 and state['health'] > 0:
-            options = ["Attack", "Try to flee"]
-            choice = prompt_choice(options)
-            
-            if choice == 0:  # Attack
-                player_roll, enemy_roll = roll_attack(state, enemy)
-                print(f"You roll {player_roll} vs enemy's {enemy_roll}")
-                
-                if player_roll >= enemy_roll:
-                    damage = roll_dice(1, 6) + state.get('strength', 0)
-                    enemy['health'] -= damage
-                    print(f"You hit for {damage} damage!")
-                    # Chance for special effects on critical hit
-                    if player_roll >= enemy_roll + 10:
-                        if random.random() < 0.3:
-                            enemy['bleeding'] = True
-                            print("Your attack causes the enemy to bleed!")
-                else:
-                    damage = roll_dice(1, 6) + enemy.get('strength', 0)
-                    state['health'] -= damage
-                    print(f"You are hit for {damage} damage!")
-                    # Enemy special attacks
-                    if enemy['name'] == 'Snake':
-                        if random.random() < 0.4:
-                            state.setdefault('status_effects', {})['poison'] = 3
-                            print("The snake's venom enters your bloodstream!")
-                    elif enemy['name'] == 'Bear' and enemy_roll >= player_roll + 5:
-                        state.setdefault('status_effects', {})['bleeding'] = 2
-                        print("The bear's claws leave you bleeding!")
-            else:  # Flee
-                flee_roll = roll_dice(1, 20) + state.get('agility', 0)
-                if flee_roll >= 12:
-                    check_stat_increase(state, 'agility', 0.2)
-                    print("You successfully escape!")
-                    return False  # Escaped
-                else:
-                    damage = roll_dice(1, 4) + enemy.get('strength', 0)
-                    state['health'] -= damage
-                    print(f"Failed to escape! You take {damage} damage while retreating!")
-                    return False  # Still escaped, but took damage
+            result = combat_round(state, enemy)
+            if result is not None:
+                return result
         
         return enemy['health'] <= 0  # True if won, False if lost/fled
     except Exception as e:
-        print(f"Combat error: {e}")
+        say(f"Combat error: {e}")
         return False
 
 def handle_bandit_encounter(state):
     """Handle a bandit encounter with options to fight, pay, or flee."""
     bandits = random.randint(1, 3)
     gold_demanded = bandits * random.randint(3, 6)
-    print(f"\n{bandits} bandits appear! They demand {gold_demanded} gold.")
+    say(f"\n{bandits} bandits appear! They demand {gold_demanded} gold.")
     
     options = ["Fight", "Pay them", "Try to flee"]
     choice = prompt_choice(options)
@@ -694,19 +879,19 @@ def handle_bandit_encounter(state):
         if victory:
             loot = random.randint(2, 5) * bandits
             state['gold'] = state.get('gold', 0) + loot
-            print(f"You defeat the bandits and find {loot} gold!")
+            say(f"You defeat the bandits and find {loot} gold!")
             if random.random() < 0.3:
                 state['knife'] = True
-                print("You also find a knife!")
+                say("You also find a knife!")
         return victory
     
     elif choice == 1:  # Pay
         if state.get('gold', 0) >= gold_demanded:
             state['gold'] -= gold_demanded
-            print(f"You pay the bandits {gold_demanded} gold. They leave you alone.")
+            say(f"You pay the bandits {gold_demanded} gold. They leave you alone.")
             return True
         else:
-            print("You don't have enough gold! The bandits attack!")
+            say("You don't have enough gold! The bandits attack!")
             enemy = {
                 'name': f"Angry Bandit Group ({bandits})",
                 'health': 10 * bandits,
@@ -717,164 +902,459 @@ def handle_bandit_encounter(state):
     else:  # Flee
         flee_roll = roll_dice(1, 20) + state.get('agility', 0)
         if flee_roll >= 12 + bandits:  # Harder to flee from more bandits
-            print("You successfully escape!")
+            say("You successfully escape!")
             return True
         else:
             damage = roll_dice(2, 4) * bandits
             state['health'] -= damage
             gold_lost = min(state.get('gold', 0), random.randint(1, 5) * bandits)
             state['gold'] = max(0, state.get('gold', 0) - gold_lost)
-            print(f"Failed to escape! You take {damage} damage and lose {gold_lost} gold!")
+            say(f"Failed to escape! You take {damage} damage and lose {gold_lost} gold!")
             return False
 
 def handle_shop(state):
     """Simple merchant interaction: buy/sell items and possibly affect merchant attitude."""
-    print("\nA traveling merchant approaches, offering a few goods.")
-    options = [
-        "Buy bandage (5 gold)",
-        "Buy water (2 gold)",
-        "Sell cloth (1 gold)",
-        "Leave"
-    ]
-    choice = prompt_choice(options)
+    say("\nA traveling merchant approaches, offering a few goods.")
+    prices = CONTENT.shop
+    choice = prompt_choice(CONTENT.shop_options)
     if choice == 0:
-        cost = 5
+        cost = prices['bandage']
         if state.get('gold', 0) >= cost:
             state['gold'] -= cost
             state['bandages'] = state.get('bandages', 0) + 1
-            print("You buy a bandage.")
+            say("You buy a bandage.")
         else:
-            print("You don't have enough gold to buy a bandage.")
+            say("You don't have enough gold to buy a bandage.")
     elif choice == 1:
-        cost = 2
+        cost = prices['water']
         if state.get('gold', 0) >= cost:
             state['gold'] -= cost
             state['water'] = state.get('water', 0) + 1
-            print("You buy a unit of water.")
+            say("You buy a unit of water.")
         else:
-            print("You don't have enough gold to buy water.")
+            say("You don't have enough gold to buy water.")
     elif choice == 2:
         if state.get('cloth', 0) > 0:
             state['cloth'] -= 1
-            state['gold'] = state.get('gold', 0) + 1
-            print("You sell a scrap of cloth for 1 gold.")
+            state['gold'] = state.get('gold', 0) + prices['cloth']
+            say(f"You sell a scrap of cloth for {prices['cloth']} gold.")
         else:
-            print("You have no cloth to sell.")
+            say("You have no cloth to sell.")
     else:
-        print("You move on from the merchant.")
+        say("You move on from the merchant.")
+
+def check_trap(state):
+	"""Resolve an overnight trap, if one was set."""
+	season = state.get('season', 'Summer')
+	# Modify trap success based on season and difficulty
+	if state.get('trap_set'):
+		# respect preset trap chance, adjusted by difficulty
+		base_chance = CONTENT.seasons[season]['trap_chance'] * CURRENT_DIFFICULTY.get('trap_success_mod', 1.0)
+		if random.random() < base_chance:
+			caught = random.randint(1, 3)
+			state['food'] += caught
+			say(f"Your trap caught {caught} food overnight.")
+		else:
+			say("Your trap caught nothing.")
+		state.pop('trap_set', None)
+
+def seasonal_hazard(state):
+	"""Season-specific night events: freezing winter nights, food spoiling in summer."""
+	season = state.get('season', 'Summer')
+	r = random.random()
+	if season == 'Winter' and r < 0.15:
+		damage = roll_dice(1, 8)
+		state['health'] -= damage
+		say(f"A freezing night causes {damage} damage!")
+	elif season == 'Summer' and r < 0.12:
+		state['food'] = max(0, state['food'] - 1)
+		say("The intense heat spoils some of your food.")
+
+def major_event(state):
+	"""Roll the night's random major event; returns its name (see danger_event)."""
+	event = 'none'
+	r = random.random()
+	if r < 0.10:
+		# merchant chance adjusted by difficulty
+		if not state.get('merchant_hostile', False) and random.random() < (0.4 * CURRENT_DIFFICULTY.get('merchant_chance_mod', 1.0)):
+			event = 'merchant'
+			handle_shop(state)
+		else:
+			# Combat encounter with chance of bandits (adjusted)
+			if random.random() < (0.3 * CURRENT_DIFFICULTY.get('bandit_multiplier', 1.0)):
+				event = 'bandits'
+				handle_bandit_encounter(state)
+			else:
+				enemy = random.choice(CONTENT.enemies)
+				event = 'combat'
+				victory = handle_combat(state, enemy.copy())
+				if victory:
+					# Rewards for winning
+					food_reward = random.randint(1, 3)
+					state['food'] += food_reward
+					say(f"You defeat the {enemy['name']} and gain {food_reward} food!")
+					# Chance to gain strength from combat
+					if random.random() < 0.2:
+						state['strength'] += 1
+						say("You feel stronger from the battle! (+1 strength)")
+	elif r < 0.18:
+		# predator attack
+		event = 'predator'
+		loss = roll_dice(1, 8)
+		state['health'] -= loss
+		if state['food'] > 0:
+			stolen = min(state['food'], random.randint(1, 2))
+			state['food'] -= stolen
+			say(f"A predator attacks! You are hurt (-{loss} health) and lose {stolen} food.")
+		else:
+			say(f"A predator attacks! You are hurt (-{loss} health).")
+	elif r < 0.25:
+		# random traveler passes
+		event = 'traveler'
+		gift = random.choice(['water', 'food', 'cloth'])
+		if gift in ('food', 'water'):
+			state[gift] += 1
+			say(f"A passing traveler leaves behind {gift} for you (+1 {gift}).")
+		else:
+			state['cloth'] = state.get('cloth',0) + 1
+			say("A passing traveler leaves a scrap of cloth.")
+	elif r < 0.30:
+		# random traveler passes
+		event = 'traveler'
+		gift = random.choice(['water', 'food', 'cloth'])
+		if gift in ('food', 'water'):
+			state[gift] += 1
+			say(f"A passing traveler leaves behind {gift} for you (+1 {gift}).")
+		else:
+			state['cloth'] = state.get('cloth',0) + 1
+			say("A passing traveler leaves a scrap of cloth.")
+	return event
+
+def infection_damage(state):
+	"""An untreated infection worsens every night."""
+	if state.get('infection'):
+		# infection worsens without treatment
+		damage = roll_dice(1, 6)
+		state['health'] -= damage
+		say(f"Your infection worsens overnight (-{damage} health).")
+
+# The night's events in order; only major_event() names the event
+NIGHT_PHASES = (check_trap, seasonal_hazard, major_event, infection_damage)
 
 def danger_event(state):
-	"""Enhanced danger event with better error handling."""
+	"""Enhanced danger event with better error handling.
+
+	Returns the name of the night's major event ('merchant', 'bandits',
+	'combat', 'predator', 'traveler' or 'none') so callers can log it.
+	"""
+	event = 'none'
 	try:
 		if not validate_state(state):
-			print("State validation failed, skipping event")
-			return
+			say("State validation failed, skipping event")
+			return event
 		
-		season = state.get('season', 'Summer')
-		
-		# Modify trap success based on season and difficulty
-		if state.get('trap_set'):
-			# respect preset trap chance, adjusted by difficulty
-			base_chance = SEASON_DATA[season]['trap_chance'] * CURRENT_DIFFICULTY.get('trap_success_mod', 1.0)
-			if random.random() < base_chance:
-				caught = random.randint(1, 3)
-				state['food'] += caught
-				print(f"Your trap caught {caught} food overnight.")
-			else:
-				print("Your trap caught nothing.")
-			state.pop('trap_set', None)
-
-		# Season-specific events
-		r = random.random()
-		if season == 'Winter' and r < 0.15:
-			damage = roll_dice(1, 8)
-			state['health'] -= damage
-			print(f"A freezing night causes {damage} damage!")
-		elif season == 'Summer' and r < 0.12:
-			state['food'] = max(0, state['food'] - 1)
-			print("The intense heat spoils some of your food.")
-
-		# Random major event
-		r = random.random()
-		if r < 0.10:
-			# merchant chance adjusted by difficulty
-			if not state.get('merchant_hostile', False) and random.random() < (0.4 * CURRENT_DIFFICULTY.get('merchant_chance_mod', 1.0)):
-				handle_shop(state)
-			else:
-				# Combat encounter with chance of bandits (adjusted)
-				if random.random() < (0.3 * CURRENT_DIFFICULTY.get('bandit_multiplier', 1.0)):
-					handle_bandit_encounter(state)
-				else:
-					enemies = [
-						{'name': 'Wolf', 'health': 12, 'strength': 2},
-						{'name': 'Bear', 'health': 20, 'strength': 4},
-						{'name': 'Hostile Survivor', 'health': 15, 'strength': 3},
-						{'name': 'Snake', 'health': 8, 'strength': 1}
-					]
-					enemy = random.choice(enemies)
-					victory = handle_combat(state, enemy.copy())
-					if victory:
-						# Rewards for winning
-						food_reward = random.randint(1, 3)
-						state['food'] += food_reward
-						print(f"You defeat the {enemy['name']} and gain {food_reward} food!")
-						# Chance to gain strength from combat
-						if random.random() < 0.2:
-							state['strength'] += 1
-							print("You feel stronger from the battle! (+1 strength)")
-		elif r < 0.18:
-			# predator attack
-			loss = roll_dice(1, 8)
-			state['health'] -= loss
-			if state['food'] > 0:
-				stolen = min(state['food'], random.randint(1, 2))
-				state['food'] -= stolen
-				print(f"A predator attacks! You are hurt (-{loss} health) and lose {stolen} food.")
-			else:
-				print(f"A predator attacks! You are hurt (-{loss} health).")
-		elif r < 0.25:
-			# random traveler passes
-			gift = random.choice(['water', 'food', 'cloth'])
-			if gift in ('food', 'water'):
-				state[gift] += 1
-				print(f"A passing traveler leaves behind {gift} for you (+1 {gift}).")
-			else:
-				state['cloth'] = state.get('cloth',0) + 1
-				print("A passing traveler leaves a scrap of cloth.")
-		elif r < 0.30:
-			# random traveler passes
-			gift = random.choice(['water', 'food', 'cloth'])
-			if gift in ('food', 'water'):
-				state[gift] += 1
-				print(f"A passing traveler leaves behind {gift} for you (+1 {gift}).")
-			else:
-				state['cloth'] = state.get('cloth',0) + 1
-				print("A passing traveler leaves a scrap of cloth.")
-				
-		# Always check for infection damage
-		if state.get('infection'):
-			# infection worsens without treatment
-			damage = roll_dice(1, 6)
-			state['health'] -= damage
-			print(f"Your infection worsens overnight (-{damage} health).")
+		for phase in NIGHT_PHASES:
+			event = phase(state) or event
+		return event
 	except Exception as e:
-		print(f"Error in danger_event: {e}")
+		say(f"Error in danger_event: {e}")
 		state.setdefault('status_effects', {})
-		return
+		return event
+
+# --- Day structure helpers (shared by main() and headless runners) -------
+RISKY_ACTIONS = {
+    0: action_forage,
+    1: action_hunt,
+    2: action_explore_river,
+    3: action_scavenge_ruins,
+}
+SIMPLE_ACTIONS = {
+    4: action_rest,
+    5: action_eat,
+    6: action_drink,
+    7: action_make_fire,
+    8: action_set_trap,
+    9: action_build_shelter,
+    10: action_craft_bandage,
+    11: use_bandage,
+    12: handle_shop,
+}
+
+def new_game_state(preset):
+    """Build the normal starting state with a difficulty preset's starting bonuses applied."""
+    # Enhanced initial state
+    state = {
+        'health': 100,
+        'hunger': 10,
+        'thirst': 10,
+        'food': 1,
+        'water': 1,
+        'shelter': False,
+        'day': 1,
+        'season': 'Summer',
+        'temperature': 25,
+        'fire': False,
+        'bandages': 0,
+        'cloth': 0,
+        'strength': 1,
+        'agility': 1,
+        'endurance': 1,
+        'status_effects': {},
+        'infection': False,  # Explicitly initialize infection status
+        'gold': 5,  # Starting gold
+        'merchant_hostile': False  # Tracks if you've angered merchants
+    }
+    # Apply difficulty starting bonuses
+    state['gold'] = preset.get('start_gold', state.get('gold', 0))
+    state['food'] = state.get('food', 0) + preset.get('start_food', 0)
+    state['water'] = state.get('water', 0) + preset.get('start_water', 0)
+    state['strength'] = max(1, state.get('strength', 1) + preset.get('start_strength', 0))
+    return state
+
+def perform_action(state, choice):
+    """Run daytime action `choice` (index into ACTION_OPTIONS, quit excluded).
+
+    Returns False only when a risky action failed and left the player at 0
+    health, which main() treats as "did not survive the day" for the night.
+    """
+    if choice in RISKY_ACTIONS:
+        ok = RISKY_ACTIONS[choice](state)
+        return ok or state['health'] > 0
+    SIMPLE_ACTIONS[choice](state)
+    return True
+
+def update_season(state):
+    """Set state['season'] from the day number. Returns True on the first day of a season."""
+    current_season_idx = ((state['day'] - 1) // DAYS_PER_SEASON) % len(SEASONS)
+    state['season'] = SEASONS[current_season_idx]
+    return state['day'] % DAYS_PER_SEASON == 1
+
+def roll_item_discovery(state):
+    """Small chance to find an abandoned tool at the end of a day."""
+    if random.random() < 0.08:
+        found = random.choice(['knife', 'hatchet'])
+        state[found] = True
+        say(f"You discover an abandoned {found}! It may help future actions.")
+        return found
+    return None
+
+# --- Autopilot -------------------------------------------------------------
+# Picking "Autopilot" at the action menu plays the following days with a
+# routine (a list of actions repeated in order) or, with no routine,
+# AUTOPILOT_POLICY / the built-in routine_action() policy. Routine output is
+# suppressed; control returns to the player with a one-paragraph summary as
+# soon as something needs attention: low health, a combat/bandit/merchant
+# prompt at night, a new season, a new status effect, or the requested number
+# of days is done.
+AUTOPILOT_MIN_HEALTH = 40
+AUTOPILOT_INTERRUPTS = {
+    'Attack': "something attacked you",
+    'Fight': "bandits are demanding your gold",
+    'Buy bandage': "a merchant is offering goods",
+}
+ACTIVE_AUTOPILOT = None
+# Optional callable(state) returning the autopilot's next action (index into
+# ACTION_OPTIONS) or None to leave it to routine_action(). Set by hosts, e.g.
+# to a rule file's decider (`python rulebook.py game bot.rules`).
+AUTOPILOT_POLICY = None
+
+def routine_action(state):
+    """Built-in routine: keep fed and watered, fortify, then gather.
+
+    Returns an index into ACTION_OPTIONS (never the quit option).
+    """
+    effects = state.get('status_effects') or {}
+    if state.get('bandages', 0) > 0 and (state.get('infection') or 'bleeding' in effects
+                                         or state['health'] < 40):
+        return 11
+    if state['thirst'] >= 50 and state['water'] > 0:
+        return 6
+    if state['hunger'] >= 50 and state['food'] > 0:
+        return 5
+    if not state.get('fire') and state.get('season') in ('Fall', 'Winter'):
+        return 7
+    if not state.get('shelter'):
+        return 9
+    if state['health'] < 50:
+        return 4
+    if state['water'] < 2:
+        return 2
+    return 0
+
+def parse_autopilot_args(words):
+    """Parse autopilot arguments such as ['3d', 'forage', 'drink'] into (days, routine).
+
+    `Nd` limits the run to N days; every other word is an action number or
+    input macro. Raises ValueError on anything else.
+    """
+    days, routine = None, []
+    for word in words:
+        word = word.lower()
+        if word.endswith('d') and word[:-1].isdigit() and int(word[:-1]) > 0:
+            days = int(word[:-1])
+            continue
+        word = INPUT_MACROS.get(word, word)
+        if not (word.isdigit() and 1 <= int(word) <= QUIT_ACTION):
+            raise ValueError(f"'{word}' is not a daytime action")
+        routine.append(int(word) - 1)
+    return days, routine
+
+def effect_names(state):
+    names = set(state.get('status_effects') or {})
+    if state.get('infection'):
+        names.add('infection')
+    return names
+
+def start_autopilot(state):
+    """Read autopilot arguments (queued type-ahead or a new line) and engage it.
+
+    Returns False if the arguments were invalid.
+    """
+    global ACTIVE_AUTOPILOT, MUTED_THREAD
+    if TYPE_AHEAD:
+        words = [answer for _, answer in TYPE_AHEAD]
+        TYPE_AHEAD.clear()
+    else:
+        words = re.split(r'[\s,;]+', input(
+            "Autopilot routine, e.g. 'forage drink 3d' (blank = built-in routine "
+            "until something needs you): "))
+    try:
+        days, routine = parse_autopilot_args(w for w in words if w)
+    except ValueError as e:
+        say(f"Autopilot not started: {e}.")
+        return False
+    ACTIVE_AUTOPILOT = {
+        'state': state,
+        'days_left': days,
+        'routine': routine,
+        'step': 0,
+        'days': 0,
+        'actions': {},
+        'events': [],
+        'effects': effect_names(state),
+        'start': {k: state[k] for k in ('day', 'health', 'food', 'water')},
+    }
+    say("Autopilot engaged...")
+    MUTED_THREAD = threading.get_ident()
+    return True
+
+def autopilot_action(state):
+    """Next daytime action chosen by the active autopilot."""
+    auto = ACTIVE_AUTOPILOT
+    if auto['routine']:
+        choice = auto['routine'][auto['step'] % len(auto['routine'])]
+        auto['step'] += 1
+    else:
+        choice = AUTOPILOT_POLICY(state) if AUTOPILOT_POLICY is not None else None
+        if choice is None:
+            choice = routine_action(state)
+    auto['actions'][ACTION_NAMES[choice]] = auto['actions'].get(ACTION_NAMES[choice], 0) + 1
+    return choice
+
+def check_autopilot(state):
+    """Stop the autopilot if health is low or a new status effect appeared."""
+    if ACTIVE_AUTOPILOT is None:
+        return
+    current = effect_names(state)
+    new = current - ACTIVE_AUTOPILOT['effects']
+    ACTIVE_AUTOPILOT['effects'] = current
+    if new:
+        stop_autopilot(f"you now suffer from {', '.join(sorted(new))}")
+    elif state['health'] < AUTOPILOT_MIN_HEALTH:
+        stop_autopilot(f"your health is down to {state['health']}")
+
+def autopilot_night_done(state, event):
+    """Count a finished day; stop once the requested number of days is played."""
+    auto = ACTIVE_AUTOPILOT
+    if auto is None:
+        return
+    auto['days'] += 1
+    if event not in (None, 'none'):
+        auto['events'].append(event)
+    if auto['days_left'] is not None:
+        auto['days_left'] -= 1
+        if auto['days_left'] <= 0:
+            stop_autopilot(f"the {auto['days']} requested day(s) are done")
+            return
+    check_autopilot(state)
+
+def stop_autopilot(reason):
+    """Give control back to the player with a one-paragraph summary."""
+    global ACTIVE_AUTOPILOT, MUTED_THREAD
+    auto, ACTIVE_AUTOPILOT = ACTIVE_AUTOPILOT, None
+    if auto is None:
+        return
+    MUTED_THREAD = None
+    state, start = auto['state'], auto['start']
+    actions = ", ".join(f"{name.replace('_', ' ')} x{n}" for name, n in auto['actions'].items())
+    summary = (f"Autopilot played {auto['days']} full day(s) from day {start['day']} to day {state['day']}"
+               f" ({actions or 'no actions'}). Health {start['health']} -> {state['health']}, "
+               f"food {start['food']} -> {state['food']}, water {start['water']} -> {state['water']}.")
+    if auto['events']:
+        summary += f" Night events: {', '.join(auto['events'])}."
+    say(f"\n{summary} Stopped because {reason}.")
+
+# --- Advice ----------------------------------------------------------------
+# Picking "Advise" at the action menu shows every action's odds of surviving
+# to MAX_DAYS, estimated by rollouts on a process pool. ADVISOR_FACTORY is a
+# callable() returning a new advisor (advisor.Advisor), installed by hosts
+# that offer advice (`python advisor.py --game`); without one the menu has no
+# Advise entry. The advisor starts on the first request of a game; from then
+# on each action menu prefetches advice while the player reads it, so later
+# requests are usually answered from its cache. ADVISOR belongs to the game
+# being played: hosts running several games in one process (sessions.py) swap
+# it per game, and set REPLAYING while they replay a logged game, so advice
+# asked for in the log starts no workers.
+ADVISOR_FACTORY = None
+ADVISOR = None
+REPLAYING = False
+
+def menu_options():
+    """The action menu as shown: MENU_OPTIONS, less Advise when no advisor can be made."""
+    return MENU_OPTIONS if ADVISOR_FACTORY is not None else MENU_OPTIONS[:ADVISE_ACTION]
+
+def show_advice(state, actions_left):
+    """Print every action's odds of surviving from the current position."""
+    global ADVISOR
+    if REPLAYING or ADVISOR_FACTORY is None:
+        return
+    if ADVISOR is None:
+        ADVISOR = ADVISOR_FACTORY()
+        say("Starting the advisor (the first estimate takes a few seconds)...")
+    start = time.perf_counter()
+    try:
+        advice, source = ADVISOR.advise(state, actions_left, CURRENT_DIFFICULTY, CONTENT)
+    except Exception as e:
+        say(f"Advice unavailable: {e}")
+        return
+    say(ADVISOR.describe(advice, source, time.perf_counter() - start))
+
+def prefetch_advice(state, actions_left):
+    """Start estimating advice for this menu in the background (once the advisor is running)."""
+    if ADVISOR is not None:
+        ADVISOR.prefetch(state, actions_left, CURRENT_DIFFICULTY, CONTENT)
+
+def close_advice():
+    """Stop the advisor's workers at the end of a game (main() does this)."""
+    global ADVISOR
+    running, ADVISOR = ADVISOR, None
+    if running is not None:
+        running.close()
 
 # --- Main menu & main() integration ---------------------------------------
 def main_menu():
 	"""Show main menu and allow difficulty configuration before starting the game."""
-	print("=== Survival Text Game ===")
+	say("=== Survival Text Game ===")
 	# Secret code to open developer console at main menu (hidden):
 	DEV_CONSOLE_CODE = "developermode"
 	difficulty = 'Normal'
 	while True:
-		print("\nMain Menu")
+		refresh_content()  # new games use the newest content file
+		say("\nMain Menu")
 		options = [f"Start Game (Difficulty: {difficulty})", "Change Difficulty", "Quit"]
 		# Print options but read raw input first to allow secret code
 		for i, opt in enumerate(options, 1):
-			print(f"{i}. {opt}")
+			say(f"{i}. {opt}")
 		# Read raw input so the developer console can be triggered by a secret phrase
 		raw = input("#> ").strip()
 		if raw.lower() == DEV_CONSOLE_CODE:
@@ -885,7 +1365,7 @@ def main_menu():
 		if raw.isdigit() and 1 <= int(raw) <= len(options):
 			choice = int(raw) - 1
 		else:
-			print("Please enter the number of your choice.")
+			say("Please enter the number of your choice.")
 			continue
 
 		if choice == 0:
@@ -897,12 +1377,12 @@ def main_menu():
 		elif choice == 1:
 			# choose difficulty
 			opts = list(DIFFICULTY_PRESETS.keys())
-			print("\nChoose difficulty:")
+			say("\nChoose difficulty:")
 			idx = prompt_choice(opts)
 			difficulty = opts[idx]
-			print(f"Difficulty set to {difficulty}")
+			say(f"Difficulty set to {difficulty}")
 		else:
-			print("Goodbye.")
+			say("Goodbye.")
 			sys.exit(0)
 
 
@@ -920,11 +1400,13 @@ def dev_console():
 	  debug_list           List editable keys in the debug preset
 	  debug_set <k> <v>    Set key k to value v in the debug preset (ints/bools parsed)
 	  debug_reset          Reset the debug preset to defaults
+	  reload               Reload the content file (seasons, presets, enemies...)
+	  odds [on|off]        Show survival odds for the debug preset, or toggle them in the status line
 	  exit                 Return to main menu
 
 	This console is intentionally minimal and only intended for developers.
 	"""
-	print("\n[Dev Console] Type 'help' for commands. Type 'exit' to return.")
+	say("\n[Dev Console] Type 'help' for commands. Type 'exit' to return.")
 	while True:
 		cmd = input("dev> ").strip()
 		if not cmd:
@@ -947,93 +1429,103 @@ def dev_console():
 				return val_str
 
 		if c == 'help':
-			print(dev_console.__doc__)
+			say(dev_console.__doc__)
 		elif c == 'list':
-			print("Globals: DIFFICULTY_PRESETS, CURRENT_DIFFICULTY")
+			say("Globals: DIFFICULTY_PRESETS, CURRENT_DIFFICULTY, SEASON_DATA, CONTENT")
 		elif c == 'show' and len(parts) > 1:
 			name = parts[1]
 			val = globals().get(name)
-			print(f"{name} = {val}")
+			say(f"{name} = {val}")
 		elif c == 'set_diff' and len(parts) > 1:
 			label = parts[1]
 			if label in DIFFICULTY_PRESETS:
 				globals()['CURRENT_DIFFICULTY'] = DIFFICULTY_PRESETS[label]
-				print(f"CURRENT_DIFFICULTY set to preset '{label}'")
+				say(f"CURRENT_DIFFICULTY set to preset '{label}'")
 			else:
-				print(f"Unknown difficulty label: {label}")
+				say(f"Unknown difficulty label: {label}")
 		elif c == 'start_debug':
 			# Start a quick game with the current DEV_DEBUG_PRESET (copy to avoid mutations)
-			print("Starting debug game with current debug preset...")
+			say("Starting debug game with current debug preset...")
 			_debug_state = dict(DEV_DEBUG_PRESET)
 			# allow the preset to specify which difficulty label to use
 			difficulty_label = _debug_state.pop('difficulty', 'Normal')
 			try:
 				main(difficulty_label, initial_state=_debug_state)
 			except Exception as e:
-				print(f"Error running debug game: {e}")
-			print("Returned from debug game.")
+				say(f"Error running debug game: {e}")
+			say("Returned from debug game.")
 		elif c == 'debug_show':
-			print("Current debug preset:")
+			say("Current debug preset:")
 			for k, v in DEV_DEBUG_PRESET.items():
-				print(f"  {k}: {v}")
+				say(f"  {k}: {v}")
 		elif c == 'debug_list':
-			print("Editable debug preset keys:")
+			say("Editable debug preset keys:")
 			for k in sorted(DEV_DEBUG_PRESET.keys()):
-				print(f"  {k}")
+				say(f"  {k}")
 		elif c == 'debug_set' and len(parts) >= 3:
 			key = parts[1]
 			val = " ".join(parts[2:])
 			parsed = _parse_value(val)
 			DEV_DEBUG_PRESET[key] = parsed
-			print(f"Set debug preset '{key}' = {parsed!r}")
+			say(f"Set debug preset '{key}' = {parsed!r}")
 		elif c == 'debug_reset':
 			DEV_DEBUG_PRESET.clear()
 			DEV_DEBUG_PRESET.update(DEFAULT_DEBUG_STATE)
-			print("Debug preset reset to defaults.")
+			say("Debug preset reset to defaults.")
+		elif c == 'reload':
+			old = DIFFICULTY_PRESETS
+			latest = refresh_content(force=True)
+			if latest is None:
+				continue
+			if DIFFICULTY_PRESETS is not old:
+				# keep set_diff's choice pointing at the reloaded preset
+				for label, preset in old.items():
+					if preset is CURRENT_DIFFICULTY and label in latest.presets:
+						globals()['CURRENT_DIFFICULTY'] = latest.presets[label]
+			say(f"Content version {latest.version} loaded from {latest.path}; "
+			      "games already running keep the version they started with.")
+		elif c == 'odds':
+			if len(parts) > 1 and parts[1].lower() in ('on', 'off'):
+				globals()['SHOW_ODDS'] = parts[1].lower() == 'on'
+				say(f"Status line odds {'on' if SHOW_ODDS else 'off'}.")
+				continue
+			label = DEV_DEBUG_PRESET.get('difficulty', 'Normal')
+			chance = survival_odds(DEV_DEBUG_PRESET, label)
+			if chance is None:
+				say("No odds table for that difficulty. Build one with: python odds.py build")
+			else:
+				table = odds.open_table()
+				stale = " (built for other content)" if table.meta.get('content') != CONTENT.version else ""
+				say(f"Debug preset ({label}, day {DEV_DEBUG_PRESET.get('day', 1)}): "
+				      f"{chance:.0%} chance to survive {MAX_DAYS} days{stale}")
 		elif c == 'exit':
-			print("Exiting dev console.")
+			say("Exiting dev console.")
 			return
 		else:
-			print("Unknown command. Type 'help' for a list of commands.")
+			say("Unknown command. Type 'help' for a list of commands.")
 
 # adjust main signature to accept difficulty (only minimal changes here)
-def main(difficulty_label='Normal', initial_state=None):
-    # Configuration
-    MAX_DAYS = 20
-    DAYS_PER_SEASON = 5
-
+def main(difficulty_label='Normal', initial_state=None, seed=None, content_version=None):
+    """Play one game; however it ends, the advisor's workers are stopped."""
+    try:
+        _play(difficulty_label, initial_state, seed, content_version)
+    finally:
+        close_advice()
+
+def _play(difficulty_label, initial_state, seed, content_version):
+    # Pin this game to one version of the content tables: the newest one, or
+    # `content_version` when replaying a game that started on an older file.
+    global CURRENT_DIFFICULTY, CONTENT
+    if content_version is None:
+        CONTENT = refresh_content() or content.current()
+    else:
+        CONTENT = content.get(content_version)
+    presets = CONTENT.presets
     # If an initial_state is provided (e.g. from dev console), use it.
     # Otherwise construct the normal starting state and apply the chosen difficulty.
-    global CURRENT_DIFFICULTY
     if initial_state is None:
-        # Enhanced initial state
-        state = {
-            'health': 100,
-            'hunger': 10,
-            'thirst': 10,
-            'food': 1,
-            'water': 1,
-            'shelter': False,
-            'day': 1,
-            'season': 'Summer',
-            'temperature': 25,
-            'fire': False,
-            'bandages': 0,
-            'cloth': 0,
-            'strength': 1,
-            'agility': 1,
-            'endurance': 1,
-            'status_effects': {},
-            'infection': False,  # Explicitly initialize infection status
-            'gold': 5,  # Starting gold
-            'merchant_hostile': False  # Tracks if you've angered merchants
-        }
-        # Apply difficulty starting bonuses
-        preset = DIFFICULTY_PRESETS.get(difficulty_label, DIFFICULTY_PRESETS['Normal'])
-        state['gold'] = preset.get('start_gold', state.get('gold', 0))
-        state['food'] = state.get('food', 0) + preset.get('start_food', 0)
-        state['water'] = state.get('water', 0) + preset.get('start_water', 0)
-        state['strength'] = max(1, state.get('strength', 1) + preset.get('start_strength', 0))
+        preset = presets.get(difficulty_label, presets['Normal'])
+        state = new_game_state(preset)
         # set runtime difficulty mod
         CURRENT_DIFFICULTY = preset
     else:
@@ -1041,116 +1533,102 @@ def main(difficulty_label='Normal', initial_state=None):
         # so modifications won't leak into dev_console's local dict accidentally.
         state = dict(initial_state)
         # Respect/override difficulty if label provided
-        preset = DIFFICULTY_PRESETS.get(difficulty_label, CURRENT_DIFFICULTY)
+        preset = presets.get(difficulty_label, CURRENT_DIFFICULTY)
         CURRENT_DIFFICULTY = preset
 
-    print("Welcome to the Survival Text Game.")
-    print(f"Survive for {MAX_DAYS} days through changing seasons.")
-    print("\nYour starting stats:")
-    print(f"Strength: {state['strength']} (combat, hunting)")
-    print(f"Agility: {state['agility']} (fleeing, movement)")
-    print(f"Endurance: {state['endurance']} (survival, health)")
-    print("Each season brings different temperatures:")
-    for season, data in SEASON_DATA.items():
-        print(f"{season}: {data['description']}")
-    print("\nTip: Fire is crucial for survival in cold weather!")
+    # Seed the RNG so a finished run can be reproduced/recorded
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    random.seed(seed)
+    cause = None  # what took health to 0, for the end-of-game summary
+    TYPE_AHEAD.clear()
+    if GAME_START_HOOK is not None:
+        GAME_START_HOOK(state)
+
+    say("Welcome to the Survival Text Game.")
+    say(f"Survive for {MAX_DAYS} days through changing seasons.")
+    say("\nYour starting stats:")
+    say(f"Strength: {state['strength']} (combat, hunting)")
+    say(f"Agility: {state['agility']} (fleeing, movement)")
+    say(f"Endurance: {state['endurance']} (survival, health)")
+    say("Each season brings different temperatures:")
+    for season, data in CONTENT.seasons.items():
+        say(f"{season}: {data['description']}")
+    say("\nTip: Fire is crucial for survival in cold weather!")
 
     while True:
         try:
+            before = state['health']
             validate_state(state)  # Now uses global validate_state function
+            if before > 0 >= state['health']:
+                cause = 'bleeding'
 
             # Update season
-            current_season_idx = ((state['day'] - 1) // DAYS_PER_SEASON) % len(SEASONS)
-            state['season'] = SEASONS[current_season_idx]
-
-            if state['day'] % DAYS_PER_SEASON == 1:
-                print(f"\nThe {state['season']} season has arrived!")
-
-            print("\n" + "=" * 60)
-            print(status_line(state))
-            print("-" * 60)
+            if update_season(state):
+                if ACTIVE_AUTOPILOT is not None:
+                    stop_autopilot(f"the {state['season']} season has arrived")
+                say(f"\nThe {state['season']} season has arrived!")
+
+            say("\n" + "=" * 60)
+            show_status(state)
+            say("-" * 60)
             # Each day the player gets two daytime actions (choice/extendable)
             actions_left = 2
             survived_day = True  # set False if a serious failure happens
 
             while actions_left > 0:
-                print(f"\nActions left this day: {actions_left}")
-                options = [
-                    "Forage (search for food/water)",
-                    "Hunt (bigger risk, bigger reward)",
-                    "Explore river (fish / water)",
-                    "Scavenge ruins (risk of traps)",
-                    "Rest (recover health)",
-                    "Eat food",
-                    "Drink water",
-                    "Make fire (improve nights / cooking)",
-                    "Set trap (passive food overnight)",
-                    "Build shelter (reduce night penalties)",
-                    "Craft bandage (requires cloth/herbs)",
-                    "Use bandage (heal/cure effects)",
-                    "Trade with merchant (if available)",
-                    "Check status / Quit"
-                ]
-                choice = prompt_choice(options)
-
-                # Update choice handling to match new options list
-                if choice == 0:
-                    ok = action_forage(state)
-                    if not ok and state['health'] <= 0:
-                        survived_day = False
-                elif choice == 1:
-                    ok = action_hunt(state)
-                    if not ok and state['health'] <= 0:
-                        survived_day = False
-                elif choice == 2:
-                    ok = action_explore_river(state)
-                    if not ok and state['health'] <= 0:
-                        survived_day = False
-                elif choice == 3:
-                    ok = action_scavenge_ruins(state)
-                    if not ok and state['health'] <= 0:
+                say(f"\nActions left this day: {actions_left}")
+                if ACTIVE_AUTOPILOT is not None:
+                    choice = autopilot_action(state)
+                else:
+                    prefetch_advice(state, actions_left)
+                    choice = prompt_choice(menu_options())
+                if choice == AUTOPILOT_ACTION:
+                    start_autopilot(state)
+                    continue
+                if choice == ADVISE_ACTION:
+                    show_advice(state, actions_left)
+                    continue
+
+                if choice != QUIT_ACTION:
+                    before = state['health']
+                    if not perform_action(state, choice):
                         survived_day = False
-                elif choice == 4:
-                    action_rest(state)
-                elif choice == 5:
-                    action_eat(state)
-                elif choice == 6:
-                    action_drink(state)
-                elif choice == 7:
-                    action_make_fire(state)
-                elif choice == 8:
-                    action_set_trap(state)
-                elif choice == 9:
-                    action_build_shelter(state)
-                elif choice == 10:
-                    action_craft_bandage(state)
-                elif choice == 11:
-                    use_bandage(state)
-                elif choice == 12:
-                    handle_shop(state)
+                    if before > 0 >= state['health']:
+                        cause = ACTION_NAMES[choice]
+                    check_autopilot(state)
                 else:
                     # check inventory and possibility to quit
-                    print(status_line(state))
-                    print(f"Items: bandages={state.get('bandages',0)}, cloth={state.get('cloth',0)}, "
+                    show_status(state)
+                    say(f"Items: bandages={state.get('bandages',0)}, cloth={state.get('cloth',0)}, "
                           f"knife={state.get('knife',False)}, hatchet={state.get('hatchet',False)}, "
                           f"gold={state.get('gold',0)}")
-                    confirm = input("Quit game? (yes/no) ").strip().lower()
+                    confirm = read_input("Quit game? (yes/no) ", kind=CONFIRM_KIND).lower()
                     if confirm == "yes":
-                        print("You choose to give up. Game over.")
+                        say("You choose to give up. Game over.")
+                        if GAME_OVER_HOOK is not None:
+                            GAME_OVER_HOOK(game_result(state, difficulty_label, 'quit', seed=seed))
                         sys.exit(0)
                 actions_left -= 1
 
                 # Quick death check mid-day
                 if state['health'] <= 0:
-                    print("You have collapsed from your injuries.")
+                    say("You have collapsed from your injuries.")
                     break
 
             # Night falls: apply increases/penalties
             try:
+                before = state['health']
                 apply_night_effects(state, survived_day)
-                danger_event(state)
+                if before > 0 >= state['health']:
+                    cause = night_death_cause(state)
+                before = state['health']
+                event = danger_event(state)
+                if before > 0 >= state['health']:
+                    cause = 'night event'
             except Exception as e:
-                print(f"Error during night phase: {e}")
+                stop_autopilot("something went wrong during the night")
+                say(f"Error during night phase: {e}")
                 state['status_effects'] = {}  # Reset status effects if corrupted
                 continue
 
@@ -1158,27 +1636,29 @@ def main(difficulty_label='Normal', initial_state=None):
             state['day'] += 1
             over, message = check_game_over(state, MAX_DAYS)
             if over:
-                print("\n" + "=" * 60)
-                print(message)
-                print("Final status:", status_line(state))
-                print("Thank you for playing.")
+                stop_autopilot("you did not make it")
+                say("\n" + "=" * 60)
+                say(message)
+                say("Final status:", status_line(state))
+                say("Thank you for playing.")
+                if GAME_OVER_HOOK is not None:
+                    GAME_OVER_HOOK(game_result(state, difficulty_label, 'died', cause, seed))
                 break
 
             # Inform player of end-of-day results
-            print("\nNight passes...")
-            print(status_line(state))
+            say("\nNight passes...")
+            show_status(state)
+            autopilot_night_done(state, event)
 
             # small chance to find an item in ruins/area as random event (kept for backward compatibility)
-            if random.random() < 0.08:
-                found = random.choice(['knife', 'hatchet'])
-                state[found] = True
-                print(f"You discover an abandoned {found}! It may help future actions.")
+            roll_item_discovery(state)
 
         except Exception as e:
-            print(f"Error in game loop: {e}")
-            print("Attempting to recover...")
+            stop_autopilot("something went wrong")
+            say(f"Error in game loop: {e}")
+            say("Attempting to recover...")
             if not validate_state(state):
-                print("Fatal error - game state corrupted")
+                say("Fatal error - game state corrupted")
                 break
             continue
 
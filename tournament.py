@@ -0,0 +1,142 @@
+"""Round-robin tournament of the reference bots on every difficulty preset.
+
+Every bot in simulation.POLICIES plays every difficulty with the same game
+seeds (game i of a difficulty is seeded with simulation.game_seed(seed,
+difficulty, i) whichever bot plays it). Games are played in chunks on a
+process pool, so all cores are busy, and only each chunk's aggregator comes
+back.
+
+Bots are ranked per difficulty by survival rate (Wilson interval), then by
+mean days survived, and overall by their survival rate averaged over the
+difficulties. Throughput is games per CPU-second of the workers that
+played them.
+
+    python tournament.py --games 2000 --workers 4
+    python tournament.py --bots heuristic fortify cautious --difficulty Normal Hard
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import simulation
+import survival
+from stats import SimulationAggregator, wilson_interval
+
+
+class Entry:
+    """One bot's results on one difficulty."""
+
+    def __init__(self, bot, difficulty):
+        self.bot = bot
+        self.difficulty = difficulty
+        self.agg = SimulationAggregator(survival.MAX_DAYS)
+        self.cpu = 0.0
+
+    @property
+    def survival(self):
+        return self.agg.survival.value
+
+    @property
+    def days(self):
+        return self.agg.moments['days_survived'].mean
+
+
+def _play_chunk(task):
+    bot, difficulty, start, stop, seed = task
+    cpu = time.process_time()
+    agg = simulation.simulate_range(difficulty, start, stop, seed, simulation.POLICIES[bot])
+    return bot, difficulty, agg, time.process_time() - cpu
+
+
+def run_tournament(bots=None, difficulties=None, games=1000, seed=0, workers=None, chunk=250,
+                   progress=None):
+    """Play `games` games per bot per difficulty; returns {(bot, difficulty): Entry}."""
+    bots = list(bots or simulation.POLICIES)
+    difficulties = list(difficulties or survival.DIFFICULTY_PRESETS)
+    unknown = [b for b in bots if b not in simulation.POLICIES]
+    if unknown:
+        raise ValueError(f"Unknown bot(s): {', '.join(unknown)}")
+    entries = {(b, d): Entry(b, d) for b in bots for d in difficulties}
+    tasks = [(b, d, lo, min(games, lo + chunk), seed)
+             for d in difficulties for lo in range(0, games, chunk) for b in bots]
+    with multiprocessing.Pool(workers or os.cpu_count()) as pool:
+        for bot, difficulty, agg, cpu in pool.imap_unordered(_play_chunk, tasks):
+            entry = entries[bot, difficulty]
+            entry.agg.merge(agg)
+            entry.cpu += cpu
+            if progress:
+                progress(entry)
+    return entries
+
+
+def standings(entries, confidence=0.95):
+    """Overall ranking: [(bot, mean survival, (lo, hi), mean days, games per CPU-second)].
+
+    The interval is a Wilson interval for the average of the per-difficulty
+    proportions, taken over their effective number of games (k^2 / sum(1/n),
+    the pooled count when every difficulty played as many games), so it
+    stays sensible at 0% and 100%.
+    """
+    bots = {}
+    for entry in entries.values():
+        bots.setdefault(entry.bot, []).append(entry)
+    table = []
+    for bot, rows in bots.items():
+        k = len(rows)
+        mean = sum(e.survival for e in rows) / k
+        n = k * k / sum(1 / max(1, e.agg.games) for e in rows)
+        days = sum(e.days for e in rows) / k
+        games = sum(e.agg.games for e in rows)
+        cpu = sum(e.cpu for e in rows)
+        table.append((bot, mean, wilson_interval(mean * n, n, confidence), days,
+                      games / cpu if cpu else 0.0))
+    table.sort(key=lambda row: (-row[1], -row[3]))
+    return table
+
+
+def format_tables(entries, confidence=0.95):
+    difficulties = list(dict.fromkeys(e.difficulty for e in entries.values()))
+    games = min(e.agg.games for e in entries.values())
+    ci = f"{confidence:.0%} CI"
+    lines = [f"== Overall: mean over {len(difficulties)} difficulties, {games} games each",
+             f"{'rank':>4}  {'bot':<14} {'survival':>7} {ci:<17} {'days':>6} {'games/cpu-s':>12}"]
+    for rank, (bot, mean, (lo, hi), days, rate) in enumerate(standings(entries, confidence), 1):
+        lines.append(f"{rank:>4}  {bot:<14} {mean:7.1%} [{lo:5.1%}, {hi:5.1%}] {days:6.2f} {rate:12.0f}")
+    for difficulty in difficulties:
+        rows = sorted((e for e in entries.values() if e.difficulty == difficulty),
+                      key=lambda e: (-e.survival, -e.days))
+        lines.append("")
+        lines.append(f"== {difficulty}")
+        lines.append(f"{'rank':>4}  {'bot':<14} {'survival':>7} {ci:<17} {'days':>6} {ci:<15}")
+        for rank, e in enumerate(rows, 1):
+            lo, hi = e.agg.survival.interval(confidence)
+            dlo, dhi = e.agg.moments['days_survived'].interval(confidence)
+            lines.append(f"{rank:>4}  {e.bot:<14} {e.survival:7.1%} [{lo:5.1%}, {hi:5.1%}] "
+                         f"{e.days:6.2f} [{dlo:5.2f}, {dhi:5.2f}]")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank the reference bots on every difficulty.")
+    parser.add_argument('--bots', nargs='+', choices=list(simulation.POLICIES),
+                        help="bots to enter (default: all)")
+    parser.add_argument('--difficulty', nargs='+', choices=list(survival.DIFFICULTY_PRESETS),
+                        help="difficulties to play (default: all presets)")
+    parser.add_argument('--games', type=int, default=1000, help="games per bot per difficulty")
+    parser.add_argument('--seed', default=0, help="master seed shared by all bots")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--chunk', type=int, default=250, help="games per task sent to a worker")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    entries = run_tournament(args.bots, args.difficulty, args.games, args.seed, args.workers, args.chunk)
+    elapsed = time.perf_counter() - start
+    total = sum(e.agg.games for e in entries.values())
+    print(format_tables(entries, args.confidence))
+    print(f"\n{total} games in {elapsed:.1f}s ({total / elapsed:.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Columnar per-day trajectory store for offline analysis of simulated games.
+
+A store is a directory holding one `.npy` file per column plus a small
+`meta.json`. Rows are day-records (one per game per in-game day) appended in
+game order; `game_offsets.npy` gives the first row of every game so a game's
+history is a contiguous slice.
+
+The writer buffers rows and appends raw little-endian bytes to each column
+file, patching the fixed-size `.npy` header with the final length on close.
+The reader memory-maps every column (`numpy.load(mmap_mode='r')`), so slicing
+by game, day or column is zero-copy and scanning a billion rows never needs
+more RAM than the chunk being looked at.
+
+    python trajectory.py record --difficulty Hard --games 100000 --out runs/hard
+    python trajectory.py info runs/hard
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+import survival
+import simulation
+
+# Column name -> numpy dtype. Actions are indices into survival.ACTION_OPTIONS
+# (-1 when the player died before taking the second action).
+COLUMNS = {
+    'game': '<u4',
+    'day': '<u1',
+    'health': '<i2',
+    'hunger': '<i2',
+    'thirst': '<i2',
+    'food': '<i2',
+    'water': '<i2',
+    'season': '<u1',
+    'action1': '<i1',
+    'action2': '<i1',
+    'night_event': '<u1',
+}
+NIGHT_EVENTS = ['none', 'merchant', 'bandits', 'combat', 'predator', 'traveler']
+
+FORMAT_NAME = 'survival-trajectories'
+FORMAT_VERSION = 1
+_HEADER_SIZE = 128   # fixed .npy header length so it can be rewritten in place
+_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def _npy_header(dtype, rows):
+    header = repr({'descr': dtype, 'fortran_order': False, 'shape': (rows,)})
+    pad = _HEADER_SIZE - len(_MAGIC) - 2 - len(header) - 1
+    return _MAGIC + (_HEADER_SIZE - len(_MAGIC) - 2).to_bytes(2, 'little') + \
+        (header + ' ' * pad + '\n').encode('latin1')
+
+
+class TrajectoryWriter:
+    """Append day-records to a columnar store. Use as a context manager."""
+
+    def __init__(self, path, buffer_rows=65536, meta=None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.meta = dict(meta or {})
+        self.rows = 0
+        self.games = 0
+        self._files = {}
+        self._buffers = {name: np.empty(buffer_rows, dtype) for name, dtype in COLUMNS.items()}
+        self._offsets = []
+        self._pending = 0
+        for name, dtype in COLUMNS.items():
+            f = open(os.path.join(path, name + '.npy'), 'wb')
+            f.write(_npy_header(dtype, 0))
+            self._files[name] = f
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_game(self):
+        """Mark the start of a new game; returns its game number."""
+        self._offsets.append(self.rows + self._pending)
+        self.games += 1
+        return self.games - 1
+
+    def append(self, state, actions, night_event):
+        """Record the end-of-day state of the current game (play_game on_day signature)."""
+        i = self._pending
+        b = self._buffers
+        b['game'][i] = self.games - 1
+        b['day'][i] = state['day']
+        b['health'][i] = state['health']
+        b['hunger'][i] = state['hunger']
+        b['thirst'][i] = state['thirst']
+        b['food'][i] = state['food']
+        b['water'][i] = state['water']
+        b['season'][i] = survival.SEASONS.index(state['season'])
+        b['action1'][i] = actions[0] if actions else -1
+        b['action2'][i] = actions[1] if len(actions) > 1 else -1
+        b['night_event'][i] = NIGHT_EVENTS.index(night_event) if night_event in NIGHT_EVENTS else 0
+        self._pending += 1
+        if self._pending == self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        n = self._pending
+        if n:
+            for name, f in self._files.items():
+                f.write(self._buffers[name][:n].tobytes())
+            self.rows += n
+            self._pending = 0
+
+    def close(self):
+        if not self._files:
+            return
+        self.flush()
+        for name, f in self._files.items():
+            f.seek(0)
+            f.write(_npy_header(COLUMNS[name], self.rows))
+            f.close()
+        self._files = {}
+        np.save(os.path.join(self.path, 'game_offsets.npy'),
+                np.asarray(self._offsets + [self.rows], dtype='<u8'))
+        meta = dict(self.meta, format=FORMAT_NAME, version=FORMAT_VERSION, rows=self.rows,
+                    games=self.games, columns=COLUMNS, seasons=survival.SEASONS,
+                    night_events=NIGHT_EVENTS)
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+
+class TrajectoryStore:
+    """Read-only, memory-mapped view of a store written by TrajectoryWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != FORMAT_NAME:
+            raise ValueError(f"{path} is not a trajectory store")
+        self.columns = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+                        for name in self.meta['columns']}
+        self.offsets = np.load(os.path.join(path, 'game_offsets.npy'), mmap_mode='r')
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    @property
+    def games(self):
+        return self.meta['games']
+
+    def column(self, name):
+        return self.columns[name]
+
+    def game(self, index, columns=None):
+        """Dict of column -> zero-copy slice holding one game's days."""
+        lo, hi = int(self.offsets[index]), int(self.offsets[index + 1])
+        return {name: self.columns[name][lo:hi] for name in (columns or self.columns)}
+
+    def games_slice(self, start, stop, columns=None):
+        """Contiguous rows for games start..stop-1 (zero-copy)."""
+        lo, hi = int(self.offsets[start]), int(self.offsets[stop])
+        return {name: self.columns[name][lo:hi] for name in (columns or self.columns)}
+
+    def chunks(self, columns=None, chunk_rows=1 << 22):
+        """Yield dicts of column slices covering the store `chunk_rows` rows at a time."""
+        for lo in range(0, self.rows, chunk_rows):
+            hi = min(self.rows, lo + chunk_rows)
+            yield {name: self.columns[name][lo:hi] for name in (columns or self.columns)}
+
+    def day(self, day, columns=None):
+        """Rows recorded on in-game `day` across all games (copies only the matches)."""
+        parts = {name: [] for name in (columns or self.columns)}
+        for chunk in self.chunks(list(parts) + ['day']):
+            mask = chunk['day'] == day
+            for name in parts:
+                parts[name].append(chunk[name][mask])
+        return {name: np.concatenate(v) if v else np.empty(0, COLUMNS[name]) for name, v in parts.items()}
+
+    def mean_by_day(self, column):
+        """Mean of `column` for each in-game day, computed in one streaming pass."""
+        max_day = self.meta.get('max_days', survival.MAX_DAYS) + 1
+        sums = np.zeros(max_day + 1)
+        counts = np.zeros(max_day + 1)
+        for chunk in self.chunks([column, 'day']):
+            days = chunk['day'].astype(np.intp)
+            sums += np.bincount(days, weights=chunk[column], minlength=max_day + 1)[:max_day + 1]
+            counts += np.bincount(days, minlength=max_day + 1)[:max_day + 1]
+        with np.errstate(invalid='ignore'):
+            return sums / counts
+
+
+def record(path, difficulty, games, master_seed=0, policy=None, max_days=None):
+    """Simulate `games` games and write their trajectories to `path`."""
+    policy = policy or simulation.HeuristicPolicy()
+    meta = {'difficulty': difficulty, 'policy': policy.name, 'master_seed': master_seed,
+            'max_days': max_days or survival.MAX_DAYS}
+    with TrajectoryWriter(path, meta=meta) as writer:
+        for index in range(games):
+            writer.start_game()
+            simulation.play_game(difficulty, policy, simulation.game_seed(master_seed, difficulty, index),
+                                 max_days, on_day=writer.append)
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or inspect per-day game trajectories.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help="simulate games and store their trajectories")
+    rec.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    rec.add_argument('--games', type=int, default=1000)
+    rec.add_argument('--seed', default=0)
+    rec.add_argument('--out', required=True)
+    info = sub.add_parser('info', help="summarise a stored trajectory set")
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'record':
+        rows = record(args.out, args.difficulty, args.games, args.seed)
+        print(f"Wrote {rows} day-records for {args.games} games to {args.out}")
+    else:
+        store = TrajectoryStore(args.path)
+        print(f"{store.games} games, {store.rows} day-records "
+              f"({store.meta.get('difficulty')}, policy {store.meta.get('policy')})")
+        health = store.mean_by_day('health')
+        for day in range(1, len(health)):
+            if not np.isnan(health[day]):
+                print(f"  day {day:>2}: mean health {health[day]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
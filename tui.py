@@ -0,0 +1,404 @@
+"""Full-screen terminal front end for the survival game.
+
+Runs survival.main() unchanged, but instead of every print() going straight
+to the terminal the screen is split into fixed panels:
+
+* a status panel at the top, kept current from the live game state. Each
+  field has its own cell and a cell is only rewritten when its text changed;
+* a menu panel showing the options of the current prompt
+  (survival.MENU_HOOK). It is redrawn only when the options change, so the
+  action menu is drawn once instead of once per action;
+* a scrolling log (a terminal scroll region) for everything else the game
+  prints.
+
+Drawing uses curses' terminfo layer (setupterm/tigetstr/tparm) rather than
+curses windows: ncurses' doupdate() issues a write() per changed span of the
+screen, while here everything that changed since the last prompt goes into
+one buffer, sent with a single write when the game asks for input.
+
+    python tui.py [--difficulty Hard] [--seed N]
+    python tui.py --bench [--games 5]    # bytes and write syscalls per day, text vs tui
+"""
+import argparse
+import curses
+import json
+import locale
+import math
+import os
+import subprocess
+import sys
+import tempfile
+
+import simulation
+import survival
+
+SCRIPT = os.path.abspath(__file__)
+MIN_SIZE = (24, 80)         # lines, columns
+MENU_COLUMN = 40            # width of one column of the menu panel
+MENU_ROWS = 8               # the action menu in two columns
+# Status panel: rows of (field, label, width)
+STATUS_LAYOUT = (
+    (('day', 'Day', 3), ('season', 'Season', 18), ('health', 'Health', 3),
+     ('hunger', 'Hunger', 3), ('thirst', 'Thirst', 3)),
+    (('food', 'Food', 3), ('water', 'Water', 3), ('gold', 'Gold', 4),
+     ('bandages', 'Bandages', 3), ('cloth', 'Cloth', 3)),
+    (('strength', 'Str', 2), ('agility', 'Agi', 2), ('endurance', 'End', 2),
+     ('shelter', 'Shelter', 3), ('fire', 'Fire', 3), ('odds', 'Odds', 4)),
+    (('effects', 'Effects', 60),),
+)
+
+
+def status_fields(state):
+    """{field: text} for every STATUS_LAYOUT cell."""
+    fields = {key: str(state.get(key, 0)) for key in
+              ('day', 'health', 'hunger', 'thirst', 'food', 'water', 'gold', 'bandages', 'cloth')}
+    for key in ('strength', 'agility', 'endurance'):
+        fields[key] = str(state.get(key, 1))
+    fields['season'] = (f"{state.get('season', 'Summer')} "
+                        f"({survival.temperature_label(state.get('temperature', 0))})")
+    fields['shelter'] = 'Yes' if state.get('shelter') else 'No'
+    fields['fire'] = 'Yes' if state.get('fire') else 'No'
+    fields['effects'] = ', '.join(sorted(survival.effect_names(state))) or 'None'
+    chance = survival.survival_odds(state) if survival.SHOW_ODDS else None
+    fields['odds'] = f"{chance:.0%}" if chance is not None else '-'
+    return fields
+
+
+class _LogWriter:
+    """sys.stdout stand-in that keeps the game's text until the next prompt."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, s):
+        self.parts.append(s)
+        return len(s)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        text = ''.join(self.parts)
+        self.parts = []
+        return text
+
+
+class Terminal:
+    """The few terminfo operations the panels need, collected in one buffer."""
+
+    def __init__(self, fd):
+        curses.setupterm(fd=fd)
+        self.fd = fd
+        self.encoding = locale.getpreferredencoding(False)
+        self.caps = {name: curses.tigetstr(name) for name in ('cup', 'csr', 'el', 'clear', 'smcup', 'rmcup')}
+        missing = [name for name in ('cup', 'csr', 'el', 'clear') if not self.caps[name]]
+        if missing:
+            raise SystemExit(f"tui.py: the terminal lacks {', '.join(missing)}")
+        self.cols, self.lines = os.get_terminal_size(fd)
+        self.buf = bytearray()
+
+    def cap(self, name, *params):
+        self.buf += curses.tparm(self.caps[name], *params) if params else (self.caps[name] or b'')
+
+    def at(self, row, col, text, clear=False):
+        """Write `text` at (row, col), clipped to the screen; `clear` erases the rest of the row."""
+        self.cap('cup', row, col)
+        self.buf += text[:self.cols - col - 1].encode(self.encoding, 'replace')
+        if clear:
+            self.cap('el')
+
+    def flush(self):
+        data = memoryview(bytes(self.buf))
+        self.buf.clear()
+        while data:
+            data = data[os.write(self.fd, data):]
+
+
+class PanelUI:
+    """Status, log, menu and input panels on a full-screen terminal.
+
+    `answer(prompt)` replaces the keyboard when given (benchmarks, demos);
+    the screen is drawn exactly as for a player.
+    """
+
+    def __init__(self, fd=None, answer=None):
+        self.term = term = Terminal(sys.__stdout__.fileno() if fd is None else fd)
+        if term.lines < MIN_SIZE[0] or term.cols < MIN_SIZE[1]:
+            raise SystemExit(f"tui.py needs a terminal of at least {MIN_SIZE[1]}x{MIN_SIZE[0]}")
+        self.answer = answer
+        self.state = None
+        self.options = None
+        self.out = _LogWriter()
+        # rows: status, rule, log, rule, menu, input line, one spare row so the
+        # newline of a typed answer never scrolls the whole screen
+        status_rows = len(STATUS_LAYOUT)
+        self.log_rows = (status_rows + 1, term.lines - MENU_ROWS - 4)
+        self.menu_top = term.lines - MENU_ROWS - 2
+        self.input_row = term.lines - 2
+        self.cells = {}       # field -> (row, column, width)
+        self.shown = {}       # field -> text on screen
+        for row, cells in enumerate(STATUS_LAYOUT):
+            x = 0
+            for key, label, width in cells:
+                self.cells[key] = (row, x + len(label) + 2, min(width, term.cols - x - len(label) - 3))
+                x += len(label) + width + 4
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        """Switch to the full-screen layout (alternate screen) and draw the labels."""
+        term = self.term
+        term.cap('smcup')
+        term.cap('clear')
+        for row, cells in enumerate(STATUS_LAYOUT):
+            for key, label, _ in cells:
+                term.at(row, self.cells[key][1] - len(label) - 2, f"{label}: ")
+        rule = '-' * (term.cols - 1)
+        term.at(self.log_rows[0] - 1, 0, rule)
+        term.at(self.log_rows[1] + 1, 0, rule)
+        term.flush()
+
+    def close(self):
+        self.term.cap('csr', 0, self.term.lines - 1)
+        self.term.cap('rmcup')
+        self.term.flush()
+
+    # --- game hooks ---------------------------------------------------------------
+    def started(self, state):
+        self.state = state
+
+    def show_status(self, state):
+        self.state = state
+
+    def show_menu(self, options):
+        # kept until the next menu, so re-asking after a bad answer leaves it up
+        self.options = options
+
+    def read_line(self, prompt):
+        """survival's input(): bring every panel up to date in one write, then read."""
+        self._draw_log()
+        if self.state is not None:
+            self._draw_status()
+        self._draw_menu()
+        self.term.at(self.input_row, 0, prompt, clear=True)
+        self.term.flush()
+        if self.answer is not None:
+            line = self.answer(prompt)
+        else:
+            line = sys.stdin.readline()
+            if not line:
+                raise SystemExit(0)
+            line = line.rstrip('\n')
+        self.out.write(f"{prompt}{line}\n")
+        return line
+
+    # --- drawing (buffered; read_line() sends it) ------------------------------
+    def _draw_status(self):
+        for key, text in status_fields(self.state).items():
+            if self.shown.get(key) != text:
+                row, x, width = self.cells[key]
+                self.term.at(row, x, text[:width].ljust(width))
+                self.shown[key] = text
+
+    def _draw_menu(self):
+        options = tuple(self.options or ())
+        if self.shown.get('<menu>') == options:
+            return
+        self.shown['<menu>'] = options
+        cols = self.term.cols
+        columns = max(1, math.ceil(len(options) / MENU_ROWS))
+        width = max(MENU_COLUMN, cols // columns) if columns > 1 else cols
+        rows = [''] * MENU_ROWS
+        for i, option in enumerate(options):
+            column, row = divmod(i, MENU_ROWS)
+            rows[row] = rows[row].ljust(column * width) + f"{i + 1:>2}. {option}"[:width - 1]
+        for row, text in enumerate(rows):
+            self.term.at(self.menu_top + row, 0, text, clear=True)
+
+    def _draw_log(self):
+        text = self.out.take().expandtabs()
+        if not text:
+            return
+        width = self.term.cols - 1
+        lines = []
+        for line in text.rstrip('\n').split('\n'):
+            lines.extend(line[i:i + width] for i in range(0, max(1, len(line)), width))
+        top, bottom = self.log_rows
+        lines = lines[-(bottom - top + 1):]
+        term = self.term
+        term.cap('csr', top, bottom)
+        term.cap('cup', bottom, 0)
+        for line in lines:
+            term.buf += b'\n'    # scrolls the log region up one row
+            term.at(bottom, 0, line, clear=True)
+        term.cap('csr', 0, term.lines - 1)
+
+    # --- running a game ---------------------------------------------------------------
+    def play(self, difficulty='Normal', seed=None):
+        """survival.main() with its hooks, input() and stdout pointed at this UI."""
+        saved = (survival.MENU_HOOK, survival.STATUS_HOOK, survival.GAME_START_HOOK, sys.stdout)
+        survival.MENU_HOOK, survival.STATUS_HOOK = self.show_menu, self.show_status
+        survival.GAME_START_HOOK = self.started
+        survival.input = self.read_line
+        sys.stdout = self.out
+        try:
+            survival.main(difficulty, seed=seed)
+        except SystemExit:        # the player quit
+            pass
+        finally:
+            survival.MENU_HOOK, survival.STATUS_HOOK, survival.GAME_START_HOOK, sys.stdout = saved
+            del survival.input
+        if self.answer is None:
+            self.read_line("Game over - press Enter to leave. ")
+
+
+# --- Text vs panel output benchmark ---------------------------------------------------
+class _Script:
+    """Answers the game's keyboard prompts like simulation.HeuristicPolicy,
+    and quits (as the player would) once `max_days` days have been played."""
+
+    def __init__(self, max_days):
+        self.policy = simulation.HeuristicPolicy()
+        self.max_days = max_days
+        self.options = None
+
+    def watch(self, prompt_choice):
+        def watched(options):
+            self.options = options
+            return prompt_choice(options)
+        return watched
+
+    def answer(self, state, prompt):
+        if state['day'] > self.max_days:
+            raise SystemExit(0)
+        kind = simulation.prompt_kind(self.options or ())
+        if kind == 'menu':
+            return str(self.policy.choose_action(state) + 1)
+        return str(self.policy.choose_option(state, kind, self.options) + 1)
+
+
+def _io_counters():
+    with open('/proc/self/io') as f:
+        return {key: int(value) for key, value in (line.split(': ') for line in f)}
+
+
+def _bench_child(mode, difficulty, seeds, days_per_game, out):
+    """Play scripted games in `mode` on this process's terminal; write counters to `out`."""
+    script = _Script(days_per_game)
+    original = survival.prompt_choice
+    survival.prompt_choice = script.watch(original)
+    days = 0
+    before = _io_counters()
+    if mode == 'tui':
+        with PanelUI(answer=lambda prompt: script.answer(ui.state, prompt)) as ui:
+            for seed in seeds:
+                ui.play(difficulty, seed)
+                days += ui.state['day'] - 1
+    else:
+        game = {}
+
+        def scripted_input(prompt):
+            sys.stdout.write(prompt)
+            sys.stdout.flush()
+            return script.answer(game['state'], prompt)
+        survival.GAME_START_HOOK = lambda state: game.update(state=state)
+        survival.input = scripted_input
+        for seed in seeds:
+            try:
+                survival.main(difficulty, seed=seed)
+            except SystemExit:
+                pass
+            days += game['state']['day'] - 1
+        sys.stdout.flush()
+    after = _io_counters()
+    survival.prompt_choice = original
+    with open(out, 'w') as f:
+        json.dump({'days': days, 'writes': after['syscw'] - before['syscw'],
+                   'bytes': after['wchar'] - before['wchar']}, f)
+
+
+def _run_on_pty(mode, difficulty, seeds, days, size):
+    """Run one benchmark child on a fresh pseudo-terminal of `size` (lines, columns)."""
+    import fcntl
+    import pty
+    import struct
+    import termios
+    master, slave = pty.openpty()
+    fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack('HHHH', size[0], size[1], 0, 0))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'counters.json')
+        proc = subprocess.Popen(
+            [sys.executable, SCRIPT, '--bench-child', mode, '--difficulty', difficulty, '--out', out,
+             '--days', str(days),
+             '--seeds'] + [str(s) for s in seeds],
+            stdin=slave, stdout=slave, stderr=slave, env=dict(os.environ, TERM='xterm-256color'))
+        os.close(slave)
+        received = 0
+        while True:
+            try:
+                chunk = os.read(master, 65536)
+            except OSError:       # EIO once the child has closed the terminal
+                break
+            if not chunk:
+                break
+            received += len(chunk)
+        os.close(master)
+        if proc.wait() != 0:
+            raise RuntimeError(f"{mode} benchmark run failed (exit {proc.returncode})")
+        with open(out) as f:
+            counters = json.load(f)
+    counters['received'] = received
+    return counters
+
+
+def bench(games=5, difficulty='Normal', seed=0, days=survival.MAX_DAYS, size=MIN_SIZE):
+    """Play the same scripted games in text and tui mode, each on its own pty.
+
+    The interactive game has no win condition, so each game is played to
+    death or for `days` days. Returns {mode: {'days', 'writes', 'bytes', 'received'}}: write syscalls
+    and bytes written by the game process, and bytes that reached the terminal.
+    """
+    seeds = [f"{seed}:{i}" for i in range(games)]
+    return {mode: _run_on_pty(mode, difficulty, seeds, days, size) for mode in ('text', 'tui')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play the survival game in a full-screen interface.")
+    parser.add_argument('--difficulty', default='Normal', choices=list(survival.DIFFICULTY_PRESETS))
+    parser.add_argument('--seed', help="RNG seed for the game (benchmark: master seed)")
+    parser.add_argument('--bench', action='store_true',
+                        help="compare bytes and write syscalls per day with the text mode")
+    parser.add_argument('--games', type=int, default=5, help="games per mode with --bench")
+    parser.add_argument('--days', type=int, default=survival.MAX_DAYS, help="days per game with --bench")
+    parser.add_argument('--bench-child', choices=('text', 'tui'), help=argparse.SUPPRESS)
+    parser.add_argument('--seeds', nargs='*', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.bench_child:
+        _bench_child(args.bench_child, args.difficulty, args.seeds, args.days, args.out)
+    elif args.bench:
+        results = bench(args.games, args.difficulty, args.seed or 0, args.days)
+        print(f"{args.games} scripted {args.difficulty} games per mode on a "
+              f"{MIN_SIZE[1]}x{MIN_SIZE[0]} pty")
+        print(f"{'mode':<8} {'days':>5} {'writes/day':>11} {'bytes/day':>10} {'to tty/day':>11}")
+        for mode, r in results.items():
+            days = max(1, r['days'])
+            print(f"{mode:<8} {r['days']:>5} {r['writes'] / days:>11.1f} {r['bytes'] / days:>10.0f} "
+                  f"{r['received'] / days:>11.0f}")
+        text, tui = results['text'], results['tui']
+        print(f"tui mode: {tui['writes'] / max(1, text['writes']):.0%} of the write syscalls, "
+              f"{tui['received'] / max(1, text['received']):.0%} of the bytes sent")
+    else:
+        locale.setlocale(locale.LC_ALL, '')
+        with PanelUI() as ui:
+            ui.play(args.difficulty, args.seed)
+
+
+if __name__ == "__main__":
+    main()